@@ -0,0 +1,53 @@
+"""
+Per-call overhead of evaluating a DFTermSeries with and without a
+preallocated SeriesWorkspace.
+
+The 'legacy' entry points of libcelmech allocate and free power tables 
+and the Python wrapper allocates ctypes output arrays on every call. 
+The workspace entry points reuse preallocated tables and buffers.
+
+Usage::
+
+    python benchmarks/poisson_series_workspace.py
+"""
+import timeit
+import numpy as np
+from ctypes import c_double, pointer, byref
+from celmech.poisson_series import DFTermSeries
+from celmech.poisson_series import _evaluate_series_and_jacobian
+
+def legacy_evaluate_with_jacobian(series,lambda_arr,xy_arr):
+    expIL = np.exp( 1j * lambda_arr)
+    sum_re,sum_im  = c_double(),c_double()
+    dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im = [(4 * c_double)() for _ in range(4)]
+    jac_re,jac_im = [(64 * c_double)() for _ in range(2)]
+    _evaluate_series_and_jacobian(
+            expIL, xy_arr, byref(series.terms), series.kmax, series.Nmax,
+            pointer(sum_re), pointer(sum_im),
+            dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im,
+            jac_re, jac_im
+        )
+    dSdxy = np.concatenate((
+        np.array(dS_dxy_re) + 1j * np.array(dS_dxy_im),
+        np.array(dS_dxybar_re) + 1j * np.array(dS_dxybar_im)
+        ))
+    derivs = np.real(series.Omega @ series.dXY_dQP @ dSdxy)
+    jac_xy = (np.array(jac_re) + 1j * np.array(jac_im)).reshape(8,8)
+    jac_qp = series.Omega @ np.real(series.dXY_dQP @ jac_xy @ series.dXY_dQP.T)
+    return np.float64(sum_re), derivs, jac_qp, jac_xy
+
+def main():
+    lambda_arr = np.array([0.3,1.7])
+    xy_arr = np.array([0.02+0.01j,0.015-0.02j,0.003j,0.004])
+    print("{:>8s} {:>8s} {:>14s} {:>14s} {:>8s}".format("order","Nterms","legacy [us]","workspace [us]","speedup"))
+    for order in (1,2,4,6):
+        series = DFTermSeries.from_resonance_range(3,1,1,order,1,3e-5,3e-5,1,1,0.003,0.0035)
+        number = 20000
+        t_old = timeit.timeit(lambda: legacy_evaluate_with_jacobian(series,lambda_arr,xy_arr),number=number)
+        t_new = timeit.timeit(lambda: series._evaluate_with_jacobian(lambda_arr,xy_arr),number=number)
+        print("{:8d} {:8d} {:14.2f} {:14.2f} {:8.2f}".format(
+            order, len(series.coeff_arr), 1e6 * t_old / number, 1e6 * t_new / number, t_old / t_new
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+Persistent on-disk storage of disturbing function coefficient expansions.
+
+The dictionaries returned by :func:`celmech.disturbing_function.DFCoeff_C` and
+:func:`celmech.disturbing_function.DFCoeff_Cbar` do not depend on the
+semi-major axis ratio, alpha, but are expensive to construct. A
+:class:`DFCoeffStore` saves these dictionaries to disk as a set of
+numpy arrays that are memory-mapped on first use so that new Python
+processes can look up previously computed coefficients instead
+of re-deriving them.
+
+Tables can be precomputed from the command line with::
+
+    python -m celmech.df_coefficient_store 8 --resonance 3 1 --resonance 5 2
+
+which stores all secular terms, along with all terms associated with the
+3:2 and 5:3 MMRs, up to 8th order in eccentricities and inclinations.
+"""
+import os
+import json
+import warnings
+import numpy as np
+from . import __version__
+
+_STORE_FORMAT_VERSION = 1
+_STORE_KINDS = ('C','Cbar')
+
+def default_store_path():
+    """
+    Get the default location of the disturbing function coefficient store.
+    The location can be set with the environment variable
+    ``CELMECH_DFCOEFF_STORE``. Otherwise, the store is placed in
+    ``~/.celmech/df_coefficients``.
+
+    Returns
+    -------
+    path : str
+    """
+    path = os.environ.get('CELMECH_DFCOEFF_STORE')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'),'.celmech','df_coefficients')
+    return path
+
+def _kz_key(kvec,zvec):
+    return tuple(int(k) for k in kvec) + tuple(int(z) for z in zvec)
+
+class DFCoeffStore(object):
+    """
+    An on-disk store of disturbing function coefficient dictionaries
+    keyed by (kvec,zvec).
+
+    Coefficient dictionaries of each kind ('C' for
+    :func:`DFCoeff_C <celmech.disturbing_function.DFCoeff_C>` and
+    'Cbar' for :func:`DFCoeff_Cbar <celmech.disturbing_function.DFCoeff_Cbar>`)
+    are stored as flat numpy arrays that are memory-mapped the first
+    time a coefficient of that kind is looked up. Coefficients added with
+    :meth:`add` are kept in memory until :meth:`save` is called.
+
+    Stores written by a different version of celmech or with a different
+    storage format are ignored.
+
+    Arguments
+    ---------
+    path : str, optional
+        Directory containing the store. By default, the path
+        returned by :func:`default_store_path` is used.
+    """
+    def __init__(self,path = None):
+        if path is None:
+            path = default_store_path()
+        self.path = path
+        self._tables = dict()
+        self._pending = {kind:dict() for kind in _STORE_KINDS}
+        self._valid = None
+
+    @property
+    def metadata(self):
+        return {'format_version':_STORE_FORMAT_VERSION,'celmech_version':__version__}
+
+    def _check_valid(self):
+        if self._valid is None:
+            meta_file = os.path.join(self.path,'metadata.json')
+            if not os.path.isfile(meta_file):
+                self._valid = False
+            else:
+                with open(meta_file) as fi:
+                    meta = json.load(fi)
+                self._valid = meta == self.metadata
+                if not self._valid:
+                    warnings.warn(
+                        "Ignoring disturbing function coefficient store at {} written with {}".format(self.path,meta)
+                    )
+        return self._valid
+
+    def _file(self,kind,name):
+        return os.path.join(self.path,"{}_{}.npy".format(kind,name))
+
+    def _get_table(self,kind):
+        try:
+            return self._tables[kind]
+        except KeyError:
+            pass
+        table = None
+        if self._check_valid() and os.path.isfile(self._file(kind,'keys')):
+            arrs = {
+                name:np.load(self._file(kind,name),mmap_mode='r')
+                for name in ('keys','offsets','terms','values','indirect')
+            }
+            index = {tuple(key):i for i,key in enumerate(arrs['keys'].tolist())}
+            table = (index,arrs)
+        self._tables[kind] = table
+        return table
+
+    def _read_entry(self,arrs,i):
+        i0,i1 = arrs['offsets'][i],arrs['offsets'][i+1]
+        terms = np.array(arrs['terms'][i0:i1])
+        values = np.array(arrs['values'][i0:i1])
+        coeff = {
+            (int(p),(s,int(j),int(n))):val
+            for (p,s,j,n),val in zip(terms.tolist(),values.tolist())
+        }
+        indirect = float(arrs['indirect'][i])
+        if not np.isnan(indirect):
+            coeff['indirect'] = indirect
+        return coeff
+
+    def lookup(self,kind,kvec,zvec):
+        """
+        Look up a coefficient dictionary.
+
+        Arguments
+        ---------
+        kind : str
+            Either 'C' or 'Cbar'
+        kvec : tuple
+            Cosine argument integer coefficients (k1,...,k6)
+        zvec : tuple
+            Exponents (z1,...,z4) selecting the term.
+
+        Returns
+        -------
+        dict or None
+            A new dictionary in the form returned by
+            DFCoeff_C/DFCoeff_Cbar or None if the
+            term is not stored.
+        """
+        key = _kz_key(kvec,zvec)
+        try:
+            return dict(self._pending[kind][key])
+        except KeyError:
+            pass
+        table = self._get_table(kind)
+        if table is None:
+            return None
+        index,arrs = table
+        i = index.get(key)
+        if i is None:
+            return None
+        return self._read_entry(arrs,i)
+
+    def add(self,kind,kvec,zvec,coeff):
+        """
+        Add a coefficient dictionary to the store. The entry is
+        written to disk the next time :meth:`save` is called.
+
+        Arguments
+        ---------
+        kind : str
+            Either 'C' or 'Cbar'
+        kvec : tuple
+            Cosine argument integer coefficients (k1,...,k6)
+        zvec : tuple
+            Exponents (z1,...,z4) selecting the term.
+        coeff : dict
+            Coefficient dictionary returned by DFCoeff_C/DFCoeff_Cbar
+        """
+        self._pending[kind][_kz_key(kvec,zvec)] = dict(coeff)
+
+    def keys(self,kind):
+        """
+        Get the set of (k1,...,k6,z1,...,z4) keys of stored
+        coefficients of a given kind.
+        """
+        table = self._get_table(kind)
+        stored = set() if table is None else set(table[0].keys())
+        return stored.union(self._pending[kind].keys())
+
+    def save(self):
+        """
+        Write all stored and pending coefficient dictionaries to disk.
+        """
+        os.makedirs(self.path,exist_ok=True)
+        for kind in _STORE_KINDS:
+            if not self._pending[kind]:
+                continue
+            entries = dict()
+            table = self._get_table(kind)
+            if table is not None:
+                index,arrs = table
+                for key,i in index.items():
+                    entries[key] = self._read_entry(arrs,i)
+            entries.update(self._pending[kind])
+            keys = sorted(entries.keys())
+            offsets = np.zeros(len(keys)+1,dtype=np.int64)
+            terms,values = [],[]
+            indirect = np.full(len(keys),np.nan)
+            for i,key in enumerate(keys):
+                coeff = entries[key]
+                for term,val in coeff.items():
+                    if term == 'indirect':
+                        indirect[i] = val
+                    else:
+                        p,(s,j,n) = term
+                        terms.append((p,s,j,n))
+                        values.append(val)
+                offsets[i+1] = len(values)
+            arrs = {
+                    'keys':np.array(keys,dtype=np.int64).reshape(-1,10),
+                    'offsets':offsets,
+                    'terms':np.array(terms,dtype=np.float64).reshape(-1,4),
+                    'values':np.array(values,dtype=np.float64),
+                    'indirect':indirect
+            }
+            for name,arr in arrs.items():
+                tmpfile = self._file(kind,name) + ".tmp.npy"
+                np.save(tmpfile,arr)
+                os.replace(tmpfile,self._file(kind,name))
+            self._tables.pop(kind,None)
+            self._pending[kind] = dict()
+        with open(os.path.join(self.path,'metadata.json'),'w') as fi:
+            json.dump(self.metadata,fi)
+        self._valid = True
+
+_default_store = None
+
+def get_default_store():
+    """
+    Get the store consulted by
+    :func:`DFCoeff_C <celmech.disturbing_function.DFCoeff_C>` and
+    :func:`DFCoeff_Cbar <celmech.disturbing_function.DFCoeff_Cbar>`.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = DFCoeffStore()
+    return _default_store
+
+def set_default_store(store):
+    """
+    Set the store consulted by
+    :func:`DFCoeff_C <celmech.disturbing_function.DFCoeff_C>` and
+    :func:`DFCoeff_Cbar <celmech.disturbing_function.DFCoeff_Cbar>`.
+
+    Arguments
+    ---------
+    store : :class:`DFCoeffStore` or None
+        Store to use. If None, the default store location
+        is used.
+    """
+    global _default_store
+    _default_store = store
+
+def precompute_DFCoeff_tables(max_order, resonances = [], include_secular = True, store = None):
+    """
+    Compute and save the coefficient dictionaries for all
+    disturbing function terms up to a given order.
+
+    Arguments
+    ---------
+    max_order : int
+        Maximum order in eccentricities and inclinations of
+        terms to store.
+    resonances : list, optional
+        List of (j,k) pairs. All terms associated with the
+        j:j-k MMRs and their harmonics up to max_order are stored.
+    include_secular : bool, optional
+        Whether to store all secular terms up to max_order.
+        Default is True.
+    store : :class:`DFCoeffStore`, optional
+        Store to save coefficients to. By default, the
+        store returned by :func:`get_default_store` is used.
+
+    Returns
+    -------
+    store : :class:`DFCoeffStore`
+    """
+    from .disturbing_function import DFCoeff_C, DFCoeff_Cbar
+    from .disturbing_function import SecularTermsList, ResonanceTermsList
+    if store is None:
+        store = get_default_store()
+    terms = []
+    if include_secular:
+        terms += SecularTermsList(0,max_order)
+    for j,k in resonances:
+        terms += ResonanceTermsList(j,k,k,max_order)
+    stored = {kind:store.keys(kind) for kind in _STORE_KINDS}
+    for kvec,zvec in terms:
+        key = _kz_key(kvec,zvec)
+        if key not in stored['Cbar']:
+            store.add('Cbar',kvec,zvec,DFCoeff_Cbar(*kvec,*zvec))
+            stored['Cbar'].add(key)
+        if key not in stored['C']:
+            store.add('C',kvec,zvec,DFCoeff_C(*kvec,*zvec))
+            stored['C'].add(key)
+    store.save()
+    return store
+
+def _main(argv = None):
+    import argparse
+    parser = argparse.ArgumentParser(
+            description = "Precompute disturbing function coefficient tables."
+    )
+    parser.add_argument('max_order',type=int, help = "Maximum order of terms to store.")
+    parser.add_argument(
+            '--resonance',nargs=2,type=int,action='append',default=[],metavar=('J','K'),
+            help="Also store terms of the J:J-K MMR. May be given more than once."
+    )
+    parser.add_argument('--no-secular',action='store_true',help="Do not store secular terms.")
+    parser.add_argument('--path',default=None,help="Store location (default: {})".format(default_store_path()))
+    args = parser.parse_args(argv)
+    store = DFCoeffStore(args.path)
+    precompute_DFCoeff_tables(
+            args.max_order,
+            resonances = [tuple(jk) for jk in args.resonance],
+            include_secular = not args.no_secular,
+            store = store
+    )
+    print("Stored {} coefficients in {}".format(len(store.keys('C')),store.path))
+
+if __name__ == '__main__':
+    _main()
@@ -7,7 +7,7 @@ import math
 import numpy as np
 from scipy.optimize import leastsq
 from scipy.special import poch,factorial2,binom,factorial,gamma,hyp2f1
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import warnings
 
 def get_DFCoeff_symbol(k1,k2,k3,k4,k5,k6,z1,z2,z3,z4,indexIn,indexOut):
@@ -164,10 +164,193 @@ def SecularTermsList(Nmin,Nmax):
                     args.append((js,zc))
     return args
 
+class LaplaceCoefficientCache(object):
+    r"""
+    A bounded cache of Laplace coefficients and their derivatives,
+
+    .. math::
+        \frac{d^n b_s^{(j)}(\alpha)}{d\alpha^n}~,
+
+    organized as one table of (s,j,n) values per semi-major axis ratio.
+
+    Values are computed with :func:`laplace_b_C` and stored in 
+    the table so that each (s,j,n) value is evaluated only once 
+    per value of alpha. Tables for the least recently used values
+    of alpha are discarded once more than `maxsize` tables are 
+    stored.
+
+    Arguments
+    ---------
+    maxsize : int, optional
+        Maximum number of alpha values for which tables
+        are kept. Default is 64.
+    """
+    def __init__(self,maxsize = 64):
+        assert maxsize > 0, "maxsize must be positive."
+        self.maxsize = maxsize
+        self._tables = OrderedDict()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def clear(self):
+        """
+        Discard all stored tables.
+        """
+        self._tables.clear()
+
+    def get_table(self,alpha):
+        """
+        Get the dictionary of Laplace coefficient values stored 
+        for semi-major axis ratio alpha. Entries are in the form
+        {(s,j,n) : value} with j>=0.
+
+        Arguments
+        ---------
+        alpha : float
+            Semi-major axis ratio a1/a2
+
+        Returns
+        -------
+        table : dict
+        """
+        key = float(alpha)
+        try:
+            table = self._tables.pop(key)
+        except KeyError:
+            assert key>=0 and key<1, "alpha not in range [0,1): alpha={}".format(alpha)
+            table = dict()
+            if len(self._tables) >= self.maxsize:
+                self._tables.popitem(last=False)
+        self._tables[key] = table
+        return table
+
+    def __call__(self,s,j,n,alpha):
+        """
+        Get the nth derivative with respect to alpha of the 
+        Laplace coefficient b_s^j(alpha).
+
+        Arguments
+        ---------
+        s : float 
+            half-integer parameter of Laplace coefficient. 
+        j : int 
+            integer parameter of Laplace coefficient. 
+        n : int 
+            return nth derivative with respect to a of b_s^j(a)
+        alpha : float
+            semimajor axis ratio a1/a2 (alpha)
+        """
+        return _laplace_b_from_table(s,j,n,alpha,self.get_table(alpha))
+
+    def table(self,sjn_list,alpha):
+        """
+        Compute Laplace coefficients for all (s,j,n) 
+        combinations in a list.
+
+        Arguments
+        ---------
+        sjn_list : list
+            List of tuples (s,j,n) specifying the 
+            Laplace coefficients.
+        alpha : float or ndarray
+            Semi-major axis ratio(s). If an array is
+            passed, values are computed for all
+            array entries at once with :func:`laplace_b_C`
+            and are not cached.
+
+        Returns
+        -------
+        values : dict
+            Dictionary with entries {(s,j,n) : value}
+        """
+        if np.ndim(alpha) == 0:
+            table = self.get_table(alpha)
+            return {sjn:_laplace_b_from_table(*sjn,alpha,table) for sjn in sjn_list}
+        return {sjn:laplace_b_C(*sjn,alpha) for sjn in set(sjn_list)}
+
+def _laplace_b_from_table(s,j,n,alpha,table):
+    key = (s,abs(j),n)
+    try:
+        return table[key]
+    except KeyError:
+        pass
+    val = laplace_b_C(*key,alpha)
+    table[key] = val
+    return val
+
+laplace_coefficient_cache = LaplaceCoefficientCache()
+
+_laplace_b_array = clibcelmech.laplace_b_array
+_laplace_b_array.argtypes = [
+    c_double,
+    c_int,
+    c_int,
+    np.ctypeslib.ndpointer(dtype = np.float64,ndim=1,flags='C_CONTIGUOUS'),
+    c_int,
+    c_double,
+    np.ctypeslib.ndpointer(dtype = np.float64,ndim=1,flags='C_CONTIGUOUS')
+]
+_laplace_b_array.restype = None
+
+# Semi-major axis ratio above which the 'auto' method of laplace_b_C
+# switches from series summation to elliptic integrals and recurrences.
+_laplace_b_C_alpha_switch = 0.9
+
+def laplace_b_C(s,j,n,alpha,method = 'auto'):
+    """
+    Calculates nth derivative with respect to a (alpha) of Laplace coefficient b_s^j(a)
+    for an array of alpha values using compiled C code.
+
+    Arguments
+    ---------
+    s : float 
+        half-integer parameter of Laplace coefficient. 
+    j : int 
+        integer parameter of Laplace coefficient. 
+    n : int 
+        return nth derivative with respect to a of b_s^j(a)
+    alpha : float or ndarray
+        semimajor axis ratio a1/a2 (alpha)
+    method : str, optional
+        Method used to compute the Laplace coefficients. Options are:
+            - 'series': Sum the hypergeometric series of each 
+              coefficient to machine precision. The number of terms
+              needed grows like 1/(1-alpha) as alpha approaches 1.
+            - 'accelerated': Compute coefficients with s=1/2 from 
+              complete elliptic integrals and obtain coefficients 
+              with larger s and j from recurrence relations. The cost 
+              does not depend on alpha but precision is lost when 
+              alpha is small. Only available for half-integer s; 
+              the series is used otherwise.
+            - 'auto': Use 'series' for alpha < 0.9 and 'accelerated'
+              otherwise. Default.
+
+    Returns
+    -------
+    float or ndarray
+    """
+    try:
+        alpha_switch = {'series':np.inf,'accelerated':0.,'auto':_laplace_b_C_alpha_switch}[method]
+    except KeyError:
+        raise ValueError("'method' must be one of 'series', 'accelerated', or 'auto'.")
+    alpha_arr = np.asarray(alpha,dtype = np.float64)
+    shape = alpha_arr.shape
+    alpha_arr = np.ascontiguousarray(alpha_arr.reshape(-1))
+    assert np.all((alpha_arr >= 0) & (alpha_arr < 1)), "alpha not in range [0,1)."
+    assert n >= 0, "Derivative order must be non-negative."
+    out = np.zeros(alpha_arr.shape[0])
+    _laplace_b_array(s,j,n,alpha_arr,alpha_arr.shape[0],alpha_switch,out)
+    if len(shape) == 0:
+        return out[0]
+    return out.reshape(shape)
+
 def laplace_b(s,j,n,alpha):
     """
     Calculates nth derivative with respect to a (alpha) of Laplace coefficient b_s^j(a).
-    Uses recursion and scipy special functions. 
+    Values are computed with :func:`laplace_b_C` and stored in 
+    :data:`laplace_coefficient_cache` so that repeated evaluations
+    at the same alpha are not recomputed.
     
     Arguments
     ---------
@@ -177,26 +360,12 @@ def laplace_b(s,j,n,alpha):
         integer parameter of Laplace coefficient. 
     n : int 
         return nth derivative with respect to a of b_s^j(a)
-    a : float
+    alpha : float or ndarray
         semimajor axis ratio a1/a2 (alpha)
     """    
-    assert alpha>=0 and alpha<1, "alpha not in range [0,1): alpha={}".format(alpha)
-    if j<0:
-        return laplace_b(s,-j,n,alpha)
-    if n >= 2:
-        return s * (
-            laplace_b(s+1,j-1,n-1,alpha) 
-            -  2 * alpha * laplace_b(s+1,j,n-1,alpha)
-            + laplace_b(s+1,j+1,n-1,alpha)
-            - 2 * (n-1) * laplace_b(s+1,j,n-2,alpha)
-        )
-    if n==1:
-        return s * (
-            laplace_b(s+1,j-1,0,alpha) 
-            - 2 * alpha * laplace_b(s+1,j,0,alpha) 
-            + laplace_b(s+1,j+1,0,alpha)
-        )
-    return 2 * poch(s,j) * alpha**j * hyp2f1(s,s+j,j+1,alpha**2)/ factorial(j)
+    if np.ndim(alpha) > 0:
+        return laplace_coefficient_cache.table([(s,j,n)],alpha)[(s,j,n)]
+    return laplace_coefficient_cache(s,j,n,alpha)
 
 def eval_DFCoeff_dict(Coeff_dict,alpha):
     r"""
@@ -213,23 +382,26 @@ def eval_DFCoeff_dict(Coeff_dict,alpha):
 
         .. math::
          \mathrm{coeff}  \alpha^p \frac{ d^n b_s^{(j)}(\alpha)} { d\alpha^n}
-    alpha : float
+    alpha : float or ndarray
         Value of semi-major axis ratio a1/a2 appearing
-        as an argument of Laplace coefficients.
+        as an argument of Laplace coefficients. If an array
+        is passed, the sum is evaluated for every entry.
 
     Returns
     -------
-    float : 
+    float or ndarray : 
         The sum of Laplace coefficeint terms represented
         by dictionary entries.
     """
+    sjn_list = [key[1] for key in Coeff_dict.keys() if key != 'indirect']
+    bvals = laplace_coefficient_cache.table(sjn_list,alpha)
     tot = 0
     for key,val in Coeff_dict.items():
-        if key is 'indirect':
+        if key == 'indirect':
             tot += val / np.sqrt(alpha)
         else:
             p,arg = key
-            tot += val * alpha**p * laplace_b(*arg,alpha)
+            tot += val * alpha**p * bvals[arg]
     return tot
 
 def eccentricity_type_resonance_coefficient(j,k,l,alpha):
@@ -512,6 +684,14 @@ def FX(h,k,i,p,u,v1,v2,v3,v4,z1,z2,z3,z4):
 
     
 
+def _stored_DFCoeff(kind,kvec,zvec):
+    # imported here so that the store module can be run as a script
+    from .df_coefficient_store import get_default_store
+    return get_default_store().lookup(kind,kvec,zvec)
+
+# Memoized results of DFCoeff_Cbar keyed by (j1,...,j6,z1,...,z4,include_indirect).
+_DFCoeff_Cbar_cache = dict()
+
 def DFCoeff_Cbar(j1,j2,j3,j4,j5,j6,z1,z2,z3,z4,include_indirect = True):
     r"""
     Get the coefficient of the disturbing function term:
@@ -558,6 +738,16 @@ def DFCoeff_Cbar(j1,j2,j3,j4,j5,j6,z1,z2,z3,z4,include_indirect = True):
             \sum C \times \alpha^p \frac{d^{n}}{d\alpha^{n}} b_{s}^{j}(\alpha)
         where the dictionary entries are in the form { (p,(s,j,n)) : C }
     """
+    term = (j1,j2,j3,j4,j5,j6,z1,z2,z3,z4,include_indirect)
+    try:
+        return dict(_DFCoeff_Cbar_cache[term])
+    except KeyError:
+        pass
+    if include_indirect:
+        stored = _stored_DFCoeff('Cbar',(j1,j2,j3,j4,j5,j6),(z1,z2,z3,z4))
+        if stored is not None:
+            _DFCoeff_Cbar_cache[term] = dict(stored)
+            return stored
     total = defaultdict(float)
     # must be even power in inclination
     if abs(j5 + j6) % 2:
@@ -605,8 +795,15 @@ def DFCoeff_Cbar(j1,j2,j3,j4,j5,j6,z1,z2,z3,z4,include_indirect = True):
     # add indirect term
     if include_indirect:
         total['indirect'] = DFCoeff_Cbar_indirect_piece(j1,j2,j3,j4,j5,j6,z1,z2,z3,z4)
+    _DFCoeff_Cbar_cache[term] = dict(total)
     return dict(total)
 
+# Memoized results of DFCoeff_C keyed by (j1,...,j6,N1,...,N4). 
+# The Laplace coefficient representations depend only on the 
+# term, so they are computed once per process and shared by 
+# every system that includes the term.
+_DFCoeff_C_cache = dict()
+
 def DFCoeff_C(j1,j2,j3,j4,j5,j6,N1,N2,N3,N4):
     r"""
     Get the coefficient of the disturbing function term:
@@ -651,6 +848,15 @@ def DFCoeff_C(j1,j2,j3,j4,j5,j6,N1,N2,N3,N4):
 
         where the dictionary entries are in the form { (p,(s,j,n)) : C }
     """
+    term = (j1,j2,j3,j4,j5,j6,N1,N2,N3,N4)
+    try:
+        return dict(_DFCoeff_C_cache[term])
+    except KeyError:
+        pass
+    stored = _stored_DFCoeff('C',(j1,j2,j3,j4,j5,j6),(N1,N2,N3,N4))
+    if stored is not None:
+        _DFCoeff_C_cache[term] = dict(stored)
+        return stored
     terms_total = defaultdict(float)
     for n3 in range(N3+1):
         for n4 in range(N4+1):
@@ -659,6 +865,7 @@ def DFCoeff_C(j1,j2,j3,j4,j5,j6,N1,N2,N3,N4):
             if prefactor != 0.:
                 for key,val in term_dict.items():
                     terms_total[key] += prefactor * val
+    _DFCoeff_C_cache[term] = dict(terms_total)
     return dict(terms_total)
 
 def has_indirect_component(j1,j2,j3,j4,j5,j6):
@@ -142,9 +142,7 @@ class FirstOrderGeneratingFunction(PoincareHamiltonian):
         F = elliptic_f(psi/2,-4 * alpha / om_alpha_sq) / om_alpha
         psi_integral = 2 * F - 2 * psi * elliptic_k(m) / pi - sin(psi) / sqrt(alpha)
         term = prefactor * psi_integral / omega_syn
-        self.H += term
-        if update:
-            self._update()
+        self._add_term(term, update)
         
     def get_mean_motion(self,index):
         G,mu,M,Lambda = symbols('G,mu{0},M{0},Lambda{0}'.format(index)) 
@@ -214,8 +212,5 @@ class FirstOrderGeneratingFunction(PoincareHamiltonian):
         # Keep track of resonances
         self.resonance_indices.append((indexIn,indexOut,(kvec,zvec)))
         
-        self.H += prefactor1 * C * prefactor2 * trig_term * omega_inv
-
-        if update:
-            self._update()
+        self._add_term(prefactor1 * C * prefactor2 * trig_term * omega_inv, update)
     
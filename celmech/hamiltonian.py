@@ -1,6 +1,9 @@
-from sympy import S, diff, lambdify, symbols 
-from scipy.integrate import ode
+from sympy import S, Add, Symbol, diff, lambdify, symbols 
+from scipy.integrate import ode, solve_ivp
+import numpy as np
 import scipy.special
+from numbers import Real
+from collections import OrderedDict
 def _my_elliptic_e(*args):
     if len(args) == 1:
         return scipy.special.ellipe(*args)
@@ -11,6 +14,69 @@ _lambdify_kwargs = {'modules':['numpy', {
     'elliptic_f': scipy.special.ellipkinc,
     'elliptic_e': _my_elliptic_e
     }]} 
+_missing = object()
+
+def _is_numerical_param(key, val):
+    return isinstance(key, Symbol) and isinstance(val, Real) and not isinstance(val, bool)
+
+class _CompiledExpression(object):
+    """
+    Compiled energy, flow and Jacobian functions of a Hamiltonian
+    (or a part of it). Functions take the canonical variables followed 
+    by the values of the parameters in ``param_symbols`` as arguments.
+    """
+    def __init__(self, expr, varsymbols, param_symbols, fused_rhs, analytic_jacobian):
+        self.expr = expr
+        self.param_symbols = param_symbols
+        self._args = list(varsymbols) + list(param_symbols)
+        flow_exprs = []
+        for P,Q in zip(varsymbols[::2],varsymbols[1::2]):
+            flow_exprs.append(-diff(expr, Q))
+            flow_exprs.append(diff(expr, P))
+        self.flow_exprs = flow_exprs
+        self.energy = lambdify(self._args, expr, **_lambdify_kwargs)
+        self.flow = lambdify(self._args, flow_exprs, cse=True, **_lambdify_kwargs) if fused_rhs else None
+        if analytic_jacobian:
+            jac_exprs = [[diff(f,v) for v in varsymbols] for f in flow_exprs]
+            self.jac = lambdify(self._args, jac_exprs, cse=True, **_lambdify_kwargs)
+        else:
+            self.jac = None
+        self._derivs = None
+
+    @property
+    def derivs(self):
+        # Separate functions for the time derivative of each
+        # canonical variable, compiled on first use.
+        if self._derivs is None:
+            self._derivs = [lambdify(self._args, f, **_lambdify_kwargs) for f in self.flow_exprs]
+        return self._derivs
+
+# Compiled expressions keyed by their symbolic structure. The least
+# recently used entries are discarded once more than
+# _COMPILE_CACHE_MAXSIZE expressions are stored.
+_COMPILE_CACHE_MAXSIZE = 128
+_compile_cache = OrderedDict()
+
+def _compile(expr, varsymbols, param_symbols, fused_rhs, analytic_jacobian):
+    key = (expr, tuple(varsymbols), tuple(param_symbols), fused_rhs, analytic_jacobian)
+    try:
+        compiled = _compile_cache.pop(key)
+    except KeyError:
+        compiled = _CompiledExpression(expr, varsymbols, param_symbols, fused_rhs, analytic_jacobian)
+        if len(_compile_cache) >= _COMPILE_CACHE_MAXSIZE:
+            _compile_cache.popitem(last=False)
+    _compile_cache[key] = compiled
+    return compiled
+
+def _size(expr):
+    return len(Add.make_args(expr))
+
+def clear_compile_cache():
+    """
+    Clear the cache of compiled Hamiltonian functions shared
+    by all :class:`Hamiltonian` instances.
+    """
+    _compile_cache.clear()
 
 class Hamiltonian(object):
     """
@@ -27,8 +93,33 @@ class Hamiltonian(object):
 
     pqpars : list
         List of canonical variable pairs. 
+
+    fused_rhs : bool
+        If True, the equations of motion are compiled into a single
+        function, with common subexpressions eliminated, that returns
+        the full vector of time derivatives. If False, a separate
+        function is compiled for each time derivative.
+
+    analytic_jacobian : bool
+        If True, a compiled function for the Jacobian of the equations
+        of motion is supplied to the integrator.
+
+    param_symbols : list
+        Symbols of the numerical parameters in ``Hparams`` appearing
+        in ``H``.
+
+    param_values : ndarray
+        Values of the parameters in ``param_symbols``.
+
+    Numerical parameter values in ``Hparams`` are passed as arguments 
+    to the compiled functions rather than substituted into ``H``. 
+    Compiled functions are cached according to the symbolic structure 
+    of ``H`` so that Hamiltonians that differ only in their parameter 
+    values share the same compiled functions. Parameter values can be
+    changed with :meth:`set_param_values` or :meth:`update_Hparams`
+    without recompiling.
     """
-    def __init__(self, H, pqpairs, Hparams, initial_state):
+    def __init__(self, H, pqpairs, Hparams, initial_state, fused_rhs = True, analytic_jacobian = False):
         """
         Arguments
         ---------
@@ -40,6 +131,12 @@ class Hamiltonian(object):
             dictionary from sympy symbols for the constant parameters in H to their value
         initial_conditions : object
             Arbitrary object for holding the dynamical state.
+        fused_rhs : bool, optional
+            Whether to compile the equations of motion into a 
+            single fused function. Default is True.
+        analytic_jacobian : bool, optional
+            Whether to compile the Jacobian of the equations of
+            motion and supply it to the integrator. Default is False.
         
         
         In addition to the above, one needs to write 2 methods to map between the two objects:
@@ -53,9 +150,36 @@ class Hamiltonian(object):
         self.H = H
         self.pqpairs = pqpairs
         self.varsymbols = [var for pqpair in self.pqpairs for var in pqpair]
+        self._fused_rhs = fused_rhs
+        self._analytic_jacobian = analytic_jacobian
         
         self._update()
 
+    @property
+    def fused_rhs(self):
+        return self._fused_rhs
+
+    @fused_rhs.setter
+    def fused_rhs(self, value):
+        self._fused_rhs = bool(value)
+        self._rebuild()
+
+    @property
+    def analytic_jacobian(self):
+        return self._analytic_jacobian
+
+    @analytic_jacobian.setter
+    def analytic_jacobian(self, value):
+        self._analytic_jacobian = bool(value)
+        self._rebuild()
+
+    def _rebuild(self):
+        # Recompile all parts of the Hamiltonian, e.g., after 
+        # changing the compilation options.
+        if hasattr(self, '_parts'):
+            self._H_compiled = None
+            self._update()
+
     def integrate(self, time, integrator_kwargs={}):
         """
         Evolve Hamiltonian system from current state
@@ -77,7 +201,7 @@ class Hamiltonian(object):
             time /= self.state.params['tau'] # scale time if defined
         except:
             pass
-        if not hasattr(self, 'Nderivs'):
+        if not hasattr(self, 'integrator'):
             self._update()
         try:
             self.integrator.integrate(time)
@@ -85,34 +209,348 @@ class Hamiltonian(object):
             raise AttributeError("Need to initialize Hamiltonian")
         self.update_state_from_list(self.state, self.integrator.y)
 
-    def _update(self):
-        self.NH = self.H # reset to Hamiltonian with all parameters unset
-        # 
+    def integrate_ensemble(self, initial_states, times, params = None, method = 'DOP853', rtol = 1e-10, atol = 1e-14):
+        """
+        Integrate an ensemble of initial conditions of the Hamiltonian
+        system simultaneously. The equations of motion are evaluated
+        for all members of the ensemble with a single vectorized
+        function call.
+
+        The dynamical state stored in ``state`` is not modified.
+
+        Arguments
+        ---------
+        initial_states : ndarray, shape (M,Nvar)
+            Initial values of the canonical variables of each of
+            the M members of the ensemble, in the same order as
+            ``varsymbols`` (i.e., as returned by ``state_to_list``).
+        times : array-like, shape (T,)
+            Times, measured from the initial time, at which to
+            return the states of the ensemble.
+        params : array-like, optional
+            Values of the parameters in the same order as
+            ``param_symbols``. By default, ``param_values``
+            is used.
+        method : str, optional
+            Integration method passed to
+            :func:`scipy.integrate.solve_ivp`. Default is 'DOP853'.
+        rtol : float, optional
+            Relative tolerance of the integration.
+        atol : float, optional
+            Absolute tolerance of the integration.
+
+        Returns
+        -------
+        ndarray, shape (M,T,Nvar)
+            States of each member of the ensemble at the requested
+            times.
+        """
+        initial_states = np.atleast_2d(np.asarray(initial_states,dtype=float))
+        M,Nvar = initial_states.shape
+        assert Nvar == len(self.varsymbols), "Initial states must have shape (M,{})".format(len(self.varsymbols))
+        times = np.atleast_1d(np.asarray(times,dtype=float))
+        try:
+            times = times / self.state.params['tau'] # scale time if defined
+        except:
+            pass
+        part_values = self._part_values_for(params)
+        def flow(t, y):
+            Y = y.reshape(Nvar,M)
+            dY = np.zeros((Nvar,M))
+            for part,vals in zip(self._parts,part_values):
+                if self.fused_rhs:
+                    fs = part.flow(*Y, *vals)
+                else:
+                    fs = [f(*Y, *vals) for f in part.derivs]
+                for i,f in enumerate(fs):
+                    dY[i] += f
+            return dY.reshape(-1)
+        t_span = (0., max(times.max(),0.))
+        sol = solve_ivp(flow, t_span, initial_states.T.reshape(-1), method = method, t_eval = times, rtol = rtol, atol = atol)
+        if not sol.success:
+            raise RuntimeError("Ensemble integration failed: {}".format(sol.message))
+        return sol.y.reshape(Nvar,M,-1).transpose(1,2,0)
+
+    def _add_term(self, term, update=True):
+        """
+        Add a term to the Hamiltonian.
+
+        If the Hamiltonian has otherwise been left unchanged since it 
+        was last compiled, only the new term is differentiated and 
+        compiled on the next update. Compiled terms are merged as they
+        accumulate so that the number of separately evaluated 
+        functions stays small.
+
+        Arguments
+        ---------
+        term : sympy expression
+            Term to add to the Hamiltonian.
+        update : bool, optional
+            Whether to update the compiled equations of motion 
+            immediately. Default is True.
+        """
+        incremental = self.H is getattr(self, '_H_compiled', None)
+        self.H += term
+        if incremental:
+            self._pending_terms.append(term)
+            self._H_compiled = self.H
+        if update:
+            self._update()
+
+    def _Hparams_structure_unchanged(self):
+        # Check whether Hparams differs from the parameters used for
+        # compiling only by the values of numerical parameters.
+        for key, val in self._Hparams_compiled.items():
+            new_val = self.Hparams.get(key, _missing)
+            if new_val is val:
+                continue
+            if _is_numerical_param(key,val) and _is_numerical_param(key,new_val):
+                continue
+            try:
+                if not bool(new_val == val):
+                    return False
+            except (TypeError, ValueError):
+                return False
+        return True
+
+    def _substitute_Hparams(self, expr, numerical = True):
+        free = expr.free_symbols
         # Update raw numerical constants first then update functions
-        # Less hacky way to do this?
         function_keyval_pairs = []
         for key, val in self.Hparams.items(): 
-            if isinstance(val,float):
-                self.NH = self.NH.subs(key, val)
+            if isinstance(key, Symbol) and key not in free:
+                continue
+            if _is_numerical_param(key, val):
+                if numerical:
+                    expr = expr.subs(key, val)
             else:
                 function_keyval_pairs.append((key,val)) 
         for keyval in function_keyval_pairs:
-            self.NH = self.NH.subs(keyval[0],keyval[1])
-        
-        self.Energy = lambdify(self.varsymbols,self.NH,'numpy')
-        self.derivs = {}
-        self.Nderivs = []
-        for pqpair in self.pqpairs:
-            p = pqpair[0]
-            q = pqpair[1]
-            self.derivs[p] = -diff(self.H, q)
-            self.derivs[q] = diff(self.H, p)
-            self.Nderivs.append(lambdify(self.varsymbols, -diff(self.NH, q), **_lambdify_kwargs))
-            self.Nderivs.append(lambdify(self.varsymbols, diff(self.NH, p), **_lambdify_kwargs))
-
-        def diffeq(t, y):
-            dydt = [deriv(*y) for deriv in self.Nderivs]
-            #print(t, y, dydt)
-            return dydt
-        self.integrator = ode(diffeq).set_integrator('lsoda')
+            expr = expr.subs(keyval[0],keyval[1])
+        return expr
+
+    @property
+    def NH(self):
+        """
+        Symbolic expression for the Hamiltonian with numerical 
+        values of parameters substituted.
+        """
+        if self._NH is None:
+            self._NH = self._substitute_Hparams(self.H)
+        return self._NH
+
+    def _update(self):
+        pending = getattr(self, '_pending_terms', [])
+        same_structure = (
+                self.H is getattr(self, '_H_compiled', None) and 
+                self._Hparams_structure_unchanged()
+        )
+        if same_structure and len(pending) == 0:
+            # Only parameter values have changed.
+            pass
+        elif same_structure:
+            self._compile_term(Add(*pending))
+        else:
+            self.derivs = {var:S(0) for var in self.varsymbols}
+            self._parts = []
+            self._compile_term(self.H)
+        self._pending_terms = []
+        self._H_compiled = self.H
+        self._Hparams_compiled = dict(self.Hparams)
+        self._NH = None
+        self._Nderivs = None
+        self._update_param_values()
+
+        if self.fused_rhs:
+            def diffeq(t, y):
+                return self.Nflow(*y)
+        else:
+            def diffeq(t, y):
+                dydt = [deriv(*y) for deriv in self.Nderivs]
+                return dydt
+        if self.analytic_jacobian:
+            def jac(t, y):
+                return self.Njac(*y)
+        else:
+            jac = None
+        self.integrator = ode(diffeq,jac).set_integrator('lsoda')
         self.integrator.set_initial_value(self.state_to_list(self.state))
+
+    def _update_param_values(self):
+        self.param_symbols = sorted(set().union(*[part.param_symbols for part in self._parts]),key = str)
+        index = {p:i for i,p in enumerate(self.param_symbols)}
+        self._part_param_indices = [
+                np.array([index[p] for p in part.param_symbols],dtype=int) for part in self._parts
+        ]
+        self.param_values = np.array([self.Hparams[p] for p in self.param_symbols],dtype=float)
+        self._part_param_values = self._get_part_param_values(self.param_values)
+
+    def _get_part_param_values(self, param_values):
+        return [tuple(param_values[indices]) for indices in self._part_param_indices]
+
+    def set_param_values(self, param_values):
+        """
+        Set the values of all numerical parameters without 
+        recompiling the Hamiltonian.
+
+        Arguments
+        ---------
+        param_values : array-like
+            New values of the parameters, in the same order
+            as ``param_symbols``.
+        """
+        param_values = np.array(param_values,dtype=float)
+        assert param_values.shape == (len(self.param_symbols),), \
+            "Expected {} parameter values.".format(len(self.param_symbols))
+        for p,val in zip(self.param_symbols,param_values):
+            self.Hparams[p] = float(val)
+            self._Hparams_compiled[p] = float(val)
+        self.param_values = param_values
+        self._part_param_values = self._get_part_param_values(param_values)
+        self._NH = None
+
+    def update_Hparams(self, new_Hparams):
+        """
+        Update the values of numerical parameters without 
+        recompiling the Hamiltonian. If any of the parameters is
+        not one of ``param_symbols``, the Hamiltonian is recompiled.
+
+        Arguments
+        ---------
+        new_Hparams : dict
+            Dictionary of new parameter values with parameter
+            symbols as keys.
+        """
+        index = {p:i for i,p in enumerate(self.param_symbols)}
+        param_values = self.param_values.copy()
+        rebuild = False
+        for key,val in new_Hparams.items():
+            assert _is_numerical_param(key,val), "Only numerical parameter values can be updated."
+            self.Hparams[key] = val
+            if key in index:
+                param_values[index[key]] = val
+            else:
+                rebuild = True
+        if rebuild:
+            # Parameters that are not arguments of the compiled
+            # functions may change the structure of the Hamiltonian.
+            self._rebuild()
+        else:
+            self.set_param_values(param_values)
+
+    def _compile_term(self, term):
+        # Differentiate and compile 'term', adding its contributions 
+        # to the Hamiltonian's symbolic derivatives and compiled functions.
+        expr = self._substitute_Hparams(term, numerical = False)
+        free = expr.free_symbols
+        param_symbols = sorted(
+                [key for key,val in self.Hparams.items() if _is_numerical_param(key,val) and key in free],
+                key = str
+        )
+        part = _compile(expr, self.varsymbols, param_symbols, self.fused_rhs, self.analytic_jacobian)
+        if expr == term:
+            flow_exprs = part.flow_exprs
+        else:
+            flow_exprs = []
+            for pqpair in self.pqpairs:
+                flow_exprs.append(-diff(term, pqpair[1]))
+                flow_exprs.append(diff(term, pqpair[0]))
+        for var,f in zip(self.varsymbols,flow_exprs):
+            self.derivs[var] += f
+        self._parts.append(part)
+        # Merge the newest parts whenever the last part is at least as 
+        # large as the one before it, so that the number of functions 
+        # summed at each evaluation grows only logarithmically with the 
+        # number of incremental updates.
+        while len(self._parts) > 1 and _size(self._parts[-2].expr) <= _size(self._parts[-1].expr):
+            part2 = self._parts.pop()
+            part1 = self._parts.pop()
+            param_symbols = sorted(set(part1.param_symbols) | set(part2.param_symbols), key = str)
+            self._parts.append(
+                _compile(part1.expr + part2.expr, self.varsymbols, param_symbols, self.fused_rhs, self.analytic_jacobian)
+            )
+
+    def _part_values_for(self, params):
+        if params is None:
+            return self._part_param_values
+        return self._get_part_param_values(np.asarray(params,dtype=float))
+
+    def Energy(self, *y, params = None):
+        """
+        Numerical value of the Hamiltonian.
+
+        Arguments
+        ---------
+        *y : floats
+            Values of the canonical variables in the same 
+            order as ``varsymbols``.
+        params : array-like, optional
+            Values of the parameters in the same order as
+            ``param_symbols``. By default, ``param_values`` 
+            is used.
+        """
+        part_values = self._part_values_for(params)
+        return sum(part.energy(*y, *vals) for part,vals in zip(self._parts,part_values))
+
+    def Nflow(self, *y, params = None):
+        """
+        Time derivatives of the canonical variables computed 
+        with fused functions, with common subexpressions
+        eliminated, in the same order as ``varsymbols``.
+        Terms added incrementally are compiled into separate
+        functions whose contributions are summed.
+
+        Arguments
+        ---------
+        *y : floats
+            Values of the canonical variables in the same 
+            order as ``varsymbols``.
+        params : array-like, optional
+            Values of the parameters in the same order as
+            ``param_symbols``. By default, ``param_values`` 
+            is used.
+        """
+        if not self.fused_rhs:
+            part_values = self._part_values_for(params)
+            return np.array([self._Nderiv(i, y, part_values) for i in range(len(y))],dtype=float)
+        flow = 0.
+        for part,vals in zip(self._parts,self._part_values_for(params)):
+            flow = flow + np.array(part.flow(*y, *vals),dtype=float)
+        return flow
+
+    def Njac(self, *y, params = None):
+        """
+        Jacobian of the equations of motion. Only available when 
+        ``analytic_jacobian`` is True.
+
+        Arguments
+        ---------
+        *y : floats
+            Values of the canonical variables in the same 
+            order as ``varsymbols``.
+        params : array-like, optional
+            Values of the parameters in the same order as
+            ``param_symbols``. By default, ``param_values`` 
+            is used.
+        """
+        jac = 0.
+        for part,vals in zip(self._parts,self._part_values_for(params)):
+            jac = jac + np.array(part.jac(*y, *vals),dtype=float)
+        return jac
+
+    @property
+    def Nderivs(self):
+        """
+        List of compiled functions returning the time derivative
+        of each canonical variable, in the same order as
+        ``varsymbols``.
+        """
+        if self._Nderivs is None:
+            self._Nderivs = [
+                    (lambda *y, i=i: self._Nderiv(i, y, self._part_param_values)) 
+                    for i in range(len(self.varsymbols))
+            ]
+        return self._Nderivs
+
+    def _Nderiv(self, i, y, part_values):
+        return sum(part.derivs[i](*y, *vals) for part,vals in zip(self._parts,part_values))
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
 """celmech tools for numerically averaged resonance equations."""
-from .planarMMR import PlanarResonanceEquations
+from .planarMMR import PlanarResonanceEquations, PlanarAveragedPerturbationTable
 from .spatialMMR import SpatialResonanceEquations
-__all__ = ["PlanarResonanceEquations","SpatialResonanceEquations"]
+__all__ = ["PlanarResonanceEquations","PlanarAveragedPerturbationTable","SpatialResonanceEquations"]
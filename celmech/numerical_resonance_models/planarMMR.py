@@ -7,11 +7,106 @@ from warnings import warn
 from scipy.optimize import lsq_linear
 from scipy.integrate import odeint
 
-from .utils import planar_els2xv,calc_Hint_components_planar
+from .utils import planar_els2xv,calc_Hint_components_planar,get_cached_theano_functions,add_batched_graphs
+from .utils import chebyshev_interpolant,chebyshev_nodes,chebyshev_coefficients,chebyshev_tail,evaluate_chebyshev
+from .utils import periodic_quadrature_rule,adaptive_quad_pts
 from ..nbody_simulation_utilities import get_canonical_heliocentric_orbits, add_canonical_heliocentric_elements_particle
 from ..miscellaneous import getOmegaMatrix
 
-def get_compiled_theano_functions(N_QUAD_PTS):
+def get_compiled_theano_functions(N_QUAD_PTS,use_disk_cache=True):
+    """
+    Get the dictionary of compiled Theano functions used by 
+    :class:`PlanarResonanceEquations`. Each function is compiled
+    the first time it is accessed, at most once per process, 
+    and stored in an on-disk cache so that subsequent processes 
+    can load it instead of re-compiling.
+
+    Arguments
+    ---------
+    N_QUAD_PTS : int
+        Number of quadrature points used to average over psi.
+    use_disk_cache : bool, optional
+        Whether to read and write compiled functions from and to the 
+        on-disk cache. Default is True.
+
+    Returns
+    -------
+    LazyTheanoFunctions :
+        Dictionary of compiled Theano functions.
+    """
+    return get_cached_theano_functions(
+        'planar',
+        N_QUAD_PTS,
+        _FUNCTION_NAMES,
+        _get_theano_graph,
+        use_disk_cache=use_disk_cache
+    )
+
+def get_compiled_interpolated_theano_functions(TABLE_SHAPE,use_disk_cache=True):
+    """
+    Get the dictionary of compiled Theano functions used by 
+    :class:`PlanarResonanceEquations` when the averaged perturbation
+    is evaluated by interpolating a 
+    :class:`PlanarAveragedPerturbationTable`. 
+
+    Arguments
+    ---------
+    TABLE_SHAPE : tuple
+        Tuple (n_alpha, n_ecc) giving the number of Chebyshev nodes
+        along the alpha axis and along each eccentricity axis of 
+        the table.
+    use_disk_cache : bool, optional
+        Whether to read and write compiled functions from and to the 
+        on-disk cache. Default is True.
+
+    Returns
+    -------
+    LazyTheanoFunctions :
+        Dictionary of compiled Theano functions.
+    """
+    return get_cached_theano_functions(
+        'planar_interpolated',
+        tuple(int(n) for n in TABLE_SHAPE),
+        _FUNCTION_NAMES,
+        _get_interpolated_theano_graph,
+        use_disk_cache=use_disk_cache
+    )
+
+def _get_interpolated_theano_graph(TABLE_SHAPE):
+    return _get_theano_graph(None,TABLE_SHAPE)
+
+def get_compiled_adaptive_theano_functions(use_disk_cache=True):
+    """
+    Get the dictionary of compiled Theano functions used by 
+    :class:`PlanarResonanceEquations` when the quadrature rule
+    used to average over psi is chosen adaptively. The quadrature 
+    nodes and weights are passed as the final two arguments of 
+    the functions so that a single set of compiled functions 
+    can be used with any number of quadrature points.
+
+    Arguments
+    ---------
+    use_disk_cache : bool, optional
+        Whether to read and write compiled functions from and to the 
+        on-disk cache. Default is True.
+
+    Returns
+    -------
+    LazyTheanoFunctions :
+        Dictionary of compiled Theano functions.
+    """
+    return get_cached_theano_functions(
+        'planar_adaptive',
+        0,
+        _FUNCTION_NAMES,
+        _get_adaptive_theano_graph,
+        use_disk_cache=use_disk_cache
+    )
+
+def _get_adaptive_theano_graph(N_QUAD_PTS):
+    return _get_theano_graph(None)
+
+def _get_theano_graph(N_QUAD_PTS,TABLE_SHAPE=None):
         # Planet masses: m1,m2
         m1,m2 = T.dscalars(2)
         mstar = 1
@@ -91,12 +186,34 @@ def get_compiled_theano_functions(N_QUAD_PTS):
         beta2p = T.sqrt(Mstar2) * beta2
         Hkep = -0.5 * beta1p / a1 - 0.5 * beta2p / a2
         
-        Hdir,Hind = calc_Hint_components_planar(
-                a1,a2,l1,l2,h1,k1,h2,k2,Mstar1/mstar,Mstar2/mstar
-        )
         eps = m1*m2/ (mu1 + mu2) / T.sqrt(mstar)
-        Hpert = (Hdir + Hind/mstar)
-        Hpert_av = Hpert.dot(quad_weights)
+        if TABLE_SHAPE is None:
+            Hdir,Hind = calc_Hint_components_planar(
+                    a1,a2,l1,l2,h1,k1,h2,k2,Mstar1/mstar,Mstar2/mstar
+            )
+            Hpert = (Hdir + Hind/mstar)
+            Hpert_av = Hpert.dot(quad_weights)
+            table_ins = []
+        else:
+            # Interpolate the averaged direct and indirect terms,
+            # tabulated as functions of alpha=a1/a2 and the 
+            # components of the eccentricity vectors at psi=0.
+            # See 'PlanarAveragedPerturbationTable'.
+            n_alpha,n_ecc = TABLE_SHAPE
+            dir_coeffs = T.TensorType('float64',(False,)*5)('dir_coeffs')
+            ind_coeffs = T.TensorType('float64',(False,)*4)('ind_coeffs')
+            alpha_min,alpha_max,ecc_max = T.dscalars(3)
+            table_ins = [dir_coeffs,ind_coeffs,alpha_min,alpha_max,ecc_max]
+            x_alpha = (2 * a1 / a2 - alpha_max - alpha_min) / (alpha_max - alpha_min)
+            x_ecc = [
+                x1 * X_to_z1 / T.sqrt(L1) / ecc_max,
+                -y1 * X_to_z1 / T.sqrt(L1) / ecc_max,
+                x2 * X_to_z2 / T.sqrt(L2) / ecc_max,
+                -y2 * X_to_z2 / T.sqrt(L2) / ecc_max
+            ]
+            Fdir = chebyshev_interpolant(dir_coeffs,[x_alpha] + x_ecc,(n_alpha,) + (n_ecc,) * 4)
+            Find = chebyshev_interpolant(ind_coeffs,x_ecc,(n_ecc,) * 4)
+            Hpert_av = Fdir / a2 + Find * T.sqrt(Mstar1 * Mstar2 / (a1 * a2)) / mstar
         Htot = Hkep + eps * Hpert_av
 
         ######################
@@ -129,21 +246,31 @@ def get_compiled_theano_functions(N_QUAD_PTS):
         # Set parameters for compiling functions with Theano
         #####################################################
         
-        # Get numerical quadrature nodes and weight
-        nodes,weights = np.polynomial.legendre.leggauss(N_QUAD_PTS)
-        
-        # Rescale for integration interval from [-1,1] to [-pi,pi]
-        nodes = nodes * np.pi
-        weights = weights * 0.5
-        
-        # 'givens' will fix some parameters of Theano functions compiled below
-        givens = [(psi,nodes),(quad_weights,weights)]
+        if TABLE_SHAPE is not None:
+            givens = []
+            quad_ins = []
+        elif N_QUAD_PTS is None:
+            # Quadrature nodes and weights are supplied 
+            # as inputs when functions are called.
+            givens = []
+            quad_ins = [psi,quad_weights]
+        else:
+            # Get numerical quadrature nodes and weight
+            nodes,weights = np.polynomial.legendre.leggauss(N_QUAD_PTS)
+            
+            # Rescale for integration interval from [-1,1] to [-pi,pi]
+            nodes = nodes * np.pi
+            weights = weights * 0.5
+            
+            # 'givens' will fix some parameters of Theano functions compiled below
+            givens = [(psi,nodes),(quad_weights,weights)]
+            quad_ins = []
 
         # 'ins' will set the inputs of Theano functions compiled below
         #   Note: 'extra_ins' will be passed as values of object attributes
         #   of the 'ResonanceEquations' class defined below
         extra_ins = [m1,m2,j,k,tau_alpha_0,K1,K2,p]
-        ins = [dyvars] + extra_ins
+        ins = [dyvars] + extra_ins + table_ins + quad_ins
         
         # Define flows and jacobians.
 
@@ -195,7 +322,7 @@ def get_compiled_theano_functions(N_QUAD_PTS):
             )
         )
         ##########################
-        # Compile Theano functions
+        # Theano function outputs
         ##########################
         func_dict={
          # Hamiltonians
@@ -216,23 +343,254 @@ def get_compiled_theano_functions(N_QUAD_PTS):
          # Extras
          'orbital_elements':orbels_dict,
          'actions':actions_dict,
-         'timescales':timescales_dict
+         'timescales':timescales_dict,
+         'eccentricities':T.stack(e1,e2)
         }
-        compiled_func_dict=dict()
+        graph = dict()
         for key,val in func_dict.items():
-            if key is 'timescales':
+            if key == 'timescales':
                 inputs = extra_ins
+            elif key == 'eccentricities':
+                inputs = [dyvars] + extra_ins
             else:
                 inputs = ins 
-            cf = theano.function(
-                inputs=inputs,
-                outputs=val,
-                givens=givens,
-                on_unused_input='ignore'
-            )
-            compiled_func_dict[key]=cf
-        return compiled_func_dict
-        
+            graph[key] = (inputs,val)
+        add_batched_graphs(graph,_BATCHED_FUNCTION_NAMES,dyvars,givens)
+        return graph,givens
+
+# Functions that are also compiled in versions acting
+# on (M,Ndim) arrays of dynamical variables.
+_BATCHED_FUNCTION_NAMES = (
+    'H','Hpert','Hkep','H_flow','H_flow_jac',
+    'dissipative_flow','dissipative_flow_jac',
+    'orbital_elements','actions','eccentricities'
+)
+_FUNCTION_NAMES = (
+    'H','Hpert','Hkep',
+    'H_flow','Hpert_flow','Hkep_flow',
+    'H_flow_jac','Hpert_flow_jac','Hkep_flow_jac',
+    'dissipative_flow','dissipative_flow_jac',
+    'orbital_elements','actions','timescales','eccentricities'
+) + tuple(name + "_batch" for name in _BATCHED_FUNCTION_NAMES)
+
+def _get_table_values_graph(N_QUAD_PTS):
+    # Averaged direct and indirect terms evaluated for a2=1 and
+    # GMstar1=GMstar2=1 on a batch of points (alpha,k1,h1,k2,h2), 
+    # where (k1,h1,k2,h2) are the eccentricity vector components
+    # at psi=0.
+    alpha,k1_0,h1_0,k2_0,h2_0 = T.dvectors(5)
+    j,k = T.lscalars('jk')
+    s = (j-k) / k
+    psi = T.dvector()
+    quad_weights = T.dvector('w')
+    l1 = -1 * k * psi.dimshuffle('x',0)
+    l2 = T.constant(0.)
+    theta_res = (1+s) * l2 - s * l1
+    cos_theta_res = T.cos(theta_res)
+    sin_theta_res = T.sin(theta_res)
+    col = lambda x: x.dimshuffle(0,'x')
+    k1 = col(k1_0) * cos_theta_res - col(h1_0) * sin_theta_res
+    h1 = col(k1_0) * sin_theta_res + col(h1_0) * cos_theta_res
+    k2 = col(k2_0) * cos_theta_res - col(h2_0) * sin_theta_res
+    h2 = col(k2_0) * sin_theta_res + col(h2_0) * cos_theta_res
+    Hdir,Hind = calc_Hint_components_planar(
+            col(alpha),T.constant(1.),l1,l2,h1,k1,h2,k2,1.,1.
+    )
+    nodes,weights = np.polynomial.legendre.leggauss(N_QUAD_PTS)
+    givens = [(psi,nodes * np.pi),(quad_weights,weights * 0.5)]
+    ins = [alpha,k1_0,h1_0,k2_0,h2_0,j,k]
+    graph = {'averaged_components':(ins,[Hdir.dot(quad_weights),Hind.dot(quad_weights)])}
+    return graph,givens
+
+class PlanarAveragedPerturbationTable():
+    r"""
+    A table of the averaged perturbation Hamiltonian of the 
+    :class:`PlanarResonanceEquations` model for a :math:`j\mathrm{:}j-k`
+    resonance that is evaluated by Chebyshev interpolation instead of 
+    numerical quadrature.
+
+    The direct part of the averaged perturbation is tabulated for unit 
+    outer-planet semi-major axis as a function of the semi-major axis
+    ratio, :math:`\alpha = a_1/a_2`, and the components :math:`(k_i,h_i)` 
+    of the planets' eccentricity vectors in the frame rotating with the
+    resonant angle. The indirect part, which is proportional to 
+    :math:`(a_1a_2)^{-1/2}`, is tabulated for :math:`a_1=a_2=1` as a 
+    function of the eccentricity vector components only.
+    The tables are sampled on tensor-product grids of Chebyshev nodes 
+    spanning :math:`\alpha_\mathrm{min}\le\alpha\le\alpha_\mathrm{max}` 
+    and :math:`|k_i|,|h_i|\le e_\mathrm{max}`. The number of nodes along
+    each axis is doubled until the error estimated from the highest-order 
+    Chebyshev coefficients is below the requested tolerance. The error 
+    of the final interpolant is then measured against the quadrature 
+    values at a set of random test points.
+
+    Accuracy degrades, and the number of nodes required grows, if the
+    table domain includes orbit-crossing configurations.
+
+    Arguments
+    ---------
+    j : int
+        Together with k specifies j:j-k resonance
+    k : int
+        Order of resonance.
+    alpha_min : float
+        Minimum semi-major axis ratio of the table.
+    alpha_max : float
+        Maximum semi-major axis ratio of the table.
+    ecc_max : float, optional
+        Maximum absolute value of the eccentricity vector 
+        components of the table. Default is 0.2.
+    n_quad_pts : int, optional
+        Number of quadrature points used to compute tabulated
+        values. Default is 40.
+    tolerance : float, optional
+        Target error of the interpolated perturbation, relative to the
+        maximum absolute value of the tabulated values. Default is 1e-9.
+    n_alpha : int, optional
+        Initial number of nodes along the alpha axis. Default is 5.
+    n_ecc : int, optional
+        Initial number of nodes along each eccentricity axis. Default is 9.
+    max_n_alpha : int, optional
+        Maximum number of nodes along the alpha axis. Default is 17.
+    max_n_ecc : int, optional
+        Maximum number of nodes along each eccentricity axis. Default is 17.
+    n_test : int, optional
+        Number of random points at which the accuracy of the 
+        interpolant is tested. Default is 64.
+
+    Attributes
+    ----------
+    shape : tuple
+        Number of nodes (n_alpha, n_ecc) along the alpha axis and
+        each eccentricity axis.
+    dir_coefficients : ndarray
+        (n_alpha,n_ecc,n_ecc,n_ecc,n_ecc) array of Chebyshev coefficients 
+        of the direct term.
+    ind_coefficients : ndarray
+        (n_ecc,n_ecc,n_ecc,n_ecc) array of Chebyshev coefficients 
+        of the indirect term.
+    error_estimate : float
+        Truncation error estimated from the Chebyshev coefficients.
+    max_error : float
+        Maximum error, relative to the maximum absolute tabulated value,
+        measured at the test points.
+    """
+    def __init__(self,j,k,alpha_min,alpha_max,ecc_max=0.2,n_quad_pts=40,tolerance=1e-9,n_alpha=5,n_ecc=9,max_n_alpha=17,max_n_ecc=17,n_test=64):
+        assert alpha_min < alpha_max, "'alpha_min' must be less than 'alpha_max'"
+        assert 0 < alpha_min and alpha_max < 1, "Semi-major axis ratios must lie between 0 and 1."
+        assert 0 < ecc_max < np.sqrt(0.5), "'ecc_max' must lie between 0 and 1/sqrt(2)."
+        self.j = j
+        self.k = k
+        self.alpha_min = alpha_min
+        self.alpha_max = alpha_max
+        self.ecc_max = ecc_max
+        self.n_quad_pts = n_quad_pts
+        self.tolerance = tolerance
+        self._func = get_cached_theano_functions(
+            'planar_table',
+            n_quad_pts,
+            ('averaged_components',),
+            _get_table_values_graph
+        )['averaged_components']
+        while True:
+            self._compute_coefficients(n_alpha,n_ecc)
+            alpha_ok = self._alpha_error <= tolerance * self._scale
+            ecc_ok = self._ecc_error <= tolerance * self._scale
+            if alpha_ok and ecc_ok:
+                break
+            refine = False
+            if not alpha_ok and 2 * n_alpha - 1 <= max_n_alpha:
+                n_alpha = 2 * n_alpha - 1
+                refine = True
+            if not ecc_ok and 2 * n_ecc - 1 <= max_n_ecc:
+                n_ecc = 2 * n_ecc - 1
+                refine = True
+            if not refine:
+                warn("Interpolation table did not reach the requested tolerance of {:.1g} with {} alpha nodes and {} eccentricity nodes. Estimated error is {:.1g}.".format(
+                    tolerance,n_alpha,n_ecc,self.error_estimate
+                ))
+                break
+        self.max_error = self._test_error(n_test)
+        if self.max_error > tolerance:
+            warn("Interpolation table error of {:.1g} measured at test points exceeds the requested tolerance of {:.1g}.".format(self.max_error,tolerance))
+
+    @property
+    def shape(self):
+        return self.dir_coefficients.shape[:2]
+
+    @property
+    def error_estimate(self):
+        return max(self._alpha_error,self._ecc_error) / self._scale
+
+    @property
+    def table_args(self):
+        return [self.dir_coefficients,self.ind_coefficients,self.alpha_min,self.alpha_max,self.ecc_max]
+
+    def _scaled_alpha(self,alpha):
+        return (2 * alpha - self.alpha_max - self.alpha_min) / (self.alpha_max - self.alpha_min)
+
+    def _averaged_components(self,alpha,k1,h1,k2,h2,chunk_size=10000):
+        Fdir = np.zeros(len(alpha))
+        Find = np.zeros(len(alpha))
+        for i in range(0,len(alpha),chunk_size):
+            sl = slice(i,i + chunk_size)
+            Fdir[sl],Find[sl] = self._func(alpha[sl],k1[sl],h1[sl],k2[sl],h2[sl],self.j,self.k)
+        return Fdir,Find
+
+    def _compute_coefficients(self,n_alpha,n_ecc):
+        x_alpha = chebyshev_nodes(n_alpha)
+        x_ecc = chebyshev_nodes(n_ecc)
+        alpha = 0.5 * (self.alpha_max + self.alpha_min) + 0.5 * (self.alpha_max - self.alpha_min) * x_alpha
+        grid = np.meshgrid(alpha,*[self.ecc_max * x_ecc] * 4,indexing='ij')
+        Fdir,Find = self._averaged_components(*[x.reshape(-1) for x in grid])
+        shape = (n_alpha,) + (n_ecc,) * 4
+        Fdir = Fdir.reshape(shape)
+        # The indirect term is proportional to 1/sqrt(a1*a2) and 
+        # otherwise does not depend on alpha. It is tabulated for 
+        # a1 = a2 = 1.
+        Find = Find.reshape(shape)[0] * np.sqrt(alpha[0])
+        self._scale = max(np.max(np.abs(Fdir)),np.max(np.abs(Find)))
+        self.dir_coefficients = chebyshev_coefficients(Fdir)
+        self.ind_coefficients = chebyshev_coefficients(Find)
+        self._alpha_error = chebyshev_tail(self.dir_coefficients,0)
+        self._ecc_error = max(
+            [chebyshev_tail(self.dir_coefficients,i) for i in range(1,5)] +\
+            [chebyshev_tail(self.ind_coefficients,i) for i in range(4)]
+        )
+
+    def _test_error(self,n_test):
+        alpha = np.random.uniform(self.alpha_min,self.alpha_max,n_test)
+        ecc_vars = np.random.uniform(-self.ecc_max,self.ecc_max,(4,n_test))
+        Fdir,Find = self._averaged_components(alpha,*ecc_vars)
+        Find *= np.sqrt(alpha)
+        x_ecc = list(ecc_vars / self.ecc_max)
+        Fdir_interp = evaluate_chebyshev(self.dir_coefficients,[self._scaled_alpha(alpha)] + x_ecc)
+        Find_interp = evaluate_chebyshev(self.ind_coefficients,x_ecc)
+        err = max(np.max(np.abs(Fdir - Fdir_interp)),np.max(np.abs(Find - Find_interp)))
+        return err / self._scale
+
+    def contains(self,alpha,e1,e2):
+        """
+        Check whether a semi-major axis ratio and pair of eccentricities
+        lie within the domain of the table.
+
+        Arguments
+        ---------
+        alpha : float or ndarray
+            Semi-major axis ratio(s).
+        e1 : float or ndarray
+            Inner planet eccentricity.
+        e2 : float or ndarray
+            Outer planet eccentricity.
+
+        Returns
+        -------
+        bool :
+            True if all points lie within the table domain.
+        """
+        alpha_in = np.logical_and(alpha >= self.alpha_min,alpha <= self.alpha_max)
+        ecc_in = np.logical_and(e1 <= self.ecc_max,e2 <= self.ecc_max)
+        return bool(np.all(np.logical_and(alpha_in,ecc_in)))
 
 class PlanarResonanceEquations():
     r"""
@@ -284,8 +642,22 @@ class PlanarResonanceEquations():
         the inner and outer planets based on the damping parameters of the resonance
         model.
 
+    interpolation_table : PlanarAveragedPerturbationTable or None
+        If not None, the averaged perturbation Hamiltonian is evaluated by 
+        interpolating this table rather than by numerical quadrature.
+
+    quadrature_tolerance : float or None
+        If not None, the number of quadrature points used to average 
+        over psi is chosen adaptively, instead of using 'n_quad_pts' 
+        Gauss-Legendre points, so that the averaged perturbation 
+        Hamiltonian has this relative accuracy. Trapezoidal rules with
+        between 'min_quad_pts' and 'max_quad_pts' points are used. The
+        number of points is fixed by :meth:`set_quadrature_resolution`,
+        which is called at the start of each integration and, otherwise,
+        the first time the equations are evaluated.
+
     """
-    def __init__(self,j,k, n_quad_pts = 40, m1 = 1e-5 , m2 = 1e-5,K1=100, K2=100, tau_alpha = 1e5, p = 1):
+    def __init__(self,j,k, n_quad_pts = 40, m1 = 1e-5 , m2 = 1e-5,K1=100, K2=100, tau_alpha = 1e5, p = 1, interpolation_table = None, quadrature_tolerance = None):
         self.j = j
         self.k = k
         self.m1 = m1
@@ -295,10 +667,129 @@ class PlanarResonanceEquations():
         self.tau_alpha = tau_alpha
         self.p = p 
         self.n_quad_pts = n_quad_pts
-        self._funcs = get_compiled_theano_functions(n_quad_pts)
+        self.min_quad_pts = 8
+        self.max_quad_pts = 512
+        self._interpolation_table = None
+        self.quadrature_tolerance = quadrature_tolerance
+        self.interpolation_table = interpolation_table
+    def _set_functions(self):
+        if self._interpolation_table is not None:
+            self._funcs = get_compiled_interpolated_theano_functions(self._interpolation_table.shape)
+        elif self._quadrature_tolerance is not None:
+            self._funcs = get_compiled_adaptive_theano_functions()
+        else:
+            self._funcs = get_compiled_theano_functions(self.n_quad_pts)
+    @property
+    def quadrature_tolerance(self):
+        return self._quadrature_tolerance
+    @quadrature_tolerance.setter
+    def quadrature_tolerance(self,tolerance):
+        self._quadrature_tolerance = tolerance
+        # Number of points of the adaptive quadrature rule
+        self._adaptive_quad_pts = None
+        self._set_functions()
+    @property
+    def interpolation_table(self):
+        return self._interpolation_table
+    @interpolation_table.setter
+    def interpolation_table(self,table):
+        if table is not None:
+            if (table.j,table.k) != (self.j,self.k):
+                raise ValueError("Interpolation table for the {0}:{1} resonance cannot be used for the {2}:{3} resonance.".format(
+                    table.j,table.j-table.k,self.j,self.j-self.k
+                ))
+            if not table.alpha_min < self.alpha < table.alpha_max:
+                raise ValueError("Resonant semi-major axis ratio {:.6f} lies outside of the interpolation table range [{:.6f},{:.6f}]".format(
+                    self.alpha,table.alpha_min,table.alpha_max
+                ))
+        self._interpolation_table = table
+        self._set_functions()
     @property
     def extra_args(self):
         return [self.m1,self.m2,self.j,self.k,self.tau_alpha,self.K1,self.K2,self.p]
+    def _evaluate(self,name,z):
+        # Evaluate compiled function 'name' at a single state
+        # vector or, with a single call, at an (M,Ndim) array of states.
+        z = np.asarray(z)
+        args = self.extra_args
+        if self._interpolation_table is not None:
+            args = args + self._interpolation_table.table_args
+        elif self._quadrature_tolerance is not None:
+            if self._adaptive_quad_pts is None:
+                self.set_quadrature_resolution(z)
+            args = args + list(periodic_quadrature_rule(self._adaptive_quad_pts))
+        if z.ndim == 2:
+            return self._funcs[name + "_batch"](z,*args)
+        return self._funcs[name](z,*args)
+    def set_quadrature_resolution(self,z):
+        """
+        Choose the number of points of the trapezoidal rule used to
+        average over psi when 'quadrature_tolerance' is set. 
+
+        The number of points is found by successive doubling so that 
+        the averaged perturbation Hamiltonian evaluated at z has 
+        the requested relative accuracy. The rule is then used for all
+        subsequent evaluations until this method is called again. 
+
+        Arguments
+        ---------
+        z : ndarray
+            Dynamical variables. Either a single state vector or an 
+            (M,Ndim) array of states, in which case the state with 
+            the largest eccentricity is used.
+
+        Returns
+        -------
+        int :
+            Number of quadrature points.
+        """
+        if self._quadrature_tolerance is None or self._interpolation_table is not None:
+            raise ValueError("Adaptive quadrature requires 'quadrature_tolerance' to be set and no interpolation table.")
+        z = np.asarray(z)
+        if z.ndim == 2:
+            ecc = np.max(self._funcs['eccentricities_batch'](z,*self.extra_args),axis=1)
+            z = z[np.argmax(ecc)]
+        Hpert = lambda nodes,weights: self._funcs['Hpert'](z,*self.extra_args,nodes,weights)
+        self._adaptive_quad_pts = adaptive_quad_pts(Hpert,self._quadrature_tolerance,self.min_quad_pts,self.max_quad_pts)
+        return self._adaptive_quad_pts
+    def _in_table_domain(self,els):
+        # Check whether the orbital elements 'els' lie within the 
+        # domain of the interpolation table, if one is used.
+        table = self._interpolation_table
+        if table is None:
+            return True
+        return table.contains(els['a1'] / els['a2'],els['e1'],els['e2'])
+    def build_interpolation_table(self,alpha_width = 0.05,**kwargs):
+        """
+        Tabulate the averaged perturbation Hamiltonian and 
+        use Chebyshev interpolation of the table, instead of 
+        numerical quadrature, to evaluate the equations of motion.
+
+        Arguments
+        ---------
+        alpha_width : float, optional
+            The table spans semi-major axis ratios within a
+            fraction 'alpha_width' of the resonant ratio.
+            Default is 0.05.
+        **kwargs : 
+            Additional keyword arguments passed to 
+            :class:`PlanarAveragedPerturbationTable`.
+
+        Returns
+        -------
+        PlanarAveragedPerturbationTable :
+            The interpolation table.
+        """
+        kwargs.setdefault('n_quad_pts',self.n_quad_pts)
+        table = PlanarAveragedPerturbationTable(
+            self.j,
+            self.k,
+            self.alpha * (1 - alpha_width),
+            self.alpha * (1 + alpha_width),
+            **kwargs
+        )
+        self.interpolation_table = table
+        return table
     @property
     def mu1(self):
         return self.m1 / (1 + self.m1)
@@ -328,14 +819,16 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the Hamiltonian evaluated at z.
         """
-        return self._funcs['H'](z,*self.extra_args)
+        return self._evaluate('H',z)
 
     def H_kep(self,z):
         """
@@ -344,14 +837,16 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the Keplerian part of the Hamiltonian evaluated at z.
         """
-        return self._funcs['Hkep'](z,*self.extra_args)
+        return self._evaluate('Hkep',z)
 
     def H_pert(self,z):
         r"""
@@ -360,14 +855,16 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the perturbation part of the Hamiltonian evaluated at z.
         """
-        return self._funcs['Hpert'](z,*self.extra_args)
+        return self._evaluate('Hpert',z)
 
     def H_flow(self,z):
         r"""
@@ -379,14 +876,16 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Flow vector
+            Flow vector, or (M,Ndim) array of flow vectors.
         """
-        return self._funcs['H_flow'](z,*self.extra_args)
+        return self._evaluate('H_flow',z)
 
 
     def H_flow_jac(self,z):
@@ -399,14 +898,17 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Jacobian matrix
+            Jacobian matrix, or (M,Ndim,Ndim) array of 
+            Jacobian matrices.
         """
-        return self._funcs['H_flow_jac'](z,*self.extra_args)
+        return self._evaluate('H_flow_jac',z)
 
     def flow(self,z):
         r"""
@@ -419,14 +921,16 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Flow vector
+            Flow vector, or (M,Ndim) array of flow vectors.
         """
-        return self._funcs['H_flow'](z,*self.extra_args) + self._funcs['dissipative_flow'](z,*self.extra_args)
+        return self._evaluate('H_flow',z) + self._evaluate('dissipative_flow',z)
 
     def flow_jac(self,z):
         r"""
@@ -439,14 +943,17 @@ class PlanarResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Jacobian matrix
+            Jacobian matrix, or (M,Ndim,Ndim) array of 
+            Jacobian matrices.
         """
-        return self._funcs['H_flow_jac'](z,*self.extra_args) + self._funcs['dissipative_flow_jac'](z,*self.extra_args)
+        return self._evaluate('H_flow_jac',z) + self._evaluate('dissipative_flow_jac',z)
 
     def dyvars_to_orbital_elements(self,z):
         r"""
@@ -459,9 +966,12 @@ class PlanarResonanceEquations():
 
         .. math::
             (a_1,e_1,\theta_1,a_2,e_2,\theta_2)
+
+        If 'z' is an (M,Ndim) array of states, the returned
+        dictionary contains arrays of length M.
         """
 
-        return self._funcs['orbital_elements'](z,*self.extra_args)
+        return self._evaluate('orbital_elements',z)
 
     def orbital_elements_to_dyvars(self,orbels):
         r"""
@@ -737,7 +1247,7 @@ class PlanarResonanceEquations():
         actions : dict
           Poincare actions stored as dictionary entries.
         """
-        return self._funcs['actions'](dyvars,*self.extra_args)
+        return self._evaluate('actions',dyvars)
 
     def integrate_initial_conditions(self,dyvars0,times,dissipation=False):
         """
@@ -766,24 +1276,44 @@ class PlanarResonanceEquations():
                     at each of the times in 'times'.
                 - 'orbital_elements': dict containing arrays
                     of the various orbital elements.
+
+        If an interpolation table is used, a ValueError is raised 
+        when the initial conditions lie outside of the table domain
+        and a warning is issued when the solution leaves it.
+
+        If 'quadrature_tolerance' is set, the quadrature rule is chosen
+        from the initial conditions and held fixed during the integration.
+        If the solution reaches eccentricities that require more points,
+        the integration is repeated with the rule chosen at the largest
+        eccentricity.
         """
+        if not self._in_table_domain(self.dyvars_to_orbital_elements(dyvars0)):
+            raise ValueError("Initial conditions lie outside the domain of the interpolation table.")
         if dissipation:
             f = lambda y,t: self.flow(y)
             Df = lambda y,t: self.flow_jac(y)
         else:
             f = lambda y,t: self.H_flow(y)
             Df = lambda y,t: self.H_flow_jac(y)
-        soln_dyvars = odeint(
+        integrate = lambda: odeint(
                 f,
                 dyvars0,
                 times,
                 Dfun = Df
         )
-        el_dict0=self.dyvars_to_orbital_elements(dyvars0)
-        els_dict = {key:np.zeros(len(soln_dyvars)) for key in el_dict0};
+        if self._quadrature_tolerance is None or self._interpolation_table is not None:
+            soln_dyvars = integrate()
+        else:
+            N0 = self.set_quadrature_resolution(dyvars0)
+            soln_dyvars = integrate()
+            # Re-integrate if the solution reaches eccentricities
+            # that require a finer quadrature rule.
+            if self.set_quadrature_resolution(soln_dyvars) > N0:
+                soln_dyvars = integrate()
+            else:
+                self._adaptive_quad_pts = N0
+        els_dict = dict(self.dyvars_to_orbital_elements(soln_dyvars))
         els_dict['times'] = times
-        for i,sol in enumerate(soln_dyvars):
-            els = self.dyvars_to_orbital_elements(sol)
-            for key,val in els.items():
-                els_dict[key][i]=val
+        if not self._in_table_domain(els_dict):
+            warn("Solution leaves the domain of the interpolation table. Results outside of the domain may be inaccurate.")
         return {'times':times,'dynamical_variables':soln_dyvars,'orbital_elements':els_dict}
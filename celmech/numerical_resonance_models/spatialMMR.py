@@ -7,15 +7,38 @@ from warnings import warn
 from scipy.optimize import lsq_linear
 from scipy.integrate import odeint
 import warnings
-from tqdm import tqdm
 
-from .utils import planar_els2xv,calc_Hint_components_spatial
+from .utils import planar_els2xv,calc_Hint_components_spatial,get_cached_theano_functions,add_batched_graphs
+from .utils import periodic_quadrature_rule,adaptive_quad_pts
 from ..nbody_simulation_utilities import get_canonical_heliocentric_orbits, add_canonical_heliocentric_elements_particle, align_simulation
 from ..miscellaneous import getOmegaMatrix
 # set to fast compile, for testing at least...
 
 
-def _get_compiled_theano_functions(N_QUAD_PTS):
+def _get_compiled_theano_functions(N_QUAD_PTS,use_disk_cache=True):
+    return get_cached_theano_functions(
+        'spatial',
+        N_QUAD_PTS,
+        _FUNCTION_NAMES,
+        _get_theano_graph,
+        use_disk_cache=use_disk_cache
+    )
+
+def _get_compiled_adaptive_theano_functions(use_disk_cache=True):
+    # Quadrature nodes and weights are passed as the final 
+    # two arguments of the compiled functions.
+    return get_cached_theano_functions(
+        'spatial_adaptive',
+        0,
+        _FUNCTION_NAMES,
+        _get_adaptive_theano_graph,
+        use_disk_cache=use_disk_cache
+    )
+
+def _get_adaptive_theano_graph(N_QUAD_PTS):
+    return _get_theano_graph(None)
+
+def _get_theano_graph(N_QUAD_PTS):
     # Planet masses: m1,m2
     m1,m2 = T.dscalars(2)
     mstar = 1
@@ -130,21 +153,28 @@ def _get_compiled_theano_functions(N_QUAD_PTS):
     # Set parameters for compiling functions with Theano
     #####################################################
     
-    # Get numerical quadrature nodes and weights
-    nodes,weights = np.polynomial.legendre.leggauss(N_QUAD_PTS)
-    
-    # Rescale for integration interval from [-1,1] to [-pi,pi]
-    nodes = nodes * np.pi
-    weights = weights * 0.5
-    
-    # 'givens' will fix some parameters of Theano functions compiled below
-    givens = [(psi,nodes),(quad_weights,weights)]
+    if N_QUAD_PTS is None:
+        # Quadrature nodes and weights are supplied 
+        # as inputs when functions are called.
+        givens = []
+        quad_ins = [psi,quad_weights]
+    else:
+        # Get numerical quadrature nodes and weights
+        nodes,weights = np.polynomial.legendre.leggauss(N_QUAD_PTS)
+        
+        # Rescale for integration interval from [-1,1] to [-pi,pi]
+        nodes = nodes * np.pi
+        weights = weights * 0.5
+        
+        # 'givens' will fix some parameters of Theano functions compiled below
+        givens = [(psi,nodes),(quad_weights,weights)]
+        quad_ins = []
 
     # 'ins' will set the inputs of Theano functions compiled below
     #   Note: 'extra_ins' will be passed as values of object attributes
     #   of the 'ResonanceEquations' class 'defined below
     extra_ins = [m1,m2,j,k]
-    ins = [dyvars] + extra_ins
+    ins = [dyvars] + extra_ins + quad_ins
 
     Stilde = Phi * (L2-I2 - L1 + I1) / (Ltot)
     Q1 = 0.5 * (Phi+Stilde)
@@ -186,42 +216,39 @@ def _get_compiled_theano_functions(N_QUAD_PTS):
     Hkep_flow_jac = Jtens.dot(hessHkep)
 
     ##########################
-    # Compile Theano functions
+    # Theano function outputs
     ##########################
     func_dict={
      # Hamiltonians
      'H':Htot,
-     #'Hpert':Hpert_av,
-     #'Hkep':Hkep,
+     'Hpert':Hpert_av,
+     'Hkep':Hkep,
      ## Hamiltonian flows
      'H_flow':H_flow_vec,
-     #'Hpert_flow':Hpert_flow_vec,
-     #'Hkep_flow':Hkep_flow_vec,
+     'Hpert_flow':Hpert_flow_vec,
+     'Hkep_flow':Hkep_flow_vec,
      ## Hamiltonian flow Jacobians
      'H_flow_jac':H_flow_jac,
-     #'Hpert_flow_jac':Hpert_flow_jac,
-     #'Hkep_flow_jac':Hkep_flow_jac,
+     'Hpert_flow_jac':Hpert_flow_jac,
+     'Hkep_flow_jac':Hkep_flow_jac,
      ## Extras
      'orbital_elements':orbels_dict,
      'actions':actions_dict
     }
-    compiled_func_dict=dict()
-    with tqdm(func_dict.items()) as t:
-        for key,val in t:
-            t.set_description("Compiling '{}'".format(key))
-            if key is 'timescales':
-                inputs = extra_ins
-            else:
-                inputs = ins 
-            cf = theano.function(
-                inputs=inputs,
-                outputs=val,
-                givens=givens,
-                on_unused_input='ignore'
-            )
-            compiled_func_dict[key]=cf
-    return compiled_func_dict
-
+    graph = {key:(ins,val) for key,val in func_dict.items()}
+    graph['eccentricities'] = ([dyvars] + extra_ins,T.stack(e1,e2))
+    add_batched_graphs(graph,_BATCHED_FUNCTION_NAMES,dyvars,givens)
+    return graph,givens
+
+# Functions that are also compiled in versions acting
+# on (M,Ndim) arrays of dynamical variables.
+_BATCHED_FUNCTION_NAMES = ('H','Hpert','Hkep','H_flow','H_flow_jac','orbital_elements','actions','eccentricities')
+_FUNCTION_NAMES = (
+    'H','Hpert','Hkep',
+    'H_flow','Hpert_flow','Hkep_flow',
+    'H_flow_jac','Hpert_flow_jac','Hkep_flow_jac',
+    'orbital_elements','actions','eccentricities'
+) + tuple(name + "_batch" for name in _BATCHED_FUNCTION_NAMES)
 
 class SpatialResonanceEquations():
 
@@ -249,19 +276,86 @@ class SpatialResonanceEquations():
     m2 : float
         Outer planet mass
 
+    quadrature_tolerance : float or None
+        If not None, the number of quadrature points used to average 
+        over psi is chosen adaptively, instead of using 'n_quad_pts' 
+        Gauss-Legendre points, so that the averaged perturbation 
+        Hamiltonian has this relative accuracy. Trapezoidal rules with
+        between 'min_quad_pts' and 'max_quad_pts' points are used. The
+        number of points is fixed by :meth:`set_quadrature_resolution`,
+        which is called at the start of each integration and, otherwise,
+        the first time the equations are evaluated.
+
     """
-    def __init__(self,j,k, n_quad_pts = 40, m1 = 1e-5 , m2 = 1e-5):
+    def __init__(self,j,k, n_quad_pts = 40, m1 = 1e-5 , m2 = 1e-5, quadrature_tolerance = None):
         self.j = j
         self.k = k
         self.m1 = m1
         self.m2 = m2
         self.mstar = 1
         self.n_quad_pts = n_quad_pts
-        self._funcs = _get_compiled_theano_functions(n_quad_pts)
+        self.min_quad_pts = 8
+        self.max_quad_pts = 512
+        self.quadrature_tolerance = quadrature_tolerance
 
     @property
+    def quadrature_tolerance(self):
+        return self._quadrature_tolerance
+    @quadrature_tolerance.setter
+    def quadrature_tolerance(self,tolerance):
+        self._quadrature_tolerance = tolerance
+        # Number of points of the adaptive quadrature rule
+        self._adaptive_quad_pts = None
+        if tolerance is None:
+            self._funcs = _get_compiled_theano_functions(self.n_quad_pts)
+        else:
+            self._funcs = _get_compiled_adaptive_theano_functions()
+    @property
     def extra_args(self):
         return [self.m1,self.m2,self.j,self.k]
+    def _evaluate(self,name,z):
+        # Evaluate compiled function 'name' at a single state
+        # vector or, with a single call, at an (M,Ndim) array of states.
+        z = np.asarray(z)
+        args = self.extra_args
+        if self._quadrature_tolerance is not None:
+            if self._adaptive_quad_pts is None:
+                self.set_quadrature_resolution(z)
+            args = args + list(periodic_quadrature_rule(self._adaptive_quad_pts))
+        if z.ndim == 2:
+            return self._funcs[name + "_batch"](z,*args)
+        return self._funcs[name](z,*args)
+    def set_quadrature_resolution(self,z):
+        """
+        Choose the number of points of the trapezoidal rule used to
+        average over psi when 'quadrature_tolerance' is set. 
+
+        The number of points is found by successive doubling so that 
+        the averaged perturbation Hamiltonian evaluated at z has 
+        the requested relative accuracy. The rule is then used for all
+        subsequent evaluations until this method is called again. 
+
+        Arguments
+        ---------
+        z : ndarray
+            Dynamical variables. Either a single state vector or an 
+            (M,Ndim) array of states, in which case the state with 
+            the largest eccentricity is used.
+
+        Returns
+        -------
+        int :
+            Number of quadrature points.
+        """
+        if self._quadrature_tolerance is None:
+            raise ValueError("Adaptive quadrature requires 'quadrature_tolerance' to be set.")
+        z = np.asarray(z)
+        if z.ndim == 2:
+            ecc = np.max(self._funcs['eccentricities_batch'](z,*self.extra_args),axis=1)
+            z = z[np.argmax(ecc)]
+        Hpert = lambda nodes,weights: self._funcs['Hpert'](z,*self.extra_args,nodes,weights)
+        self._adaptive_quad_pts = adaptive_quad_pts(Hpert,self._quadrature_tolerance,self.min_quad_pts,self.max_quad_pts)
+        return self._adaptive_quad_pts
     @property
     def mu1(self):
         return self.m1 / (1 + self.m1)
@@ -288,14 +382,16 @@ class SpatialResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the Hamiltonian evaluated at z.
         """
-        return self._funcs['H'](z,*self.extra_args)
+        return self._evaluate('H',z)
 
     def H_kep(self,z):
         """
@@ -304,14 +400,16 @@ class SpatialResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the Keplerian part of the Hamiltonian evaluated at z.
         """
-        return self._funcs['Hkep'](z,*self.extra_args)
+        return self._evaluate('Hkep',z)
 
     def H_pert(self,z):
         r"""
@@ -320,14 +418,16 @@ class SpatialResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
-        float : 
+        float or ndarray : 
             The value of the perturbation part of the Hamiltonian evaluated at z.
         """
-        return self._funcs['Hpert'](z,*self.extra_args)
+        return self._evaluate('Hpert',z)
 
     def H_flow(self,z):
         r"""
@@ -338,14 +438,16 @@ class SpatialResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Flow vector
+            Flow vector, or (M,Ndim) array of flow vectors.
         """
-        return self._funcs['H_flow'](z,*self.extra_args)
+        return self._evaluate('H_flow',z)
 
 
     def H_flow_jac(self,z):
@@ -357,14 +459,17 @@ class SpatialResonanceEquations():
         Arguments
         ---------
         z : ndarray
-            Dynamical variables
+            Dynamical variables. Either a single state
+            vector of shape (Ndim,) or an array of states of 
+            shape (M,Ndim).
 
         Returns
         -------
         ndarray : 
-            Jacobian matrix
+            Jacobian matrix, or (M,Ndim,Ndim) array of 
+            Jacobian matrices.
         """
-        return self._funcs['H_flow_jac'](z,*self.extra_args)
+        return self._evaluate('H_flow_jac',z)
 
     def dyvars_to_orbital_elements(self,z):
         r"""
@@ -374,9 +479,12 @@ class SpatialResonanceEquations():
         to orbital elements
         .. math:
             (a_1,e_1,inc_1,\theta_1,a_2,e_2,inc_2,\theta_2)
+
+        If 'z' is an (M,Ndim) array of states, the returned
+        dictionary contains arrays of length M.
         """
 
-        return self._funcs['orbital_elements'](z,*self.extra_args)
+        return self._evaluate('orbital_elements',z)
 
     def dyvars_to_Poincare_actions(self,z):
         r"""
@@ -398,7 +506,7 @@ class SpatialResonanceEquations():
             Dictionary of canonical actions with strings as keys.
         """
 
-        return self._funcs['actions'](z,*self.extra_args)
+        return self._evaluate('actions',z)
 
     def dyvars_from_rebound_simulation(self,sim,iIn=1,iOut=2,osculating_correction=False,full_output=False):
         r"""
@@ -622,21 +730,33 @@ class SpatialResonanceEquations():
             of dynamical variables.
         times : ndarray
             Times at which to calculate output.
+
+        If 'quadrature_tolerance' is set, the quadrature rule is chosen
+        from the initial conditions and held fixed during the integration.
+        If the solution reaches eccentricities that require more points,
+        the integration is repeated with the rule chosen at the largest
+        eccentricity.
         """
         f = lambda y,t: self.H_flow(y)
         Df = lambda y,t: self.H_flow_jac(y)
-        soln_dyvars = odeint(
+        integrate = lambda: odeint(
                 f,
                 dyvars0,
                 times,
                 Dfun = Df
         )
-        el_dict0=self.dyvars_to_orbital_elements(dyvars0)
-        els_dict = {key:np.zeros(len(soln_dyvars)) for key in el_dict0};
+        if self._quadrature_tolerance is None:
+            soln_dyvars = integrate()
+        else:
+            N0 = self.set_quadrature_resolution(dyvars0)
+            soln_dyvars = integrate()
+            # Re-integrate if the solution reaches eccentricities
+            # that require a finer quadrature rule.
+            if self.set_quadrature_resolution(soln_dyvars) > N0:
+                soln_dyvars = integrate()
+            else:
+                self._adaptive_quad_pts = N0
+        els_dict = dict(self.dyvars_to_orbital_elements(soln_dyvars))
         els_dict['times'] = times
-        for i,sol in enumerate(soln_dyvars):
-            els = self.dyvars_to_orbital_elements(sol)
-            for key,val in els.items():
-                els_dict[key][i]=val
         return {'times':times,'dynamical_variables':soln_dyvars,'orbital_elements':els_dict}
             
@@ -1,5 +1,240 @@
+import warnings
+import numpy as np
+import theano
 import theano.tensor as T
 from celmech.theano_ops.kepler import KeplerOp
+from ..theano_ops.function_cache import get_cached_theano_functions, clear_function_cache, default_function_cache_path
+
+def chebyshev_nodes(N):
+    r"""
+    Get the N Chebyshev nodes of the first kind,
+    :math:`x_m = \cos(\pi(m+1/2)/N)`, on the interval [-1,1].
+
+    Arguments
+    ---------
+    N : int
+        Number of nodes.
+
+    Returns
+    -------
+    ndarray :
+        Array of nodes.
+    """
+    return np.cos(np.pi * (np.arange(N) + 0.5) / N)
+
+def chebyshev_coefficients(values):
+    """
+    Compute the coefficients of the tensor-product Chebyshev 
+    interpolant of an array of function values sampled on the 
+    grid of Chebyshev nodes returned by :func:`chebyshev_nodes`
+    along each axis.
+
+    Arguments
+    ---------
+    values : ndarray
+        Function values on the node grid.
+
+    Returns
+    -------
+    ndarray :
+        Array of Chebyshev coefficients with the same shape as 
+        'values'.
+    """
+    coeffs = np.asarray(values,dtype=float)
+    for axis,N in enumerate(coeffs.shape):
+        n = np.arange(N)
+        mtrx = (2 / N) * np.cos(np.pi * np.outer(n,n + 0.5) / N)
+        mtrx[0] *= 0.5
+        coeffs = np.moveaxis(np.tensordot(mtrx,coeffs,axes=([1],[axis])),0,axis)
+    return coeffs
+
+def chebyshev_tail(coeffs,axis):
+    """
+    Estimate the truncation error of a tensor-product Chebyshev
+    interpolant along one axis from the magnitudes of its two 
+    highest-order coefficients along that axis.
+
+    Arguments
+    ---------
+    coeffs : ndarray
+        Array of Chebyshev coefficients.
+    axis : int
+        Axis along which to estimate the error.
+
+    Returns
+    -------
+    float :
+        Error estimate.
+    """
+    tail = np.take(coeffs,[-2,-1],axis=axis)
+    return np.sum(np.abs(tail))
+
+def evaluate_chebyshev(coeffs,xs):
+    """
+    Evaluate a tensor-product Chebyshev interpolant at
+    a set of points.
+
+    Arguments
+    ---------
+    coeffs : ndarray
+        Array of Chebyshev coefficients.
+    xs : list of ndarray
+        List of arrays of the coordinates, scaled to [-1,1], of the
+        points along each axis of 'coeffs'.
+
+    Returns
+    -------
+    ndarray :
+        Interpolant values at the points.
+    """
+    vander = [np.polynomial.chebyshev.chebvander(x,N-1) for x,N in zip(xs,coeffs.shape)]
+    val = np.tensordot(vander[0],coeffs,axes=([1],[0]))
+    for V in vander[1:]:
+        val = np.einsum('pi,pi...->p...',V,val)
+    return val
+
+def chebyshev_interpolant(coeffs,xs,shape):
+    """
+    Construct the symbolic expression of a tensor-product 
+    Chebyshev interpolant.
+
+    Arguments
+    ---------
+    coeffs : theano.tensor.TensorVariable
+        Symbolic array of Chebyshev coefficients.
+    xs : list 
+        Symbolic scalar coordinates, scaled to [-1,1], along each 
+        axis of 'coeffs'.
+    shape : tuple
+        Shape of the coefficient array.
+
+    Returns
+    -------
+    theano.tensor.TensorVariable :
+        Value of the interpolant.
+    """
+    val = coeffs
+    for x,N in zip(xs,shape):
+        basis = [T.ones_like(x),x]
+        for n in range(2,N):
+            basis.append(2 * x * basis[-1] - basis[-2])
+        val = T.tensordot(T.stack(basis[:N]),val,axes=[[0],[0]])
+    return val
+
+# Cached node sets of the periodic trapezoidal rule keyed by number of nodes.
+_periodic_quadrature_rules = dict()
+
+def periodic_quadrature_rule(N):
+    r"""
+    Get the nodes and weights of the N-point trapezoidal rule
+    for averaging a :math:`2\pi`-periodic function over the 
+    interval :math:`[-\pi,\pi)`. For smooth periodic integrands
+    the rule converges exponentially with N and the nodes of the 
+    N-point rule are a subset of the nodes of the 2N-point rule.
+
+    Arguments
+    ---------
+    N : int
+        Number of nodes.
+
+    Returns
+    -------
+    nodes : ndarray
+        Quadrature nodes.
+    weights : ndarray
+        Quadrature weights, which sum to 1.
+    """
+    try:
+        return _periodic_quadrature_rules[N]
+    except KeyError:
+        pass
+    nodes = -np.pi + 2 * np.pi * np.arange(N) / N
+    weights = np.ones(N) / N
+    _periodic_quadrature_rules[N] = (nodes,weights)
+    return nodes,weights
+
+def adaptive_quad_pts(average,tolerance,min_quad_pts=8,max_quad_pts=512):
+    """
+    Find the number of points of the periodic trapezoidal rule
+    needed to compute an average to within a relative tolerance.
+    
+    The number of points is doubled, starting from 'min_quad_pts', until
+    successive averages agree to within the tolerance. The larger of 
+    the two rules is then returned.
+
+    Arguments
+    ---------
+    average : callable
+        Function called with the arguments (nodes, weights) of
+        a quadrature rule that returns the corresponding average.
+    tolerance : float
+        Relative tolerance.
+    min_quad_pts : int, optional
+        Minimum number of quadrature points. Default is 8.
+    max_quad_pts : int, optional
+        Maximum number of quadrature points. Default is 512.
+
+    Returns
+    -------
+    int :
+        Number of quadrature points.
+    """
+    N = min_quad_pts
+    val = average(*periodic_quadrature_rule(N))
+    while 2 * N <= max_quad_pts:
+        val2 = average(*periodic_quadrature_rule(2 * N))
+        if np.abs(val2 - val) <= tolerance * np.abs(val2):
+            return 2 * N
+        N *= 2
+        val = val2
+    warnings.warn("Quadrature did not converge to a relative tolerance of {:.1g} with the maximum of {} points.".format(tolerance,N))
+    return N
+
+def add_batched_graphs(graph,names,dyvars,givens):
+    """
+    Add versions of the functions in a model's symbolic graph that
+    act on an (M,Ndim) array of dynamical variables and return
+    outputs stacked along the first axis. The batched functions
+    are stored in 'graph' under the keys '<name>_batch'.
+
+    Evaluation is done with a single Theano scan over the rows
+    of the input array so that a batch of states is evaluated 
+    with one call to the compiled function.
+
+    Arguments
+    ---------
+    graph : dict
+        Dictionary mapping function names to tuples (inputs, outputs). 
+        The first input of each function must be 'dyvars'.
+    names : list of str
+        Names of the functions to batch.
+    dyvars : theano.tensor.TensorVariable
+        Symbolic vector of dynamical variables.
+    givens : list
+        List of (variable, value) pairs fixed when compiling 
+        functions.
+    """
+    replace = [(var,T.as_tensor_variable(val)) for var,val in givens]
+    for name in names:
+        inputs,outputs = graph[name]
+        if isinstance(outputs,dict):
+            keys = list(outputs.keys())
+            outs = [outputs[key] for key in keys]
+        else:
+            keys = None
+            outs = [outputs]
+        def step(z,outs=outs):
+            return theano.clone(outs,replace=dict(replace + [(dyvars,z)]))
+        zbatch = T.matrix()
+        batched,_ = theano.map(step,sequences=[zbatch])
+        if not isinstance(batched,(list,tuple)):
+            batched = [batched]
+        if keys is None:
+            batched_outputs = batched[0]
+        else:
+            batched_outputs = dict(zip(keys,batched))
+        graph[name + "_batch"] = ([zbatch] + list(inputs[1:]),batched_outputs)
+
 def planar_els2xv(a,lmbda,h,k,GMstar):
     ko = KeplerOp()
     e_sq = h*h+k*k
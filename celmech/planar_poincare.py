@@ -336,8 +336,7 @@ class PlanarPoincareHamiltonian(Hamiltonian):
             self.Hparams[LambdaIn0]=self.state.particles[indexIn].Lambda
             self.Hparams[LambdaOut0]=self.state.particles[indexOut].Lambda
             exprn = exprn.subs([(LambdaIn,LambdaIn0),(LambdaOut,LambdaOut0)])
-        self.H += exprn
-        self._update()
+        self._add_term(exprn)
 
     def add_all_resonance_subterms(self, j, k, indexIn=1, indexOut=2):
         """
@@ -405,8 +404,7 @@ class PlanarPoincareHamiltonian(Hamiltonian):
         costerm = cos(j * lambdaOut  - (j-k) * lambdaIn )
         sinterm = sin(j * lambdaOut  - (j-k) * lambdaIn )
         
-        self.H += prefactor * Cjkl * (reFactor * costerm - imFactor * sinterm)
-        self._update()
+        self._add_term(prefactor * Cjkl * (reFactor * costerm - imFactor * sinterm))
         
         # update polar Hamiltonian
         GammaIn,gammaIn,GammaOut,gammaOut = symbols('Gamma{0},gamma{0},Gamma{1},gamma{1}'.format(indexIn, indexOut))
@@ -345,7 +345,7 @@ class PoincareHamiltonian(Hamiltonian):
         A set of Poincare variables to which 
         transformations are applied.
     """
-    def __init__(self, pvars):
+    def __init__(self, pvars, fused_rhs = True, analytic_jacobian = False):
         Hparams = {symbols('G'):pvars.G}
         pqpairs = []
         ps = pvars.particles
@@ -359,7 +359,7 @@ class PoincareHamiltonian(Hamiltonian):
             Hparams[symbols("M{0}".format(i))] = ps[i].M
             H = self.add_Hkep_term(H, i)
         self.resonance_indices = []
-        super(PoincareHamiltonian, self).__init__(H, pqpairs, Hparams, pvars) 
+        super(PoincareHamiltonian, self).__init__(H, pqpairs, Hparams, pvars, fused_rhs = fused_rhs, analytic_jacobian = analytic_jacobian) 
     
     @property
     def particles(self):
@@ -476,9 +476,7 @@ class PoincareHamiltonian(Hamiltonian):
         # Keep track of resonances
         self.resonance_indices.append((indexIn,indexOut,(kvec,zvec)))
         
-        self.H += prefactor1 * C * prefactor2 * trig_term
-        if update:
-            self._update()
+        self._add_term(prefactor1 * C * prefactor2 * trig_term, update)
         
     def add_all_MMR_and_secular_terms(self,p,q,max_order,indexIn = 1, indexOut = 2):
         """
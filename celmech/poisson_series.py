@@ -9,20 +9,23 @@ from . import clibcelmech
 _rt2 = np.sqrt(2)
 _rt2_inv = 1  / _rt2
 
-class SeriesTerm(Structure):
-    pass
-SeriesTerm._fields_ = [
-            ("k",c_int * 6),
-            ("z",c_int * 4),
-            ("coeff",c_double),
-            ("next",POINTER(SeriesTerm))
+class SeriesTerms(Structure):
+    """
+    Terms of a Poisson series stored as contiguous arrays
+    of integer vectors k and z and coefficients.
+    """
+    _fields_ = [
+            ("Nterms",c_int),
+            ("k",POINTER(c_int)),
+            ("z",POINTER(c_int)),
+            ("coeff",POINTER(c_double))
             ]
 
 _evaluate_series = clibcelmech.evaluate_series
 _evaluate_series.argtypes = [
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
-    POINTER(SeriesTerm),
+    POINTER(SeriesTerms),
     c_int,
     c_int,
     POINTER(c_double),
@@ -34,7 +37,7 @@ _evaluate_series_and_derivs = clibcelmech.evaluate_series_and_derivs
 _evaluate_series_and_derivs.argtypes = [
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
-    POINTER(SeriesTerm),
+    POINTER(SeriesTerms),
     c_int,
     c_int,
     POINTER(c_double),
@@ -46,7 +49,7 @@ _evaluate_series_and_jacobian = clibcelmech.evaluate_series_and_jacobian
 _evaluate_series_and_jacobian.argtypes = [
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
     np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1),
-    POINTER(SeriesTerm),
+    POINTER(SeriesTerms),
     c_int,
     c_int,
     POINTER(c_double),
@@ -54,6 +57,119 @@ _evaluate_series_and_jacobian.argtypes = [
 ] + [(4 * c_double) for _ in range(4)] + [(64 * c_double) for _ in range(2)]
 _evaluate_series_and_jacobian.restype = None
 
+_batch_argtypes = [
+    c_int,
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    POINTER(SeriesTerms),
+    c_int,
+    c_int,
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS')
+]
+_evaluate_series_batch = clibcelmech.evaluate_series_batch
+_evaluate_series_batch.argtypes = _batch_argtypes
+_evaluate_series_batch.restype = None
+
+_evaluate_series_and_derivs_batch = clibcelmech.evaluate_series_and_derivs_batch
+_evaluate_series_and_derivs_batch.argtypes = _batch_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS')
+]
+_evaluate_series_and_derivs_batch.restype = None
+
+_evaluate_series_and_jacobian_batch = clibcelmech.evaluate_series_and_jacobian_batch
+_evaluate_series_and_jacobian_batch.argtypes = _batch_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=3,flags='C_CONTIGUOUS')
+]
+_evaluate_series_and_jacobian_batch.restype = None
+
+_alloc_series_workspace = clibcelmech.alloc_series_workspace
+_alloc_series_workspace.argtypes = [c_int,c_int]
+_alloc_series_workspace.restype = c_void_p
+
+_free_series_workspace = clibcelmech.free_series_workspace
+_free_series_workspace.argtypes = [c_void_p]
+_free_series_workspace.restype = None
+
+_ws_argtypes = [
+    c_void_p,
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS'),
+    POINTER(SeriesTerms),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS')
+]
+_evaluate_series_ws = clibcelmech.evaluate_series_ws
+_evaluate_series_ws.argtypes = _ws_argtypes
+_evaluate_series_ws.restype = None
+
+_evaluate_series_and_derivs_ws = clibcelmech.evaluate_series_and_derivs_ws
+_evaluate_series_and_derivs_ws.argtypes = _ws_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS')
+]
+_evaluate_series_and_derivs_ws.restype = None
+
+_evaluate_series_and_jacobian_ws = clibcelmech.evaluate_series_and_jacobian_ws
+_evaluate_series_and_jacobian_ws.argtypes = _ws_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS')
+]
+_evaluate_series_and_jacobian_ws.restype = None
+
+_multi_ws_argtypes = [
+    c_void_p,
+    c_int,
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    c_void_p,
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=1,flags='C_CONTIGUOUS')
+]
+_evaluate_multi_series_ws = clibcelmech.evaluate_multi_series_ws
+_evaluate_multi_series_ws.argtypes = _multi_ws_argtypes
+_evaluate_multi_series_ws.restype = None
+
+_evaluate_multi_series_and_derivs_ws = clibcelmech.evaluate_multi_series_and_derivs_ws
+_evaluate_multi_series_and_derivs_ws.argtypes = _multi_ws_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS')
+]
+_evaluate_multi_series_and_derivs_ws.restype = None
+
+_evaluate_multi_series_and_jacobian_ws = clibcelmech.evaluate_multi_series_and_jacobian_ws
+_evaluate_multi_series_and_jacobian_ws.argtypes = _multi_ws_argtypes + [
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=2,flags='C_CONTIGUOUS'),
+    np.ctypeslib.ndpointer(dtype = np.complex128,ndim=3,flags='C_CONTIGUOUS')
+]
+_evaluate_multi_series_and_jacobian_ws.restype = None
+
+class SeriesWorkspace(object):
+    """
+    Preallocated power tables and output buffers used to evaluate 
+    a :class:`DFTermSeries` without allocating memory on each call.
+
+    A workspace may be used by only one thread at a time. Threads 
+    evaluating the same series concurrently should each obtain their 
+    own workspace with :meth:`DFTermSeries.new_workspace`.
+
+    Arguments
+    ---------
+    kmax : int
+        Maximum power of exp[i*lambda] appearing in the series.
+    Nmax : int
+        Maximum power of X,X',Y, or Y' appearing in the series.
+    """
+    def __init__(self,kmax,Nmax):
+        self.kmax = kmax
+        self.Nmax = Nmax
+        self._ptr = _alloc_series_workspace(kmax,Nmax)
+        self.expIL = np.zeros(2,dtype=np.complex128)
+        self.sum = np.zeros(1,dtype=np.complex128)
+        self.derivs = np.zeros(8,dtype=np.complex128)
+        self.jacobian = np.zeros((8,8),dtype=np.complex128)
+
+    def __del__(self):
+        if getattr(self,'_ptr',None):
+            _free_series_workspace(self._ptr)
+            self._ptr = None
+
 def get_generic_DFCoeff_symbol(k1,k2,k3,k4,k5,k6,z1,z2,z3,z4):
     return symbols("C_{0}\,{1}\,{2}\,{3}\,{4}\,{5}^{6}\,{7}\,{8}\,{9}".format(
         k1,k2,k3,k4,k5,k6,z1,z2,z3,z4)
@@ -101,29 +217,11 @@ class DFTermSeries(object):
           The value is neccessary for computing the value of derivatives
           of the canonical variables \eta,\kappa,\rho,\sigma.
         """
-        self.slast_pointer = None
-        self.s_dXbar_last_pointer = None
-        kmax = 0
-        Nmax = 0
-        for kzpair,coeff_value in resterm_dictionary.items():
-            ks,zs = kzpair
-            kmax = max(kmax,abs(ks[0]),abs(ks[1]))
-            Nmax = max(
-                      Nmax,
-                      abs(ks[2]) + zs[2],
-                      abs(ks[3]) + zs[3],
-                      abs(ks[4]) + zs[0],
-                      abs(ks[5]) + zs[1]
-                    )
-            s = SeriesTerm()
-            s.k = (6 * c_int)(*ks)
-            s.z = (4 * c_int)(*zs)
-            s.coeff = coeff_value
-            s.next = self.slast_pointer
-            self.slast_pointer = pointer(s)
-        self.s0 = s
-        self.Nmax = Nmax
-        self.kmax = kmax
+        items = list(resterm_dictionary.items())
+        k_arr = np.array([kz[0] for kz,_ in items],dtype=np.intc).reshape(-1,6)
+        z_arr = np.array([kz[1] for kz,_ in items],dtype=np.intc).reshape(-1,4)
+        coeff_arr = np.array([coeff_value for _,coeff_value in items],dtype=np.float64)
+        self._set_terms(k_arr,z_arr,coeff_arr)
         rtLmbdaInv = 1 / np.sqrt([Lambda0In,Lambda0Out])
         mtrx = np.diag( np.concatenate((rtLmbdaInv, 0.5 * rtLmbdaInv )) )
         self.dXY_dQP  = np.block([
@@ -133,9 +231,96 @@ class DFTermSeries(object):
         Zeros = np.zeros((4,4))
         Id = np.eye(4)
         self.Omega = np.block([[Zeros,Id],[-Id,Zeros]])
+        self._Omega_dXY_dQP = self.Omega @ self.dXY_dQP
+
+    def _set_terms(self,k_arr,z_arr,coeff_arr):
+        # Arrays are stored as attributes so that the buffers
+        # referenced by self.terms stay alive.
+        self.k_arr = np.require(k_arr,dtype=np.intc,requirements='C')
+        self.z_arr = np.require(z_arr,dtype=np.intc,requirements='C')
+        self.coeff_arr = np.require(coeff_arr,dtype=np.float64,requirements='C')
+        Nterms = self.coeff_arr.shape[0]
+        assert self.k_arr.shape == (Nterms,6), "k_arr must have shape (Nterms,6)"
+        assert self.z_arr.shape == (Nterms,4), "z_arr must have shape (Nterms,4)"
+        self.terms = SeriesTerms(
+                Nterms,
+                self.k_arr.ctypes.data_as(POINTER(c_int)),
+                self.z_arr.ctypes.data_as(POINTER(c_int)),
+                self.coeff_arr.ctypes.data_as(POINTER(c_double))
+        )
+        if Nterms > 0:
+            abs_k = np.abs(self.k_arr)
+            self.kmax = int(np.max(abs_k[:,:2]))
+            self.Nmax = int(np.max(abs_k[:,2:] + self.z_arr[:,[2,3,0,1]]))
+        else:
+            self.kmax = 0
+            self.Nmax = 0
+        self.workspace = self.new_workspace()
+
+    def new_workspace(self):
+        """
+        Create a new :class:`SeriesWorkspace` for evaluating the series.
+        Each thread evaluating the series should use its own workspace.
+
+        Returns
+        -------
+        workspace : :class:`SeriesWorkspace`
+        """
+        return SeriesWorkspace(self.kmax,self.Nmax)
+
+    def _get_workspace(self,workspace,lambda_arr,xy_arr):
+        if workspace is None:
+            workspace = self.workspace
+        elif workspace.kmax < self.kmax or workspace.Nmax < self.Nmax:
+            raise ValueError(
+                "Workspace with kmax={}, Nmax={} is too small for series with kmax={}, Nmax={}.".format(
+                    workspace.kmax,workspace.Nmax,self.kmax,self.Nmax
+                )
+            )
+        np.exp(1j * np.asarray(lambda_arr),out = workspace.expIL)
+        xy_arr = np.ascontiguousarray(xy_arr,dtype=np.complex128)
+        return workspace,xy_arr
+
+    @classmethod
+    def from_arrays(cls,k_arr,z_arr,coeff_arr,Lambda0In,Lambda0Out):
+        r"""
+        Construct a series from arrays of term exponents and coefficients.
+        Arrays that are already C-contiguous and of the appropriate type
+        are used without copying.
+
+        Arguments
+        ---------
+        k_arr : ndarray, shape (Nterms,6)
+          Integer coefficients, k, of each term.
+        z_arr : ndarray, shape (Nterms,4)
+          Integer exponents, z, of each term.
+        coeff_arr : ndarray, shape (Nterms,)
+          Coefficients of each term.
+        Lambda0In : float
+          The value of the inner planet's canonical momentum, Lambda.
+        Lambda0Out : float
+          The value of the outer planet's canonical momentum, Lambda.
+        """
+        series = cls({},Lambda0In,Lambda0Out)
+        series._set_terms(k_arr,z_arr,coeff_arr)
+        return series
 
     @classmethod
     def from_resonance_list(cls,resterm_list,G,mIn,mOut,MIn,MOut,Lambda0In,Lambda0Out):
+        r"""
+        Construct a series from a list of disturbing function terms.
+
+        Arguments
+        ---------
+        resterm_list : list
+          List of terms in the form (kvec,zvec).
+        G : float
+          Gravitational constant.
+        mIn, mOut, MIn, MOut : float
+          Mass parameters of the inner and outer planet.
+        Lambda0In, Lambda0Out : float
+          Reference values of the planets' canonical momenta, Lambda.
+        """
         muIn = mIn * (MIn - mIn) / MIn
         muOut = mOut * (MOut - mOut) / MOut
         aIn0 = (Lambda0In / muIn)**2 / MIn / G
@@ -154,66 +339,119 @@ class DFTermSeries(object):
         terms = ResonanceTermsList(j,k,Nmin,Nmax)
         return cls.from_resonance_list(terms,G,mIn,mOut,MIn,MOut,Lambda0In,Lamda0Out)
 
-    def _evaluate(self,lambda_arr, xy_arr):
-        expIL = np.exp( 1j * lambda_arr)
-        sum_re,sum_im  = c_double(),c_double()
-        _evaluate_series(
-                expIL,
-                xy_arr,
-                self.s0,
-                self.kmax,
-                self.Nmax,
-                pointer(sum_re),
-                pointer(sum_im)
-            )
-        return np.float64(sum_re)
-
-    def _evaluate_with_derivs(self,lambda_arr,xy_arr):
-        expIL = np.exp( 1j * lambda_arr)
-        sum_re,sum_im  = c_double(),c_double()
-        dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im = [(4 * c_double)() for _ in range(4)]
-        _evaluate_series_and_derivs(
-                expIL,
-                xy_arr,
-                self.s0,
-                self.kmax,
-                self.Nmax,
-                pointer(sum_re),
-                pointer(sum_im),
-                dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im
-            )
-        dSdxy = np.concatenate((
-            np.array(dS_dxy_re) + 1j * np.array(dS_dxy_im),
-            np.array(dS_dxybar_re) + 1j * np.array(dS_dxybar_im)
-            ))
-        derivs = np.real(self.Omega @ self.dXY_dQP @ dSdxy)
-        return np.float64(sum_re),derivs
-
-    def _evaluate_with_jacobian(self,lambda_arr,xy_arr):
-        expIL = np.exp( 1j * lambda_arr)
-        sum_re,sum_im  = c_double(),c_double()
-        dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im = [(4 * c_double)() for _ in range(4)]
-        jac_re,jac_im = [(64 * c_double)() for _ in range(2)]
-        _evaluate_series_and_jacobian(
-                expIL,
-                xy_arr,
-                self.s0,
-                self.kmax,
-                self.Nmax,
-                pointer(sum_re),
-                pointer(sum_im),
-                dS_dxy_re,dS_dxy_im,dS_dxybar_re,dS_dxybar_im,
-                jac_re, jac_im
-            )
+    def _evaluate(self,lambda_arr, xy_arr, workspace = None):
+        ws,xy_arr = self._get_workspace(workspace,lambda_arr,xy_arr)
+        _evaluate_series_ws(ws._ptr,ws.expIL,xy_arr,byref(self.terms),ws.sum)
+        return np.float64(ws.sum[0].real)
 
-        dSdxy = np.concatenate((
-            np.array(dS_dxy_re) + 1j * np.array(dS_dxy_im),
-            np.array(dS_dxybar_re) + 1j * np.array(dS_dxybar_im)
-            ))
-        derivs = np.real(self.Omega @ self.dXY_dQP @ dSdxy)
-        jac_xy = (np.array(jac_re) + 1j * np.array(jac_im)).reshape(8,8)
+    def _evaluate_with_derivs(self,lambda_arr,xy_arr, workspace = None):
+        ws,xy_arr = self._get_workspace(workspace,lambda_arr,xy_arr)
+        _evaluate_series_and_derivs_ws(ws._ptr,ws.expIL,xy_arr,byref(self.terms),ws.sum,ws.derivs)
+        derivs = np.real(self._Omega_dXY_dQP @ ws.derivs)
+        return np.float64(ws.sum[0].real),derivs
+
+    def _evaluate_with_jacobian(self,lambda_arr,xy_arr, workspace = None):
+        ws,xy_arr = self._get_workspace(workspace,lambda_arr,xy_arr)
+        _evaluate_series_and_jacobian_ws(
+                ws._ptr,ws.expIL,xy_arr,byref(self.terms),
+                ws.sum,ws.derivs,ws.jacobian
+        )
+        derivs = np.real(self._Omega_dXY_dQP @ ws.derivs)
+        jac_xy = ws.jacobian.copy()
         jac_qp = self.Omega @ np.real(self.dXY_dQP @ jac_xy @ self.dXY_dQP.T)
-        return np.float64(sum_re), derivs, jac_qp, jac_xy
+        return np.float64(ws.sum[0].real), derivs, jac_qp, jac_xy
+
+    def _batch_inputs(self,lambda_arr,xy_arr):
+        expIL = np.ascontiguousarray(np.exp(1j * np.asarray(lambda_arr)),dtype=np.complex128)
+        xy_arr = np.ascontiguousarray(xy_arr,dtype=np.complex128)
+        assert expIL.ndim == 2 and expIL.shape[1] == 2, "lambda_arr must have shape (N,2)"
+        assert xy_arr.shape == (expIL.shape[0],4), "xy_arr must have shape (N,4)"
+        return expIL.shape[0],expIL,xy_arr
+
+    def evaluate_batch(self,lambda_arr,xy_arr):
+        """
+        Evaluate the series at multiple points with a single call
+        to the C library.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (N,2)
+            Mean longitudes of the inner and outer planet at each point.
+        xy_arr : ndarray, shape (N,4)
+            Complex variables X,X',Y,Y' at each point.
+
+        Returns
+        -------
+        H : ndarray, shape (N,)
+            Values of the series.
+        """
+        N,expIL,xy_arr = self._batch_inputs(lambda_arr,xy_arr)
+        sums = np.zeros(N,dtype=np.complex128)
+        _evaluate_series_batch(N,expIL,xy_arr,byref(self.terms),self.kmax,self.Nmax,sums)
+        return np.real(sums)
+
+    def evaluate_with_derivs_batch(self,lambda_arr,xy_arr):
+        """
+        Evaluate the series and the derivatives of the canonical
+        variables eta,eta',rho,rho',kappa,kappa',sigma,sigma'
+        at multiple points with a single call to the C library.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (N,2)
+            Mean longitudes of the inner and outer planet at each point.
+        xy_arr : ndarray, shape (N,4)
+            Complex variables X,X',Y,Y' at each point.
+
+        Returns
+        -------
+        H : ndarray, shape (N,)
+            Values of the series.
+        derivs : ndarray, shape (N,8)
+            Time derivatives of canonical variables at each point.
+        """
+        N,expIL,xy_arr = self._batch_inputs(lambda_arr,xy_arr)
+        sums = np.zeros(N,dtype=np.complex128)
+        dSdxy = np.zeros((N,8),dtype=np.complex128)
+        _evaluate_series_and_derivs_batch(N,expIL,xy_arr,byref(self.terms),self.kmax,self.Nmax,sums,dSdxy)
+        derivs = np.real(dSdxy @ self._Omega_dXY_dQP.T)
+        return np.real(sums),derivs
+
+    def evaluate_with_jacobian_batch(self,lambda_arr,xy_arr):
+        """
+        Evaluate the series, the derivatives of the canonical 
+        variables eta,eta',rho,rho',kappa,kappa',sigma,sigma',
+        and the Jacobian of the derivatives at multiple points with 
+        a single call to the C library.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (N,2)
+            Mean longitudes of the inner and outer planet at each point.
+        xy_arr : ndarray, shape (N,4)
+            Complex variables X,X',Y,Y' at each point.
+
+        Returns
+        -------
+        H : ndarray, shape (N,)
+            Values of the series.
+        derivs : ndarray, shape (N,8)
+            Time derivatives of canonical variables at each point.
+        jac_qp : ndarray, shape (N,8,8)
+            Jacobians of the derivatives with respect to the 
+            canonical variables.
+        jac_xy : ndarray, shape (N,8,8)
+            Second derivatives of the series with respect to X,X',Y,Y'
+            and their complex conjugates.
+        """
+        N,expIL,xy_arr = self._batch_inputs(lambda_arr,xy_arr)
+        sums = np.zeros(N,dtype=np.complex128)
+        dSdxy = np.zeros((N,8),dtype=np.complex128)
+        jac_xy = np.zeros((N,8,8),dtype=np.complex128)
+        _evaluate_series_and_jacobian_batch(N,expIL,xy_arr,byref(self.terms),self.kmax,self.Nmax,sums,dSdxy,jac_xy)
+        derivs = np.real(dSdxy @ self._Omega_dXY_dQP.T)
+        jac_qp = self.Omega @ np.real(self.dXY_dQP @ jac_xy @ self.dXY_dQP.T)
+        return np.real(sums), derivs, jac_qp, jac_xy
 
     def PoincareParticlesEvaluate(self,pvars,indexIn,indexOut):
         ps = (pvars.particles[indexIn],pvars.particles[indexOut])
@@ -223,3 +461,124 @@ class DFTermSeries(object):
         lambdas = np.array([p.l for p in ps])
         H,vardot,jac_qp,jac_xy = self._evaluate_with_jacobian(lambdas,xy)
         return {'Hamiltonain':H,'derivatives':vardot,'Jacobian':jac_qp}
+
+class DFTermSeriesGroup(object):
+    """
+    A collection of :class:`DFTermSeries` objects, e.g., one for 
+    each pair of planets in a system, that are evaluated together,
+    each at its own point, with a single call to the C library.
+
+    Arguments
+    ---------
+    series_list : list
+        List of :class:`DFTermSeries` objects.
+    """
+    def __init__(self,series_list):
+        self.series_list = list(series_list)
+        self.Nseries = len(self.series_list)
+        # Copies of the series' term structures; the term arrays 
+        # are kept alive by the series in series_list.
+        self.terms = (SeriesTerms * max(self.Nseries,1))(*[s.terms for s in self.series_list])
+        self.kmax = max([s.kmax for s in self.series_list],default = 0)
+        self.Nmax = max([s.Nmax for s in self.series_list],default = 0)
+        self.workspace = SeriesWorkspace(self.kmax,self.Nmax)
+        self.dXY_dQP = np.array([s.dXY_dQP for s in self.series_list]).reshape(-1,8,8)
+        self.dXY_dQP_T = np.ascontiguousarray(np.transpose(self.dXY_dQP,(0,2,1)))
+        self._Omega_dXY_dQP_T = np.ascontiguousarray(
+                np.transpose([s._Omega_dXY_dQP for s in self.series_list],(0,2,1))
+        ).reshape(-1,8,8)
+        Zeros = np.zeros((4,4))
+        Id = np.eye(4)
+        self.Omega = np.block([[Zeros,Id],[-Id,Zeros]])
+        self.expIL = np.zeros((self.Nseries,2),dtype=np.complex128)
+        self.sums = np.zeros(self.Nseries,dtype=np.complex128)
+        self.derivs = np.zeros((self.Nseries,8),dtype=np.complex128)
+        self.jacobians = np.zeros((self.Nseries,8,8),dtype=np.complex128)
+
+    def _inputs(self,lambda_arr,xy_arr):
+        np.exp(1j * np.asarray(lambda_arr),out = self.expIL)
+        xy_arr = np.ascontiguousarray(xy_arr,dtype=np.complex128)
+        assert xy_arr.shape == (self.Nseries,4), "xy_arr must have shape (Nseries,4)"
+        return xy_arr
+
+    def evaluate(self,lambda_arr,xy_arr):
+        """
+        Evaluate each series.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (Nseries,2)
+            Mean longitudes of the inner and outer planet for each series.
+        xy_arr : ndarray, shape (Nseries,4)
+            Complex variables X,X',Y,Y' for each series.
+
+        Returns
+        -------
+        H : ndarray, shape (Nseries,)
+            Values of the series.
+        """
+        xy_arr = self._inputs(lambda_arr,xy_arr)
+        _evaluate_multi_series_ws(
+                self.workspace._ptr,self.Nseries,self.expIL,xy_arr,
+                addressof(self.terms),self.sums
+        )
+        return self.sums.real.copy()
+
+    def evaluate_with_derivs(self,lambda_arr,xy_arr):
+        """
+        Evaluate each series and the derivatives of the canonical
+        variables eta,eta',rho,rho',kappa,kappa',sigma,sigma'.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (Nseries,2)
+            Mean longitudes of the inner and outer planet for each series.
+        xy_arr : ndarray, shape (Nseries,4)
+            Complex variables X,X',Y,Y' for each series.
+
+        Returns
+        -------
+        H : ndarray, shape (Nseries,)
+            Values of the series.
+        derivs : ndarray, shape (Nseries,8)
+            Time derivatives of canonical variables.
+        """
+        xy_arr = self._inputs(lambda_arr,xy_arr)
+        _evaluate_multi_series_and_derivs_ws(
+                self.workspace._ptr,self.Nseries,self.expIL,xy_arr,
+                addressof(self.terms),self.sums,self.derivs
+        )
+        derivs = np.real(np.matmul(self.derivs[:,None,:],self._Omega_dXY_dQP_T)[:,0])
+        return self.sums.real.copy(),derivs
+
+    def evaluate_with_jacobian(self,lambda_arr,xy_arr):
+        """
+        Evaluate each series, the derivatives of the canonical 
+        variables eta,eta',rho,rho',kappa,kappa',sigma,sigma',
+        and the Jacobian of the derivatives.
+
+        Arguments
+        ---------
+        lambda_arr : ndarray, shape (Nseries,2)
+            Mean longitudes of the inner and outer planet for each series.
+        xy_arr : ndarray, shape (Nseries,4)
+            Complex variables X,X',Y,Y' for each series.
+
+        Returns
+        -------
+        H : ndarray, shape (Nseries,)
+            Values of the series.
+        derivs : ndarray, shape (Nseries,8)
+            Time derivatives of canonical variables.
+        jac_qp : ndarray, shape (Nseries,8,8)
+            Jacobians of the derivatives with respect to the 
+            canonical variables.
+        """
+        xy_arr = self._inputs(lambda_arr,xy_arr)
+        _evaluate_multi_series_and_jacobian_ws(
+                self.workspace._ptr,self.Nseries,self.expIL,xy_arr,
+                addressof(self.terms),self.sums,self.derivs,self.jacobians
+        )
+        derivs = np.real(np.matmul(self.derivs[:,None,:],self._Omega_dXY_dQP_T)[:,0])
+        jac_qp = self.Omega @ np.real(self.dXY_dQP @ self.jacobians @ self.dXY_dQP_T)
+        return self.sums.real.copy(), derivs, jac_qp
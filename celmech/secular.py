@@ -1,9 +1,11 @@
 import numpy as np
 import warnings
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from . import Poincare
 from sympy import symbols, S, binomial, summation, sqrt, cos, sin, atan2, expand_trig,diff,Matrix
 from .disturbing_function import DFCoeff_C,eval_DFCoeff_dict,get_DFCoeff_symbol
-from scipy.linalg import expm
+from collections import OrderedDict
 from .poincare import single_true
 
 _rt2 = np.sqrt(2)
@@ -386,8 +388,274 @@ class LaplaceLagrangeSystem(Poincare):
         self.ecc_entries[(indexOut,indexIn)] += InOut
         self.ecc_entries[(indexOut,indexOut)] += OutOut
         
+class LaplaceLagrangeEnsemble():
+    r"""
+    A class for computing the Laplace-Lagrange secular solutions
+    of many planetary systems with the same number of planets at once.
+
+    The eccentricity and inclination matrices of all systems are
+    built from vectorized evaluations of Laplace coefficients and
+    are diagonalized with a single batched call to 
+    :func:`numpy.linalg.eigh`. Matrices are identical to the 
+    numerical matrices of :class:`LaplaceLagrangeSystem`.
+
+    Arguments
+    ---------
+    masses : array-like
+        Planet masses, of shape (M,N) for M systems of N planets.
+    semimajor_axes : array-like
+        Planet semi-major axes, of shape (M,N). Planets in each
+        system must be in order of increasing semi-major axis.
+    eccentricities : array-like, optional
+        Planet eccentricities. Default is 0.
+    inclinations : array-like, optional
+        Planet inclinations. Default is 0.
+    pomegas : array-like, optional
+        Planet longitudes of pericenter. Default is 0.
+    Omegas : array-like, optional
+        Planet longitudes of ascending node. Default is 0.
+    Mstar : float or array-like, optional
+        Stellar mass of each system. Default is 1.
+    G : float, optional
+        Gravitational constant. Default is 1.
+
+    Elements may be given as any arrays that can be broadcast
+    to shape (M,N).
+
+    Attributes
+    ----------
+    Neccentricity_matrix : ndarray
+        Array of shape (M,N,N) containing each system's 
+        eccentricity matrix :math:`\pmb{S}_e`.
+    Ninclination_matrix : ndarray
+        Array of shape (M,N,N) containing each system's 
+        inclination matrix :math:`\pmb{S}_I`.
+    """
+    def __init__(self, masses, semimajor_axes, eccentricities = 0, inclinations = 0, pomegas = 0, Omegas = 0, Mstar = 1., G = 1.):
+        m = np.atleast_2d(np.asarray(masses,dtype = np.float64))
+        a = np.atleast_2d(np.asarray(semimajor_axes,dtype = np.float64))
+        m,a,e,inc,pomega,Omega = np.broadcast_arrays(m,a,eccentricities,inclinations,pomegas,Omegas)
+        self.Nsystems,self.Nplanets = m.shape
+        assert np.all(np.diff(a,axis = 1) > 0), "Particles must be in order by increasing semi-major axis!"
+        assert np.all((e >= 0) & (e < 1)), "Eccentricities must be in the range [0,1)."
+        Mstar = np.broadcast_to(np.asarray(Mstar,dtype = np.float64).reshape(-1,1),m.shape)
+        self.G = G
+        self.m = m
+        self.Mstar = Mstar
+        self.a = a
+        # Same conventions as celmech.poincare.PoincareParticle
+        M = Mstar + m
+        self.mu = m * M / (M + m)
+        sLambda = np.sqrt(G * M * a)
+        sGamma = sLambda * (1 - np.sqrt(1 - e**2))
+        sQ = sLambda * np.sqrt(1 - e**2) * (1 - np.cos(inc))
+        rtmu = np.sqrt(self.mu)
+        self.Lambda = self.mu * sLambda
+        self.kappa0_vec = rtmu * np.sqrt(2 * sGamma) * np.cos(pomega)
+        self.eta0_vec = -rtmu * np.sqrt(2 * sGamma) * np.sin(pomega)
+        self.sigma0_vec = rtmu * np.sqrt(2 * sQ) * np.cos(Omega)
+        self.rho0_vec = -rtmu * np.sqrt(2 * sQ) * np.sin(Omega)
+        self.tol = np.min(m,axis = 1) * np.finfo(np.float64).eps
+        self._update()
+
+    @classmethod
+    def from_Poincare_list(cls,pvars_list):
+        """
+        Initialize an ensemble from a list of 
+        :class:`celmech.poincare.Poincare` objects that 
+        all contain the same number of planets.
+
+        Arguments
+        ---------
+        pvars_list : list
+            List of Poincare objects.
+
+        Returns
+        -------
+        ensemble : :class:`celmech.secular.LaplaceLagrangeEnsemble`
+        """
+        G = pvars_list[0].G
+        assert all(pvars.G == G for pvars in pvars_list), "All systems must use the same value of G."
+        get = lambda attr: np.array([[getattr(p,attr) for p in pvars.particles[1:]] for pvars in pvars_list])
+        return cls(
+                get('m'),
+                get('a'),
+                get('e'),
+                get('inc'),
+                get('pomega'),
+                get('Omega'),
+                Mstar = get('Mstar')[:,0],
+                G = G
+        )
+
+    def _update(self):
+        ecc_diag_coeff = DFCoeff_C(*[0 for _ in range(6)],0,0,1,0)
+        inc_diag_coeff = DFCoeff_C(*[0 for _ in range(6)],1,0,0,0)
+        ecc_off_coeff = DFCoeff_C(0,0,1,-1,0,0,0,0,0,0)
+        inc_off_coeff = DFCoeff_C(0,0,0,0,1,-1,0,0,0,0)
+        N = self.Nplanets
+        iIn,iOut = np.triu_indices(N,1)
+        alpha = self.a[:,iIn] / self.a[:,iOut]
+        prefactor = -self.G * self.m[:,iIn] * self.m[:,iOut] / self.a[:,iOut]
+        LambdaIn = self.Lambda[:,iIn]
+        LambdaOut = self.Lambda[:,iOut]
+        sqrtLL = np.sqrt(LambdaIn * LambdaOut)
+        ecc_mtrx = np.zeros((self.Nsystems,N,N))
+        inc_mtrx = np.zeros((self.Nsystems,N,N))
+        ecc_off = prefactor * eval_DFCoeff_dict(ecc_off_coeff,alpha) / sqrtLL
+        inc_off = prefactor * eval_DFCoeff_dict(inc_off_coeff,alpha) / sqrtLL / 4
+        ecc_mtrx[:,iIn,iOut] = ecc_off
+        ecc_mtrx[:,iOut,iIn] = ecc_off
+        inc_mtrx[:,iIn,iOut] = inc_off
+        inc_mtrx[:,iOut,iIn] = inc_off
+        ecc_diag = 2 * prefactor * eval_DFCoeff_dict(ecc_diag_coeff,alpha)
+        inc_diag = 2 * prefactor * eval_DFCoeff_dict(inc_diag_coeff,alpha) / 4
+        for k,(i,j) in enumerate(zip(iIn,iOut)):
+            ecc_mtrx[:,i,i] += ecc_diag[:,k] / LambdaIn[:,k]
+            ecc_mtrx[:,j,j] += ecc_diag[:,k] / LambdaOut[:,k]
+            inc_mtrx[:,i,i] += inc_diag[:,k] / LambdaIn[:,k]
+            inc_mtrx[:,j,j] += inc_diag[:,k] / LambdaOut[:,k]
+        self.Neccentricity_matrix = ecc_mtrx
+        self.Ninclination_matrix = inc_mtrx
+        self._ecc_eigvals,self._ecc_eigvecs = np.linalg.eigh(ecc_mtrx)
+        inc_eigvals,self._inc_eigvecs = np.linalg.eigh(inc_mtrx)
+        self._inc_eigvals = self._chop(inc_eigvals)
+
+    def _chop(self,arr):
+        arr[np.abs(arr) < self.tol[:,None]] = 0
+        return arr
+
+    def eccentricity_eigenvalues(self):
+        """
+        Returns
+        -------
+        ndarray
+            Array of shape (M,N) containing the eccentricity mode 
+            eigenvalues of each system.
+        """
+        return self._ecc_eigvals.copy()
+
+    def inclination_eigenvalues(self):
+        """
+        Returns
+        -------
+        ndarray
+            Array of shape (M,N) containing the inclination mode 
+            eigenvalues of each system.
+        """
+        return self._inc_eigvals.copy()
+
+    @property
+    def Tsec(self):
+        """
+        Array of the secular timescales of each system, defined 
+        as in :class:`LaplaceLagrangeSystem`.
+        """
+        Omega_e = np.max(np.abs(self._ecc_eigvals),axis = 1)
+        Omega_i = np.max(np.abs(self._inc_eigvals),axis = 1)
+        return 2 * np.pi / np.maximum(Omega_e,Omega_i)
+
+    def diagonalize_eccentricity(self):
+        """
+        Get the matrices that diagonalize each system's eccentricity 
+        matrix. See :meth:`LaplaceLagrangeSystem.diagonalize_eccentricity`.
+
+        Returns
+        -------
+        (T , D) : tuple of ndarrays
+            Arrays of shape (M,N,N) containing the orthogonal matrices
+            T and the diagonal matrices D of each system.
+        """
+        vals = self._ecc_eigvals
+        return self._ecc_eigvecs.copy(), vals[...,None] * np.eye(self.Nplanets)
+
+    def diagonalize_inclination(self):
+        """
+        Get the matrices that diagonalize each system's inclination 
+        matrix. See :meth:`LaplaceLagrangeSystem.diagonalize_inclination`.
+
+        Returns
+        -------
+        (U , D) : tuple of ndarrays
+            Arrays of shape (M,N,N) containing the orthogonal matrices
+            U and the diagonal matrices D of each system.
+        """
+        vals = self._inc_eigvals
+        return self._inc_eigvecs.copy(), vals[...,None] * np.eye(self.Nplanets)
+
+    def _mode_solution(self,T,freqs,p0,q0,t1):
+        # Rotate initial values into modes and advance each mode
+        P0 = np.einsum('mji,mj->mi',T,p0)[...,None]
+        Q0 = np.einsum('mji,mj->mi',T,q0)[...,None]
+        phase = freqs[...,None] * t1
+        cos_vals = np.cos(phase)
+        sin_vals = np.sin(phase)
+        Q = Q0 * cos_vals - P0 * sin_vals
+        P = Q0 * sin_vals + P0 * cos_vals
+        return P, Q, T @ P, T @ Q
+
+    def secular_solution(self,times,epoch = 0):
+        """
+        Get the solution of the Laplace-Lagrange secular equations
+        of motion of every system at the user-specified times.
+
+        Arguments
+        ---------
+        times : ndarray
+            Array of times at which to evaluate 
+            the solution to the equations of motion.
+        epoch : float, optional
+            Current time of system states. Default is 
+            t=0.
+
+        Returns
+        -------
+        soln : dict
+            Dictionary with the same entries as the solution 
+            returned by :meth:`LaplaceLagrangeSystem.secular_solution`.
+            Entries other than 'time' are arrays of shape 
+            (M,N,Ntimes).
+        """
+        times = np.asarray(times,dtype = np.float64)
+        t1 = times - epoch
+        rtLambda = np.sqrt(self.Lambda)[...,None]
+        H,K,eta,kappa = self._mode_solution(self._ecc_eigvecs,self._ecc_eigvals,self.eta0_vec,self.kappa0_vec,t1)
+        R,S,rho,sigma = self._mode_solution(self._inc_eigvecs,self._inc_eigvals,self.rho0_vec,self.sigma0_vec,t1)
+        Xre = kappa / rtLambda
+        Xim = -eta / rtLambda
+        Xsq = Xre**2 + Xim**2
+        Xtoz = np.sqrt(1 - 0.25 * Xsq)
+        zre = Xre * Xtoz
+        zim = Xim * Xtoz
+        Ytozeta = 1 / np.sqrt(1 - 0.5 * Xsq)
+        zeta_re = 0.5 * sigma / rtLambda * Ytozeta
+        zeta_im = -0.5 * rho / rtLambda * Ytozeta
+        zeta = zeta_re + 1j * zeta_im
+        return {
+                "time":times,
+                "H":H,
+                "K":K,
+                "eta":eta,
+                "kappa":kappa,
+                "k":zre,
+                "h":zim,
+                "z":zre + 1j * zim,
+                "e":np.sqrt(zre*zre + zim*zim),
+                "pomega":np.arctan2(zim,zre),
+                "rho":rho,
+                "sigma":sigma,
+                "R":R,
+                "S":S,
+                "p":zeta_im,
+                "q":zeta_re,
+                "zeta":zeta,
+                "inc":2 * np.arcsin(np.abs(zeta)),
+                "Omega":np.angle(zeta)
+        }
+
 from .symplectic_evolution_operators import EvolutionOperator
 from .symplectic_evolution_operators import SecularDFTermsEvolutionOperator as DFOp
+from .symplectic_evolution_operators import dense_rk_output
 class LinearSecularEvolutionOperator(EvolutionOperator):
     def __init__(self,initial_state,dt,first_order_resonances={}):
         super(LinearSecularEvolutionOperator,self).__init__(initial_state,dt)
@@ -397,8 +665,13 @@ class LinearSecularEvolutionOperator(EvolutionOperator):
                 LL_system.add_first_order_resonance_term(*pair,j)
         self.ecc_matrix = LL_system.Neccentricity_matrix
         self.inc_matrix = LL_system.Ninclination_matrix
-        self.ecc_operator_matrix = expm(-1j * self.dt * self.ecc_matrix)
-        self.inc_operator_matrix = expm(-1j * self.dt * self.inc_matrix)
+        # The matrices are real and symmetric so exponentials
+        # are formed from their eigendecompositions.
+        self._ecc_eigvals,self._ecc_eigvecs = np.linalg.eigh(self.ecc_matrix)
+        self._inc_eigvals,self._inc_eigvecs = np.linalg.eigh(self.inc_matrix)
+        self.operator_matrix_cache_size = 16
+        self._operator_matrix_cache = OrderedDict()
+        self.ecc_operator_matrix,self.inc_operator_matrix = self.operator_matrices(self.dt)
 
     @property
     def dt(self):
@@ -406,8 +679,44 @@ class LinearSecularEvolutionOperator(EvolutionOperator):
     @dt.setter
     def dt(self,val):
         self._dt = val
-        self.ecc_operator_matrix = expm(-1j * self.dt * self.ecc_matrix)
-        self.inc_operator_matrix = expm(-1j * self.dt * self.inc_matrix)
+        self.ecc_operator_matrix,self.inc_operator_matrix = self.operator_matrices(self.dt)
+
+    def operator_matrices(self,dt):
+        """
+        Get the matrices exp(-i*dt*S_e) and exp(-i*dt*S_I) that 
+        advance the eccentricity and inclination variables x and y
+        by a time dt. 
+        
+        Matrices are computed from the eigendecompositions of
+        the eccentricity and inclination matrices. The most recently 
+        used matrices are cached so that repeated requests for the 
+        same time steps, e.g., by symplectic correctors, 
+        do not require recomputing them.
+
+        Arguments
+        ---------
+        dt : float
+            Time step.
+
+        Returns
+        -------
+        ecc_operator_matrix : ndarray
+        inc_operator_matrix : ndarray
+        """
+        cache = self._operator_matrix_cache
+        try:
+            matrices = cache[dt]
+            cache.move_to_end(dt)
+        except KeyError:
+            U = self._ecc_eigvecs
+            ecc_operator_matrix = (U * np.exp(-1j * dt * self._ecc_eigvals)) @ U.T
+            U = self._inc_eigvecs
+            inc_operator_matrix = (U * np.exp(-1j * dt * self._inc_eigvals)) @ U.T
+            matrices = (ecc_operator_matrix,inc_operator_matrix)
+            cache[dt] = matrices
+            if len(cache) > self.operator_matrix_cache_size:
+                cache.popitem(last = False)
+        return matrices
 
     def _get_x_vector(self):
         eta = np.array([p.eta for p in self.particles[1:]])
@@ -523,9 +832,12 @@ class SecularSystemSimulation():
 
                 - :code:`rk_root_method`: Method to use for root-finding during implicit RK step. Available options are:
                     - 'Newton'
+                    - 'simplified-Newton'
                     - 'fixed_point'
                     'Newton' (default) uses Newton's method whereas 'fixed_point' uses a fixed point iteration method. 
                     Newton's method requires computing the Jacobian of the equations of motion but has quadratic convergence.
+                    'simplified-Newton' reuses a single LU factorization of the Newton matrix across iterations and time steps,
+                    re-evaluating the Jacobian only when iterations converge slowly.
         Returns
         -------
         simulation : :class:`celmech.secular.SecularSystemSimulation`
@@ -560,11 +872,9 @@ class SecularSystemSimulation():
                 **DFOp_kwargs
         )
         self.state = state
-        self._half_step_forward_e_matrix = expm(-1j * 0.5 * self.dt * self.linearSecOp.ecc_matrix)
-        self._half_step_backward_e_matrix = expm(+1j * 0.5 * self.dt * self.linearSecOp.ecc_matrix)
-        self._half_step_forward_inc_matrix = expm(-1j * 0.5 * self.dt * self.linearSecOp.inc_matrix)
-        self._half_step_backward_inc_matrix = expm(+1j * 0.5 * self.dt * self.linearSecOp.inc_matrix)
+        self._set_half_step_matrices()
         self.t = 0
+        self._tangent_vec = None
 
     @classmethod
     def from_Simulation(cls,sim, dt = None, dtFraction = None, max_order = 4,NsubB=1,resonances_to_include={}, DFOp_kwargs = {}):
@@ -626,9 +936,12 @@ class SecularSystemSimulation():
 
                 - :code:`rk_root_method`: Method to use for root-finding during implicit RK step. Available options are:
                     - 'Newton'
+                    - 'simplified-Newton'
                     - 'fixed_point'
                 'Newton' (default) uses Newton's method whereas 'fixed_point' uses a fixed point iteration method. 
                 Newton's method requires computing the Jacobian of the equations of motion but has quadratic convergence.
+                'simplified-Newton' reuses a single LU factorization of the Newton matrix across iterations and time steps,
+                re-evaluating the Jacobian only when iterations converge slowly.
         
         Returns
         -------
@@ -669,10 +982,12 @@ class SecularSystemSimulation():
         self._dtB = self._dtA / self._NsubB
         self.linearSecOp.dt = self._dtA
         self.nonlinearSecOp.dt = self._dtB
-        self._half_step_forward_e_matrix = expm(-1j * 0.5 * value * self.linearSecOp.ecc_matrix)
-        self._half_step_backward_e_matrix = expm(+1j * 0.5 * value * self.linearSecOp.ecc_matrix)
-        self._half_step_forward_inc_matrix = expm(-1j * 0.5 * value * self.linearSecOp.inc_matrix)
-        self._half_step_backward_inc_matrix = expm(+1j * 0.5 * value *  self.linearSecOp.inc_matrix)
+        self._set_half_step_matrices()
+
+    def _set_half_step_matrices(self):
+        linOp = self.linearSecOp
+        self._half_step_forward_e_matrix,self._half_step_forward_inc_matrix = linOp.operator_matrices(0.5 * self.dt)
+        self._half_step_backward_e_matrix,self._half_step_backward_inc_matrix = linOp.operator_matrices(-0.5 * self.dt)
 
     def _linearOp_half_step_forward(self,state_vec):
         """
@@ -711,68 +1026,328 @@ class SecularSystemSimulation():
         for vals,p in zip(vecs,self.state.particles[1:]):
             p.kappa,p.eta,p.Lambda,p.l,p.sigma,p.rho = vals
 
-    def integrate(self,time,exact_finish_time = False, corrector=False):
+    def init_megno(self,tangent_vector = None):
+        """
+        Start integrating a tangent vector alongside the system's 
+        state in order to compute the MEGNO chaos indicator and 
+        the maximum Lyapunov exponent. 
+
+        The tangent vector is propagated with the derivatives of the 
+        linear and non-linear evolution operators and renormalized 
+        after every time step. Indicators are accumulated from the 
+        current simulation time.
+
+        Arguments
+        ---------
+        tangent_vector : ndarray, optional
+            Initial tangent vector, given in the same format as the 
+            system's state vector. Components corresponding to the 
+            variables Lambda and l are ignored. By default, a 
+            random tangent vector is used.
+        """
+        Nplanet = self.state.N - 1
+        if tangent_vector is None:
+            tangent_vector = np.random.normal(size = 6 * Nplanet)
+        tangent_vector = np.array(tangent_vector,dtype = float).reshape(Nplanet,6)
+        tangent_vector[:,2:4] = 0
+        norm = np.linalg.norm(tangent_vector)
+        if norm == 0:
+            raise ValueError("Tangent vector must have non-zero components in the variables kappa, eta, sigma, or rho.")
+        self._tangent_vec = tangent_vector.reshape(-1) / norm
+        self._megno_t0 = self.t
+        self._megno_t = self.t
+        self._megno_lnsum = 0.
+        self._megno_weighted_lnsum = 0.
+        self._megno_Y = 0.
+        self._megno_Yint = 0.
+
+    def megno(self):
+        """
+        Get the mean exponential growth factor of nearby orbits 
+        (MEGNO) accumulated since :meth:`init_megno` was called.
+        The MEGNO tends to 2 for quasi-periodic orbits and grows 
+        linearly in time for chaotic orbits.
+
+        Returns
+        -------
+        float
+        """
+        if self._tangent_vec is None:
+            raise AttributeError("MEGNO has not been initialized. Call 'init_megno' first.")
+        T = self._megno_t - self._megno_t0
+        return self._megno_Yint / T if T > 0 else 0.
+
+    def lyapunov(self):
+        """
+        Get the estimate of the maximum Lyapunov exponent 
+        accumulated since :meth:`init_megno` was called.
+
+        Returns
+        -------
+        float
+        """
+        if self._tangent_vec is None:
+            raise AttributeError("MEGNO has not been initialized. Call 'init_megno' first.")
+        T = self._megno_t - self._megno_t0
+        return self._megno_lnsum / T if T > 0 else 0.
+
+    def _update_megno(self,tangent_vec,t,dt):
+        """
+        Accumulate the growth of a tangent vector, normalized to 
+        unit length at time t, over a time step dt. Returns the 
+        renormalized tangent vector.
+        """
+        norm = np.linalg.norm(tangent_vec)
+        ln_growth = np.log(norm)
+        t0 = self._megno_t0
+        self._megno_lnsum += ln_growth
+        self._megno_weighted_lnsum += ln_growth * (t + 0.5 * dt - t0)
+        Y = 2 * self._megno_weighted_lnsum / (t + dt - t0)
+        self._megno_Yint += 0.5 * (self._megno_Y + Y) * dt
+        self._megno_Y = Y
+        self._megno_t = t + dt
+        return tangent_vec / norm
+
+    def integrate(self,time,exact_finish_time = False, corrector=False, out = None):
         """
         Advance simulation by integrating to specified time.
 
         Arguments
         ---------
-        time : float
-            Time to integrate to
+        time : float or array-like
+            Time to integrate to. If an array of times is given, the
+            state of the system is recorded at each time without
+            updating the :code:`state` attribute between outputs.
         exact_finish_time : bool, optional
-            **NOT CURRENTLY IMPLEMENTED**
             If :code:`True`, system will be advanced to user-specified time exactly.
-            This is done by applying symplectic correctors to reach times
-            in between fixed multiples of the integrator's time step.
+            This is done by integrating the system by a fixed number of 
+            time steps to the last time before the user-specified `time` 
+            argument and then applying a single, fractional time step.
             If :code:`False`, system will advance by a fixed number of time steps
             to the first time after the user-specified `time` argument.
             Default is :code:`False`.
         corrector: bool, optional
             If :code:`True`, symplectic correctors are applied at the beginning
             and end of integration. Default is :code:`False`.
+        out : ndarray, optional
+            Array of shape (Ntimes, 6 * Nplanet) in which to store
+            the system's state vectors when an array of times is given.
 
         Returns
         -------
-        None
+        None or dict
+            If an array of times is given, returns a dictionary with 
+            entries 'time', containing the times reached by the 
+            integration, and 'state', containing the state vectors
+            at those times.
         """
-        assert time >= self.t, "Backward integration is currently not implemented."
-        Nstep = int( np.ceil( (time-self.t) / self.dt) )
+        if np.ndim(time) == 0:
+            for _ in self.iter_integrate([time],exact_finish_time,corrector):
+                pass
+            return None
+        times = np.asarray(time,dtype = float)
+        if out is None:
+            out = np.zeros((times.shape[0],6 * (self.state.N - 1)))
+        times_done = np.zeros(times.shape[0])
+        for i,(t,state_vec) in enumerate(self.iter_integrate(times,exact_finish_time,corrector)):
+            times_done[i] = t
+            out[i] = state_vec
+        return {'time':times_done,'state':out}
+
+    def iter_integrate(self,times,exact_finish_time = False, corrector=False):
+        """
+        Integrate the system and yield its state at a sequence of times.
+
+        The state vector is kept internally between outputs. The 
+        :code:`state` attribute and simulation time are updated only 
+        once iteration ends, to the last state that was yielded.
+
+        Arguments
+        ---------
+        times : array-like
+            Increasing sequence of output times.
+        exact_finish_time : bool, optional
+            See :meth:`integrate`. Fractional steps are only used to 
+            compute outputs and do not alter the fixed-step trajectory 
+            from which subsequent outputs are computed.
+        corrector: bool, optional
+            If :code:`True`, symplectic correctors are applied when the 
+            integration starts and to every output.
+
+        If :meth:`init_megno` has been called, the tangent vector is 
+        propagated with the state, including fractional steps and 
+        correctors, and the MEGNO and Lyapunov exponent are advanced 
+        to the time of the last output.
+
+        Yields
+        ------
+        time : float
+            Time reached by the integration.
+        state_vec : ndarray
+            The state vector of the system at that time.
+        """
+        times = np.atleast_1d(np.asarray(times,dtype = float))
+        if times.size == 0:
+            return
+        assert times[0] >= self.t, "Backward integration is currently not implemented."
+        assert np.all(np.diff(times) >= 0), "Output times must be increasing."
+        dt = self.dt
+        t0 = self.t
         state_vec = self.state_vector
+        tangent_vec = self._tangent_vec
+        if tangent_vec is not None:
+            tangent_vec = tangent_vec.copy()
         if corrector is True:
-            state_vec = self.corrector3(state_vec, self.dt)
+            state_vec,tangent_vec = self._apply_steps(state_vec,self._corrector3_steps(dt),tangent_vec)
         state_vec = self._linearOp_half_step_forward(state_vec)
-        for _ in xrange(Nstep):
+        if tangent_vec is not None:
+            tangent_vec = self._linearOp_half_step_forward(tangent_vec)
+        Nstep_done = 0
+        last_output = None
+        last_step = None
+        try:
+            for time in times:
+                if exact_finish_time:
+                    Nstep = int( np.floor( (time-t0) / dt) )
+                else:
+                    Nstep = int( np.ceil( (time-t0) / dt) )
+                for n in range(Nstep_done,Nstep):
+                    if tangent_vec is None:
+                        # B step
+                        state_vec = self._Bstep(state_vec)
+                    
+                        # A step
+                        state_vec = self.linearSecOp.apply_to_state_vector(state_vec)
+                    else:
+                        state_vec,tangent_vec = self._Bstep_with_tangent(state_vec,tangent_vec)
+                        state_vec = self.linearSecOp.apply_to_state_vector(state_vec)
+                        tangent_vec = self.linearSecOp.apply_to_state_vector(tangent_vec)
+                        tangent_vec = self._update_megno(tangent_vec, t0 + n * dt, dt)
+
+                Nstep_done = max(Nstep,Nstep_done)
+                t_step = t0 + Nstep_done * dt
+                t_out = t_step
+                if exact_finish_time and time > t_out:
+                    output_vec = self._fractional_step(state_vec.copy(), time - t_out)
+                    t_out = time
+                else:
+                    output_vec = self._linearOp_half_step_backward(state_vec.copy())
+                if corrector is True:
+                    output_vec = self.corrector3inv(output_vec, dt)
+                if tangent_vec is not None:
+                    last_step = (state_vec.copy(),tangent_vec.copy(),t_step)
+                last_output = (t_out, output_vec)
+                yield last_output
+        finally:
+            if last_output is not None:
+                self.t,output_vec = last_output
+                self.update_state_from_vector(output_vec)
+            if last_step is not None:
+                self._tangent_vec = self._output_tangent(*last_step,self.t,corrector)
+
+    def _output_tangent(self,state_vec,tangent_vec,t_step,t_out,corrector):
+        """
+        Map the internal tangent vector at the time step ending 
+        at t_step to the tangent vector of the output state at time 
+        t_out, applying the fractional step and the inverse corrector
+        in the same way as they are applied to the state vector.
+        The MEGNO and Lyapunov exponent are advanced to t_out.
+        """
+        if t_out > t_step:
+            tau = t_out - t_step
+            state_vec,tangent_vec = self._apply_steps(state_vec,self._fractional_steps(tau),tangent_vec)
+            tangent_vec = self._update_megno(tangent_vec, t_step, tau)
+        else:
+            state_vec = self._linearOp_half_step_backward(state_vec)
+            tangent_vec = self._linearOp_half_step_backward(tangent_vec)
+        if corrector is True:
+            state_vec,tangent_vec = self._apply_steps(state_vec,self._corrector3_steps(self.dt,inverse = True),tangent_vec)
+        return tangent_vec
 
-            # B step
-            state_vec = self._Bstep(state_vec)
-            
-            # A step
-            state_vec = self.linearSecOp.apply_to_state_vector(state_vec)
+    def _fractional_step(self,state_vec,tau):
+        """
+        Advance a state vector by a fraction of a time step.
 
-        if exact_finish_time:
-           warnings.warn("Exact finish time is not currently implemented.")
-        state_vec = self._linearOp_half_step_backward(state_vec)
-        if corrector is True:
-            state_vec = self.corrector3inv(state_vec, self.dt)
-        self.update_state_from_vector(state_vec)
-        self.t += Nstep * self.dt
+        The input state vector is the integrator's internal state, 
+        which leads the physical state by half an A step. The 
+        fractional step applies the same second-order splitting as 
+        a full step, A(tau/2) B(tau) A(tau/2), with the first A 
+        step combined with the backward half step of the full-step 
+        trajectory.
+
+        Arguments
+        ---------
+        state_vec : ndarray
+          Internal state vector at a multiple of the time step.
+        tau : float
+          Size of the fractional step, 0 < tau < dt.
+
+        Returns
+        -------
+        state_vec : ndarray
+          State vector of the system a time tau after the 
+          multiple of the time step.
+        """
+        return self._apply_steps(state_vec,self._fractional_steps(tau))[0]
+
+    def _fractional_steps(self,tau):
+        # Sequence of operators applied by a fractional step
+        return [('A',0.5 * (tau - self.dt)),('B',tau),('A',0.5 * tau)]
+
+    def _apply_steps(self,state_vec,steps,tangent_vec = None):
+        """
+        Apply a sequence of linear ('A') and non-linear ('B') 
+        evolution operators to a state vector and, optionally,
+        the derivatives of the operators to a tangent vector.
+
+        Arguments
+        ---------
+        state_vec : ndarray
+          State vector of planetary system.
+        steps : list
+          List of tuples ('A', dt) or ('B', dt).
+        tangent_vec : ndarray or None, optional
+          Tangent vector to propagate along with the state vector.
+
+        Returns
+        -------
+        state_vec : ndarray
+          Updated state vector.
+        tangent_vec : ndarray or None
+          Updated tangent vector.
+        """
+        for op,dt in steps:
+            if op == 'A':
+                state_vec = self._apply_A_step_for_dt(state_vec,dt)
+                if tangent_vec is not None:
+                    tangent_vec = self._apply_A_step_for_dt(tangent_vec,dt)
+            elif tangent_vec is None:
+                state_vec = self._apply_B_step_for_dt(state_vec,dt)
+            else:
+                self.nonlinearSecOp.dt = dt / self._NsubB
+                try:
+                    state_vec,tangent_vec = self._Bstep_with_tangent(state_vec,tangent_vec)
+                finally:
+                    self.nonlinearSecOp.dt = self._dtB
+        return state_vec,tangent_vec
 
     def _Bstep(self,state_vec):
         nlOp = self.nonlinearSecOp
         qp = nlOp.state_vec_to_qp_vec(state_vec)
         for _ in xrange(self.NsubB):
             qp = nlOp.rk_step(qp)
-        for i in xrange(nlOp.Npl):
-            # eta
-            state_vec[6*i+1] = qp[i]
-            # kappa
-            state_vec[6*i] = qp[i + 2 * nlOp.Npl]
-            # rho
-            state_vec[6*i+5] = qp[i + nlOp.Npl]
-            # sigma
-            state_vec[6*i+4] = qp[i + 3 * nlOp.Npl]
+        return nlOp.qp_vec_to_state_vec(qp,state_vec)
+
+    def _Bstep_with_tangent(self,state_vec,tangent_vec):
+        nlOp = self.nonlinearSecOp
+        qp = nlOp.state_vec_to_qp_vec(state_vec)
+        dqp = nlOp.state_vec_to_qp_vec(tangent_vec)
+        for _ in range(self.NsubB):
+            qp,dqp = nlOp.rk_step_with_tangent(qp,dqp)
+        state_vec = nlOp.qp_vec_to_state_vec(qp,state_vec)
+        tangent_vec = nlOp.qp_vec_to_state_vec(dqp,tangent_vec)
+        return state_vec,tangent_vec
 
-        return state_vec
     def calculate_energy(self):
         """
         Calculate the value of the system's Hamiltonian (i.e., the energy)
@@ -791,40 +1366,30 @@ class SecularSystemSimulation():
         """
         return np.sum([p.Q + p.Gamma for p in self.state.particles[1:]])
 
-    def X(self, state_vec, a, b, h):
-        state_vec = self._apply_A_step_for_dt(state_vec,-a*h)
-        state_vec = self._apply_B_step_for_dt(state_vec,b*h)
-        state_vec = self._apply_A_step_for_dt(state_vec,a*h)
-        return state_vec
-
-    def Z(self, state_vec, a, b, h):
-        state_vec = self.X(state_vec, -a, -b, h)
-        state_vec = self.X(state_vec, a, b, h)
-        return state_vec
-
-    def corrector3(self, state_vec, h):
+    def _corrector3_steps(self, h, inverse = False):
+        # Sequence of operators applied by corrector3 or corrector3inv,
+        # where Z(a,b) = X(-a,-b) X(a,b) and X(a,b) = A(-a*h) B(b*h) A(a*h).
         alpha = (7./40.)**0.5
         beta = 1/48./alpha
         a1 = -alpha
         a2 = alpha
         b2 = beta/2.
         b1 = -beta/2.
-        
-        state_vec = self.Z(state_vec, a2, b2, h)
-        state_vec = self.Z(state_vec, a1, b1, h)
-        return state_vec
+        if inverse:
+            Zs = [(a1,-b1),(a2,-b2)]
+        else:
+            Zs = [(a2,b2),(a1,b1)]
+        steps = []
+        for a,b in Zs:
+            for sgn in (-1,1):
+                steps += [('A',-sgn * a * h),('B',sgn * b * h),('A',sgn * a * h)]
+        return steps
+
+    def corrector3(self, state_vec, h):
+        return self._apply_steps(state_vec,self._corrector3_steps(h))[0]
 
     def corrector3inv(self, state_vec, h):
-        alpha = (7./40.)**0.5
-        beta = 1/48./alpha
-        a1 = -alpha
-        a2 = alpha
-        b2 = beta/2.
-        b1 = -beta/2.
-        
-        state_vec = self.Z(state_vec, a1, -b1, h)
-        state_vec = self.Z(state_vec, a2, -b2, h)
-        return state_vec
+        return self._apply_steps(state_vec,self._corrector3_steps(h,inverse = True))[0]
 
     def _apply_A_step_for_dt(self,state_vec,dt):
         """
@@ -842,8 +1407,7 @@ class SecularSystemSimulation():
             state_vec : ndarray
               Updated state vector after application of operator.
         """
-        opMtrx_ecc = expm(-1j *  dt * self.linearSecOp.ecc_matrix)
-        opMtrx_inc = expm(-1j *  dt * self.linearSecOp.inc_matrix)
+        opMtrx_ecc,opMtrx_inc = self.linearSecOp.operator_matrices(dt)
 
         vecs = self.linearSecOp._state_vector_to_individual_vectors(state_vec)
         x = (vecs[:,0] - 1j * vecs[:,1]) * _rt2_inv
@@ -943,11 +1507,31 @@ class SecularSystemRKIntegrator():
     
             - :code:`rk_root_method`: Method to use for root-finding during implicit RK step. Available options are:
                 - 'Newton'
+                - 'simplified-Newton'
                 - 'fixed_point'
                 'Newton' (default) uses Newton's method whereas 'fixed_point' uses a fixed point iteration method. 
                 Newton's method requires computing the Jacobian of the equations of motion but has quadratic convergence.
+                'simplified-Newton' reuses a single LU factorization of the Newton matrix across iterations and time steps,
+                re-evaluating the Jacobian only when iterations converge slowly.
+
+    adaptive : bool, optional
+        If :code:`True`, the equations of motion are integrated with the
+        explicit embedded Runge-Kutta pair of Dormand and Prince and the 
+        time step is adjusted to keep the estimated local error within 
+        the tolerances set by :code:`error_rtol` and :code:`error_atol`.
+        The time step set by dt or dtFraction is used as the initial 
+        step and output at arbitrary times is obtained by dense 
+        output. The method is not symplectic so that quantities such 
+        as the energy will show a slow drift. Default is :code:`False`.
+    error_rtol : float, optional
+        Relative tolerance on the local error of adaptive steps,
+        measured with respect to the root-mean-square value of the 
+        canonical variables. Default is 1e-10.
+    error_atol : float, optional
+        Absolute tolerance on the local error of adaptive steps.
+        Default is 0.
     """
-    def __init__(self, state, dt = None, dtFraction = None, max_order = 4,NsubB=1, resonances_to_include={}, DFOp_kwargs = {}):
+    def __init__(self, state, dt = None, dtFraction = None, max_order = 4,NsubB=1, resonances_to_include={}, DFOp_kwargs = {}, adaptive = False, error_rtol = 1e-10, error_atol = 0.):
         assert max_order > 1, "'max_order' must be greater than or equal to 2."
         if not single_true([dt,dtFraction]):
             raise AttributeError("Can only pass one of dt or dtFraction")
@@ -977,9 +1561,17 @@ class SecularSystemRKIntegrator():
         )
         self.state = state
         self.t = 0
+        self.adaptive = adaptive
+        assert error_rtol >= 0 and error_atol >= 0 and (error_rtol > 0 or error_atol > 0), "Tolerances must be non-negative and at least one tolerance must be positive."
+        self.error_rtol = error_rtol
+        self.error_atol = error_atol
+        self.Nsteps_accepted = 0
+        self.Nsteps_rejected = 0
+        # Step size reached by the last adaptive integration
+        self._adaptive_dt = None
 
     @classmethod
-    def from_Simulation(cls,sim, dt = None, dtFraction = None, max_order = 4,NsubB=1,resonances_to_include={}, DFOp_kwargs = {}):
+    def from_Simulation(cls,sim, dt = None, dtFraction = None, max_order = 4,NsubB=1,resonances_to_include={}, DFOp_kwargs = {}, adaptive = False, error_rtol = 1e-10, error_atol = 0.):
         pvars = Poincare.from_Simulation(sim)
         return cls(
                 pvars,
@@ -987,7 +1579,10 @@ class SecularSystemRKIntegrator():
                 dt = dt,
                 dtFraction = dtFraction,
                 resonances_to_include=resonances_to_include,
-                DFOp_kwargs = DFOp_kwargs
+                DFOp_kwargs = DFOp_kwargs,
+                adaptive = adaptive,
+                error_rtol = error_rtol,
+                error_atol = error_atol
         )
 
     @property
@@ -1003,53 +1598,175 @@ class SecularSystemRKIntegrator():
     def dt(self,value):
         self._dt = value
         self.nonlinearSecOp.dt = self._dt
+        self._adaptive_dt = None
 
     def update_state_from_vector(self,state_vec):
         vecs =  np.reshape(state_vec,(-1,6))
         for vals,p in zip(vecs,self.state.particles[1:]):
             p.kappa,p.eta,p.Lambda,p.l,p.sigma,p.rho = vals
 
-    def integrate(self,time,exact_finish_time = False):
+    def integrate(self,time,exact_finish_time = False, out = None):
         """
         Advance simulation by integrating to specified time.
 
         Arguments
         ---------
-        time : float
-            Time to integrate to
+        time : float or array-like
+            Time to integrate to. If an array of times is given, the
+            state of the system is recorded at each time.
         exact_finish_time : bool, optional
-            **NOT CURRENTLY IMPLEMENTED**
-            If :code:`True`, system will be advanced to user-specified time exactly.
+            If :code:`True`, system will be advanced to user-specified time exactly
+            by taking a final, fractional time step.
             If :code:`False`, system will advance by a fixed number of time steps
             to the first time after the user-specified `time` argument.
-            Default is :code:`False`.
+            Default is :code:`False`. Adaptive integrations always
+            finish at the user-specified time.
+        out : ndarray, optional
+            Array of shape (Ntimes, 6 * Nplanet) in which to store
+            the system's state vectors when an array of times is given.
 
         Returns
         -------
-        None
+        None or dict
+            If an array of times is given, returns a dictionary with 
+            entries 'time', containing the times reached by the 
+            integration, and 'state', containing the state vectors
+            at those times.
         """
-        assert time >= self.t, "Backward integration is currently not implemented."
-        Nstep = int( np.ceil( (time-self.t) / self.dt) )
+        if np.ndim(time) == 0:
+            for _ in self.iter_integrate([time],exact_finish_time):
+                pass
+            return None
+        times = np.asarray(time,dtype = float)
+        if out is None:
+            out = np.zeros((times.shape[0],6 * (self.state.N - 1)))
+        times_done = np.zeros(times.shape[0])
+        for i,(t,state_vec) in enumerate(self.iter_integrate(times,exact_finish_time)):
+            times_done[i] = t
+            out[i] = state_vec
+        return {'time':times_done,'state':out}
+
+    def iter_integrate(self,times,exact_finish_time = False):
+        """
+        Integrate the system and yield its state at a sequence of times.
+
+        The :code:`state` attribute and simulation time are updated 
+        once iteration ends, to the last state that was yielded.
+
+        Arguments
+        ---------
+        times : array-like
+            Increasing sequence of output times.
+        exact_finish_time : bool, optional
+            See :meth:`integrate`.
+
+        Yields
+        ------
+        time : float
+            Time reached by the integration.
+        state_vec : ndarray
+            The state vector of the system at that time.
+        """
+        times = np.atleast_1d(np.asarray(times,dtype = float))
+        if times.size == 0:
+            return
+        assert times[0] >= self.t, "Backward integration is currently not implemented."
+        assert np.all(np.diff(times) >= 0), "Output times must be increasing."
         state_vec = self.state_vector
         nlOp = self.nonlinearSecOp
         qp = nlOp.state_vec_to_qp_vec(state_vec)
-        for _ in xrange(Nstep):
-            qp = nlOp.rk_step(qp)
+        if self.adaptive:
+            outputs = self._iter_adaptive(qp,times)
+        else:
+            outputs = self._iter_fixed_step(qp,times,exact_finish_time)
+        last_output = None
+        try:
+            for t,qp_out in outputs:
+                last_output = (t, nlOp.qp_vec_to_state_vec(qp_out,state_vec.copy()))
+                yield last_output
+        finally:
+            if last_output is not None:
+                self.t,state_vec = last_output
+                self.update_state_from_vector(state_vec)
+
+    def _iter_fixed_step(self,qp,times,exact_finish_time):
+        nlOp = self.nonlinearSecOp
+        dt = self.dt
+        t0 = self.t
+        Nstep_done = 0
+        for time in times:
+            if exact_finish_time:
+                Nstep = int( np.floor( (time-t0) / dt) )
+            else:
+                Nstep = int( np.ceil( (time-t0) / dt) )
+            for _ in range(Nstep - Nstep_done):
+                qp = nlOp.rk_step(qp)
+            Nstep_done = max(Nstep,Nstep_done)
+            t_out = t0 + Nstep_done * dt
+            qp_out = qp
+            if exact_finish_time and time > t_out:
+                nlOp.dt = time - t_out
+                qp_out = nlOp.rk_step(qp)
+                nlOp.dt = dt
+                t_out = time
+            yield t_out, qp_out
+
+    def _error_norm(self,error,y,ynew):
+        rms = lambda x: np.sqrt(np.mean(x * x))
+        scale = self.error_atol + self.error_rtol * max(rms(y),rms(ynew))
+        return rms(error) / scale
+
+    def _iter_adaptive(self,qp,times):
+        """
+        Generate outputs of an adaptive integration with the 
+        Dormand-Prince pair, using the standard step-size 
+        controller of Hairer, Norsett & Wanner (1993).
+        """
+        nlOp = self.nonlinearSecOp
+        safety, min_factor, max_factor = 0.9, 0.2, 10.
+        t = self.t
+        h = self.dt if self._adaptive_dt is None else self._adaptive_dt
+        t_end = times[-1]
+        qp_dot = nlOp.deriv_from_qp_vec(qp)
+        i_out = 0
+        try:
+            while i_out < times.size and times[i_out] <= t:
+                yield times[i_out], qp
+                i_out += 1
+            while i_out < times.size:
+                h_step = min(h,t_end - t)
+                if h_step <= 16 * np.finfo(float).eps * max(abs(t),abs(t_end)):
+                    raise RuntimeError("Adaptive step size underflow at t = {}".format(t))
+                qp_new, qp_dot_new, error, dense = nlOp.embedded_rk_step(qp,h_step,qp_dot)
+                err = self._error_norm(error,qp,qp_new)
+                if not np.isfinite(err):
+                    self.Nsteps_rejected += 1
+                    h = min_factor * h_step
+                    continue
+                factor = safety * err**(-0.2) if err > 0 else max_factor
+                if err > 1:
+                    self.Nsteps_rejected += 1
+                    h = h_step * max(min_factor,min(1.,factor))
+                    continue
+                self.Nsteps_accepted += 1
+                t_new = t_end if h_step == t_end - t else t + h_step
+                while i_out < times.size and times[i_out] <= t_new:
+                    if times[i_out] == t_new:
+                        yield t_new, qp_new
+                    else:
+                        theta = (times[i_out] - t) / h_step
+                        yield times[i_out], dense_rk_output(dense,theta)
+                    i_out += 1
+                if h_step == h:
+                    h = h_step * min(max_factor,factor)
+                else:
+                    h = max(h,h_step * min(max_factor,factor))
+                t, qp, qp_dot = t_new, qp_new, qp_dot_new
+        finally:
+            # The step size is kept for subsequent adaptive
+            # integrations without changing the fixed step 'dt'.
+            self._adaptive_dt = h
 
-        if exact_finish_time:
-           warnings.warn("Exact finish time is not currently implemented.")
-        for i in xrange(nlOp.Npl):
-            # eta
-            state_vec[6*i+1] = qp[i]
-            # kappa
-            state_vec[6*i] = qp[i + 2 * nlOp.Npl]
-            # rho
-            state_vec[6*i+5] = qp[i + nlOp.Npl]
-            # sigma
-            state_vec[6*i+4] = qp[i + 3 * nlOp.Npl]
-
-        self.update_state_from_vector(state_vec)
-        self.t += Nstep * self.dt
     def calculate_energy(self):
         sv = self.state_vector
         E = self.nonlinearSecOp.calculate_Hamiltonian(sv)
@@ -1057,3 +1774,230 @@ class SecularSystemRKIntegrator():
     def calculate_AMD(self):
         return np.sum([p.Q + p.Gamma for p in self.state.particles[1:]])
 
+
+def _integrate_ensemble_chunk(chunk,times,sim_kwargs,corrector):
+    """
+    Integrate a chunk of ensemble members. Called by worker processes
+    of :class:`SecularSystemEnsemble`.
+
+    Arguments
+    ---------
+    chunk : list
+        List of (index, :class:`celmech.poincare.Poincare`) pairs.
+    times : ndarray
+        Times at which to record each system's state.
+    sim_kwargs : dict
+        Keyword arguments passed to :class:`SecularSystemSimulation`.
+    corrector : bool
+        Whether to apply symplectic correctors.
+
+    Returns
+    -------
+    results : list
+        List of result dictionaries, one per system.
+    """
+    results = []
+    for index,state in chunk:
+        Nout = len(times)
+        result = {
+                'index':index,
+                'time':np.full(Nout,np.nan),
+                'state':np.full((Nout,6 * (state.N-1)),np.nan),
+                'error':None,
+                'warnings':[]
+        }
+        with warnings.catch_warnings(record=True) as caught:
+            try:
+                sec_sim = SecularSystemSimulation(state,**sim_kwargs)
+                outputs = sec_sim.iter_integrate(times,corrector=corrector)
+                for i,(time,state_vec) in enumerate(outputs):
+                    result['time'][i] = time
+                    result['state'][i] = state_vec
+            except Exception:
+                result['error'] = traceback.format_exc()
+        result['warnings'] = [str(w.message) for w in caught]
+        results.append(result)
+    return results
+
+class SecularSystemEnsemble():
+    """
+    A class for integrating an ensemble of planetary systems with
+    :class:`SecularSystemSimulation <celmech.secular.SecularSystemSimulation>`
+    using a pool of worker processes.
+
+    Each worker process builds a :class:`SecularSystemSimulation` for
+    every system it is handed. Worker processes are kept alive between 
+    calls to :meth:`integrate` and :meth:`iter_integrate` and store the
+    disturbing function coefficient tables they compute so that these are
+    only computed once per process rather than once per system.
+
+    Arguments
+    ---------
+    systems : list
+        List of :class:`celmech.poincare.Poincare` objects and/or 
+        :class:`rebound.Simulation` objects to integrate.
+    processes : int, optional
+        Number of worker processes. By default, the number of CPUs
+        is used. If :code:`processes=1`, systems are integrated 
+        serially in the current process.
+    dt, dtFraction, max_order, NsubB, resonances_to_include, DFOp_kwargs : optional
+        Arguments passed to :class:`SecularSystemSimulation` when 
+        initializing the simulation for each system. See
+        :meth:`SecularSystemSimulation.__init__` for details.
+    """
+    def __init__(self, systems, processes = None, dt = None, dtFraction = None, max_order = 4, NsubB = 1, resonances_to_include={}, DFOp_kwargs = {}):
+        if not single_true([dt,dtFraction]):
+            raise AttributeError("Must specify exactly one of 'dt' or 'dtFraction'")
+        self.states = [
+                system if isinstance(system,Poincare) else Poincare.from_Simulation(system)
+                for system in systems
+        ]
+        self.processes = processes
+        self.sim_kwargs = {
+                'dt':dt,
+                'dtFraction':dtFraction,
+                'max_order':max_order,
+                'NsubB':NsubB,
+                'resonances_to_include':resonances_to_include,
+                'DFOp_kwargs':DFOp_kwargs
+        }
+        self._executor = None
+
+    def __len__(self):
+        return len(self.states)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the pool of worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers = self.processes)
+        return self._executor
+
+    def iter_integrate(self, times, corrector = False, chunksize = 1, progress = None):
+        """
+        Integrate every system in the ensemble and yield the
+        results for each system as soon as they become available.
+
+        Arguments
+        ---------
+        times : array-like
+            Times at which to record the state of each system. 
+            Each system is integrated from its initial state,
+            with :code:`t=0`, to each of these times.
+        corrector : bool, optional
+            If :code:`True`, symplectic correctors are applied.
+            Default is :code:`False`.
+        chunksize : int, optional
+            Number of systems sent to a worker process at a time.
+        progress : callable, optional
+            Function called as :code:`progress(Ndone, Ntotal, result)`
+            each time a system's integration finishes.
+
+        Yields
+        ------
+        result : dict
+            Dictionary containing the entries:
+                - 'index': Index of the system in the ensemble.
+                - 'time': Array of times reached by the integration. 
+                  These are the first multiples of the time step after
+                  the requested output times.
+                - 'state': Array of shape (Ntimes,6 * Nplanet) containing
+                  the system's state vector at each output time.
+                - 'error': :code:`None` if the integration succeeded, 
+                  otherwise the traceback of the exception raised.
+                  Entries of 'time' and 'state' that were not reached 
+                  are set to NaN.
+                - 'warnings': List of warning messages raised while 
+                  integrating the system.
+        """
+        times = np.atleast_1d(np.asarray(times,dtype = float))
+        indexed = list(enumerate(self.states))
+        chunks = [indexed[i:i + chunksize] for i in range(0,len(indexed),chunksize)]
+        Ntotal = len(indexed)
+        Ndone = 0
+        futures = []
+        if self.processes == 1:
+            completed = (_integrate_ensemble_chunk(chunk,times,self.sim_kwargs,corrector) for chunk in chunks)
+        else:
+            futures = [
+                    self.executor.submit(_integrate_ensemble_chunk,chunk,times,self.sim_kwargs,corrector)
+                    for chunk in chunks
+            ]
+            completed = (future.result() for future in as_completed(futures))
+        try:
+            for results in completed:
+                for result in results:
+                    Ndone += 1
+                    if progress is not None:
+                        progress(Ndone,Ntotal,result)
+                    yield result
+        finally:
+            # Cancel chunks that have not started if the generator 
+            # is closed before all results have been consumed.
+            for future in futures:
+                future.cancel()
+
+    def integrate(self, times, corrector = False, chunksize = 1, progress = None):
+        """
+        Integrate every system in the ensemble. All systems must have
+        the same number of planets.
+
+        Arguments
+        ---------
+        times : array-like
+            Times at which to record the state of each system.
+        corrector : bool, optional
+            If :code:`True`, symplectic correctors are applied.
+            Default is :code:`False`.
+        chunksize : int, optional
+            Number of systems sent to a worker process at a time.
+        progress : callable, optional
+            Function called as :code:`progress(Ndone, Ntotal, result)`
+            each time a system's integration finishes.
+
+        Returns
+        -------
+        results : dict
+            Dictionary containing the entries:
+                - 'time': Array of shape (Nsystems, Ntimes) containing 
+                  the times reached by each integration.
+                - 'state': Array of shape (Nsystems, Ntimes, 6 * Nplanet)
+                  containing state vectors of each system.
+                - 'errors': Dictionary mapping the indices of systems whose 
+                  integration failed to the corresponding traceback.
+                - 'warnings': Dictionary mapping the indices of systems 
+                  to the warning messages raised while integrating them.
+        """
+        Ns = set(state.N for state in self.states)
+        if len(Ns) > 1:
+            raise ValueError("All systems must have the same number of planets. Use 'iter_integrate' instead.")
+        times = np.atleast_1d(np.asarray(times,dtype = float))
+        Nvar = 6 * (Ns.pop() - 1) if Ns else 0
+        output = {
+                'time':np.full((len(self),len(times)),np.nan),
+                'state':np.full((len(self),len(times),Nvar),np.nan),
+                'errors':{},
+                'warnings':{}
+        }
+        for result in self.iter_integrate(times,corrector,chunksize,progress):
+            i = result['index']
+            output['time'][i] = result['time']
+            output['state'][i] = result['state']
+            if result['error'] is not None:
+                output['errors'][i] = result['error']
+            if result['warnings']:
+                output['warnings'][i] = result['warnings']
+        return output
@@ -8,12 +8,21 @@ from .transformations import masses_to_jacobi, masses_from_jacobi
 from .poincare import Poincare
 from .miscellaneous import getOmegaMatrix
 from scipy.linalg import solve as lin_solve
+from scipy.linalg import lu_factor, lu_solve
 from scipy.linalg import expm
+from collections import OrderedDict
 from numpy import sqrt
 
 _rt2 = sqrt(2)
 _rt2_inv = 1 / _rt2 
 _machine_eps = np.finfo(np.float64).eps
+# Simplified Newton iterations re-evaluate the Jacobian when 
+# successive corrections shrink by less than this factor.
+_simplified_newton_max_contraction = 0.5
+# Number of step sizes for which simplified Newton factorizations
+# are kept, so that occasional fractional steps do not evict the
+# factorization used for regular steps.
+_simplified_newton_cache_size = 4
 # Runge-Kutte Butcher tableaus
 _ImplicitMidpoint = {
         'a':np.array([[0.5]]),
@@ -68,6 +77,28 @@ _ExplicitMidpoint = {
         'b':np.array([0,1]),
         'c':np.array([0,0.5])
         }
+# Embedded explicit pair of Dormand & Prince (1980) used for adaptive
+# step-size control. 'e' gives the weights of the local error estimate
+# and 'd' the coefficients of the 4th order dense output of 
+# Hairer, Norsett & Wanner (1993).
+_DormandPrince54 = {
+        'a':np.array([
+            [0,0,0,0,0,0],
+            [1/5,0,0,0,0,0],
+            [3/40,9/40,0,0,0,0],
+            [44/45,-56/15,32/9,0,0,0],
+            [19372/6561,-25360/2187,64448/6561,-212/729,0,0],
+            [9017/3168,-355/33,46732/5247,49/176,-5103/18656,0]
+            ]),
+        'c':np.array([0,1/5,3/10,4/5,8/9,1]),
+        'b':np.array([35/384,0,500/1113,125/192,-2187/6784,11/84]),
+        'e':np.array([71/57600,0,-71/16695,71/1920,-17253/339200,22/525,-1/40]),
+        'd':np.array([
+            -12715105075/11282082432, 0, 87487479700/32700410799,
+            -10690763975/1880347072, 701980252875/199316789632,
+            -1453857185/822651844, 69997945/29380423
+            ])
+}
 _rk_methods = {
         'ImplicitMidpoint':_ImplicitMidpoint,
         'LobattoIIIB':_LobattoIIIB,
@@ -77,6 +108,25 @@ _rk_methods = {
         'ExplicitMidpoint':_ExplicitMidpoint
 }
 
+def dense_rk_output(dense,theta):
+    """
+    Interpolate within a step of :meth:`SecularDFTermsEvolutionOperator.embedded_rk_step`.
+
+    Arguments
+    ---------
+    dense : ndarray
+      Dense output coefficients returned by the step.
+    theta : float
+      Fraction of the step, between 0 and 1.
+
+    Returns
+    -------
+    qp_vec : ndarray
+      Interpolated value of the canonical variables.
+    """
+    theta1 = 1 - theta
+    return dense[0] + theta * (dense[1] + theta1 * (dense[2] + theta * (dense[3] + theta1 * dense[4])))
+
 class EvolutionOperator(ABC):
     def __init__(self,initial_state,dt):
         self._dt = dt
@@ -500,7 +550,7 @@ class SecondOrderInclinationResonanceOperator(LinearInclinationResonancOperator)
         super(SecondOrderInclinationResonanceOperator,self).__init__(initial_state,indexIn,indexOut,res_vec,Amtrx,dt)
 
 
-from .poisson_series import DFTermSeries
+from .poisson_series import DFTermSeries, DFTermSeriesGroup
 from scipy.optimize import root
 from .disturbing_function import ResonanceTermsList, SecularTermsList
 
@@ -724,6 +774,9 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         self.Ndim = 4 * self.Npl
         G = initial_state.G
         ps = initial_state.particles
+        # Positions of eta,rho,kappa,sigma in the full state vector
+        i6 = 6 * np.arange(self.Npl)
+        self._qp_state_indices = np.concatenate((i6 + 1, i6 + 5, i6, i6 + 4))
 
         # Set tolerance and iteration parameters
         tols_allowed = atol >=0 and rtol >=0
@@ -732,17 +785,8 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         self.rtol = rtol
         self.atol = atol
         self.max_iter = max_iter
-        self._rk_root_method=rk_root_method
-        if rk_root_method == 'Newton':
-            self.rk_step = self._implicit_rk_step_newton
-        elif rk_root_method == 'quasi-Newton':
-            self.rk_step = self._implicit_rk_step_quasi_newton
-        elif rk_root_method == 'fixed_point':
-            self.rk_step = self._implicit_rk_step_fixed_point
-        elif rk_root_method == 'explicit':
-            self.rk_step = self._explicit_rk_step
-        else:
-            raise ValueError("'rk_root_method' must be either 'Newton', 'quasi-Newton', 'fixed_point', or 'explicit'")
+        self.rk_root_method = rk_root_method
+        self._simplified_newton_lu = OrderedDict()
         # Generate DFTermsSeries objects for each planet pair
         self.DFSeries_dict = dict()       
         for iPair, pair_terms in terms_dict.items():
@@ -767,10 +811,38 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
             else:
                 raise ValueError("'terms_dict' entry for pair ({0},{1}) is type {2}. Entries must be either lists or dictionaries!".format(iIn,iOut,type(pair_terms)))
             self.DFSeries_dict[iPair] = dfseries
+        self._set_pair_kernel()
 
         # Set Runge-Kutta integration parameters.
         self.rkmethod = rkmethod
     
+    def _set_pair_kernel(self):
+        """
+        Set up the arrays used to evaluate the disturbing function
+        series of every planet pair with a single call to the C 
+        library and to scatter the results of each pair into the 
+        derivative vector and Jacobian matrix of the full system.
+        """
+        pairs = list(self.DFSeries_dict.keys())
+        self._pair_series = DFTermSeriesGroup([self.DFSeries_dict[pair] for pair in pairs])
+        self._pair_indices = np.array(pairs,dtype=int).reshape(-1,2) - 1
+        self._pair_lambdas = np.zeros((len(pairs),2))
+        offsets = self.Npl * np.array([0,0,1,1,2,2,3,3])
+        qp_indices = self._pair_indices[:,[0,1,0,1,0,1,0,1]] + offsets
+        self._deriv_scatter_indices = qp_indices.reshape(-1)
+        self._jac_scatter_indices = (qp_indices[:,:,None] * self.Ndim + qp_indices[:,None,:]).reshape(-1)
+
+    def _pair_xy(self,qp_vec):
+        eta,rho,kappa,sigma = qp_vec.reshape(-1,self.Npl)
+        H = eta * self.rtLambda0_inv
+        K = kappa * self.rtLambda0_inv
+        R = 0.5 * rho * self.rtLambda0_inv
+        S = 0.5 * sigma * self.rtLambda0_inv
+        indices = self._pair_indices
+        X = K[indices] - 1j * H[indices]
+        Y = S[indices] - 1j * R[indices]
+        return np.hstack((X,Y))
+
     @property 
     def rk_root_method(self):
         return self._rk_root_method
@@ -780,12 +852,14 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
             self.rk_step = self._implicit_rk_step_newton
         elif rk_root_method == 'quasi-Newton':
             self.rk_step = self._implicit_rk_step_quasi_newton
+        elif rk_root_method == 'simplified-Newton':
+            self.rk_step = self._implicit_rk_step_simplified_newton
         elif rk_root_method == 'fixed_point':
             self.rk_step = self._implicit_rk_step_fixed_point
         elif rk_root_method == 'explicit':
             self.rk_step = self._explicit_rk_step
         else:
-            raise ValueError("'rk_root_method' must be either 'Newton', 'quasi-Newton', 'fixed_point', or 'explicit'")
+            raise ValueError("'rk_root_method' must be either 'Newton', 'quasi-Newton', 'simplified-Newton', 'fixed_point', or 'explicit'")
         self._rk_root_method = rk_root_method
 
     @property
@@ -897,12 +971,29 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
          are returned in the order:
           [eta1,eta2,...,etaN,rho1,...,rhoN,kappa1,...,kappaN,sigma1,...sigmaN]
         """
-        vecs = self._state_vector_to_individual_vectors(state_vec)
-        kappa = vecs[:,0] 
-        eta = vecs[:,1] 
-        sigma = vecs[:,4] 
-        rho = vecs[:,5] 
-        return np.concatenate((eta,rho,kappa,sigma))
+        return np.asarray(state_vec)[self._qp_state_indices]
+
+    def qp_vec_to_state_vec(self,qp_vec,state_vec):
+        """
+        Insert the eccentricity and inclination variables of a
+        'qp_vec' into a full state vector.
+
+        Arguments
+        ---------
+        qp_vec : ndarray
+          Vector of variables in the order
+          [eta1,eta2,...,etaN,rho1,...,rhoN,kappa1,...,kappaN,sigma1,...sigmaN]
+        state_vec : ndarray
+          Full state vector of the system in Poincare 
+          variables. Modified in place.
+
+        Returns
+        -------
+        state_vec : ndarray
+          The updated state vector.
+        """
+        state_vec[self._qp_state_indices] = qp_vec
+        return state_vec
 
     def Hamiltonian_from_qp_vec(self,qp_vec):  
         """
@@ -922,22 +1013,8 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
           The value of the Hamiltonian (i.e., the sum of the disturbing
           function terms modeled by the operator)
         """
-        l = np.zeros(2)
-        eta,rho,kappa,sigma = qp_vec.reshape(-1,self.Npl)
-        H = eta * self.rtLambda0_inv
-        K = kappa * self.rtLambda0_inv
-        R = 0.5 * rho * self.rtLambda0_inv
-        S = 0.5 * sigma * self.rtLambda0_inv
-        Hamiltonian = 0.
-        for iPair,series in self.DFSeries_dict.items():
-            iIn, iOut = iPair
-            indices = np.array(iPair) - 1
-            X = K[indices] - 1j * H[indices]
-            Y = S[indices] - 1j * R[indices]
-            XYvec = np.concatenate((X,Y))
-            dH = series._evaluate(l,XYvec)
-            Hamiltonian += dH
-        return Hamiltonian
+        xy = self._pair_xy(qp_vec)
+        return np.sum(self._pair_series.evaluate(self._pair_lambdas,xy))
 
     def deriv_from_qp_vec(self,qp_vec):  
         """
@@ -956,28 +1033,13 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         qp_vec_dot : ndarray
           Time derivative of qp_vec.
         """
-        derivs = np.zeros(self.Ndim) 
-        l = np.zeros(2)
-        eta,rho,kappa,sigma = qp_vec.reshape(-1,self.Npl)
-        H = eta * self.rtLambda0_inv
-        K = kappa * self.rtLambda0_inv
-        R = 0.5 * rho * self.rtLambda0_inv
-        S = 0.5 * sigma * self.rtLambda0_inv
-        for iPair,series in self.DFSeries_dict.items():
-            iIn, iOut = iPair
-            indices = np.array(iPair) - 1
-            X = K[indices] - 1j * H[indices]
-            Y = S[indices] - 1j * R[indices]
-            XYvec = np.concatenate((X,Y))
-            _, _deriv= series._evaluate_with_derivs(l,XYvec)
-            index_list = np.array([
-                iIn,iOut,
-                iIn + self.Npl,iOut + self.Npl,
-                iIn + 2*self.Npl,iOut + 2*self.Npl,
-                iIn + 3*self.Npl,iOut + 3*self.Npl
-                ]) - 1
-            for i,I in enumerate(index_list):
-                derivs[I] += _deriv[i]
+        xy = self._pair_xy(qp_vec)
+        _,pair_derivs = self._pair_series.evaluate_with_derivs(self._pair_lambdas,xy)
+        derivs = np.bincount(
+                self._deriv_scatter_indices,
+                weights = pair_derivs.reshape(-1),
+                minlength = self.Ndim
+        )
         return derivs
 
     def deriv_and_jacobian_from_qp_vec(self,qp_vec):  
@@ -1001,31 +1063,18 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
           Jacobian matrix of the equations of motion for the
           variables contained in qp_vec.
         """
-        derivs = np.zeros(self.Ndim) 
-        jac = np.zeros((self.Ndim,self.Ndim)) 
-        l = np.zeros(2)
-        eta,rho,kappa,sigma = qp_vec.reshape(-1,self.Npl)
-        H = eta * self.rtLambda0_inv
-        K = kappa * self.rtLambda0_inv
-        R = 0.5 * rho * self.rtLambda0_inv
-        S = 0.5 * sigma * self.rtLambda0_inv
-        for iPair,series in self.DFSeries_dict.items():
-            iIn, iOut = iPair
-            indices = np.array(iPair) - 1
-            X = K[indices] - 1j * H[indices]
-            Y = S[indices] - 1j * R[indices]
-            XYvec = np.concatenate((X,Y))
-            _, _deriv, _jac, _ = series._evaluate_with_jacobian(l,XYvec)
-            index_list = np.array([
-                iIn,iOut,
-                iIn + self.Npl,iOut + self.Npl,
-                iIn + 2*self.Npl,iOut + 2*self.Npl,
-                iIn + 3*self.Npl,iOut + 3*self.Npl
-                ]) - 1
-            for i,I in enumerate(index_list):
-                derivs[I] += _deriv[i]
-                for j,J in enumerate(index_list):
-                    jac[I,J] += _jac[i,j]
+        xy = self._pair_xy(qp_vec)
+        _,pair_derivs,pair_jacs = self._pair_series.evaluate_with_jacobian(self._pair_lambdas,xy)
+        derivs = np.bincount(
+                self._deriv_scatter_indices,
+                weights = pair_derivs.reshape(-1),
+                minlength = self.Ndim
+        )
+        jac = np.bincount(
+                self._jac_scatter_indices,
+                weights = pair_jacs.reshape(-1),
+                minlength = self.Ndim * self.Ndim
+        ).reshape(self.Ndim,self.Ndim)
         return derivs, jac
 
     def _rk4_step(self,y,ydot,h):
@@ -1051,9 +1100,93 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         k = np.zeros((s,self.Ndim))
         for i,ai in enumerate(a):
             k[i] = f(y + h * ai @ k)
+        self._rk_stages = k
         ynew = y + h * b @ k
         return ynew
 
+    def rk_step_with_tangent(self,qp_vec,tangent):
+        """
+        Advance the canonical variables by one Runge-Kutta step
+        along with one or more tangent vectors. 
+
+        Tangent vectors are mapped by the derivative of the 
+        Runge-Kutta step with respect to its initial condition,
+        computed from the Jacobians of the equations of motion at 
+        the converged stage values.
+
+        Arguments
+        ---------
+        qp_vec : ndarray
+          Initial value of the canonical variables.
+        tangent : ndarray
+          Tangent vector of shape (Ndim,) or array of tangent vectors
+          of shape (Ndim, Nvec).
+
+        Returns
+        -------
+        qp_new : ndarray
+          Value of the canonical variables after the step.
+        tangent_new : ndarray
+          Tangent vector(s) after the step.
+        """
+        ynew = self.rk_step(qp_vec)
+        h = self._dt
+        a = self.rk_a
+        b = self.rk_b
+        s = self.rk_s
+        Ndim = self.Ndim
+        ytemps = qp_vec + h * a @ self._rk_stages
+        Dkdy = np.array([self.deriv_and_jacobian_from_qp_vec(ytemp)[1] for ytemp in ytemps])
+        # Block (i,j) is delta_ij * I - h * a_ij * Dkdy[i]
+        M = (-h * a[:,None,:,None] * Dkdy[:,:,None,:]).reshape(s * Ndim, s * Ndim)
+        M[np.diag_indices(s * Ndim)] += 1
+        rhs = (Dkdy @ tangent).reshape(s * Ndim,-1)
+        dk = lin_solve(M,rhs).reshape((s,) + np.shape(tangent))
+        tangent_new = tangent + h * np.tensordot(b,dk,axes = 1)
+        return ynew, tangent_new
+
+    def embedded_rk_step(self,qp_vec,h,qp_dot = None):
+        """
+        Advance the equations of motion by a time h using the 
+        explicit embedded Runge-Kutta pair of Dormand and Prince.
+
+        Arguments
+        ---------
+        qp_vec : ndarray
+          Initial value of the canonical variables.
+        h : float
+          Timestep.
+        qp_dot : ndarray, optional
+          Time derivative of qp_vec. Computed if not provided.
+
+        Returns
+        -------
+        qp_new : ndarray
+          Value of the canonical variables after the step (5th order).
+        qp_dot_new : ndarray
+          Time derivative at qp_new, which can be passed on to the
+          next step.
+        error : ndarray
+          Estimate of the local error of the step.
+        dense : ndarray
+          Coefficients for interpolating within the step with
+          :func:`dense_rk_output`.
+        """
+        tableau = _DormandPrince54
+        f = self.deriv_from_qp_vec
+        y = qp_vec
+        k = np.zeros((7,self.Ndim))
+        k[0] = f(y) if qp_dot is None else qp_dot
+        for i in range(1,6):
+            k[i] = f(y + h * tableau['a'][i,:i] @ k[:i])
+        ynew = y + h * tableau['b'] @ k[:6]
+        k[6] = f(ynew)
+        error = h * tableau['e'] @ k
+        dy = ynew - y
+        bspl = h * k[0] - dy
+        dense = np.array([y, dy, bspl, dy - h * k[6] - bspl, h * tableau['d'] @ k])
+        return ynew, k[6], error, dense
+
     def _implicit_rk_step_fixed_point(self,qp_vec):
         """
         Advance ODE for input qpve for a timestep h
@@ -1090,6 +1223,7 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
                 break
         else:
             warnings.warn("'implicit_rk_step' reached maximum number of iterations ({})".format(max_iter))
+        self._rk_stages = k
         ynew = y + h * b @ k
         return ynew
     def _implicit_step_root_eqn(self,K,y):
@@ -1102,12 +1236,12 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         knew = np.zeros((s,Ndim))
         Dkdy = np.zeros((s,Ndim,Ndim))
         ytemps = y + h * a @ k
-        Imtrx = np.eye(s * Ndim)
         for i,ytemp in enumerate(ytemps):
             knew[i],Dkdy[i] = f_and_Df(ytemp)
-        fOfK=np.hstack(knew)
-        g = K - fOfK
-        Dg = Imtrx - h * np.block([[ a[i,j] * Dkdy[i] for j in range(s)] for i in range(s)])
+        g = K - knew.reshape(-1)
+        # Block (i,j) of Dg is delta_ij * I - h * a_ij * Dkdy[i]
+        Dg = (-h * a[:,None,:,None] * Dkdy[:,:,None,:]).reshape(s * Ndim, s * Ndim)
+        Dg[np.diag_indices(s * Ndim)] += 1
         return g,Dg
 
     def _implicit_rk_step_newton(self,qp_vec):
@@ -1135,7 +1269,6 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         Dkdy = np.zeros((s,Ndim,Ndim))
         rtol = self.rtol
         atol = self.atol
-        Imtrx = np.eye(s * Ndim)
         #
         
         # Generate initial guesses from second-order approx.
@@ -1149,7 +1282,6 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         d2ydt2 = Dktemp @ ktemp
         k = np.array([ktemp + ci*h*d2ydt2 for ci in c])
         # Main loop
-        # Use quasi-Newton's method for improved performance???
         K = np.hstack(k)
         for itr in range(max_iter):
             g,Dg = self._implicit_step_root_eqn(K,y)
@@ -1160,6 +1292,7 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         else:
             warnings.warn("'implicit_rk_step' reached maximum number of iterations ({})".format(max_iter))
         k = K.reshape(s,Ndim) 
+        self._rk_stages = k
         ynew = y + h * b @ k
         return ynew
 
@@ -1205,6 +1338,90 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
                 break
         else:
             warnings.warn("'implicit_rk_step' reached maximum number of iterations ({})".format(max_iter))
+        self._rk_stages = k
+        ynew = y + h * b @ k
+        return ynew
+
+    def _simplified_newton_factorization(self,y,refresh=False):
+        """
+        Get the LU factorization of the matrix I - h * (A x J), where
+        A is the Butcher matrix of the RK method and J is the Jacobian
+        of the equations of motion. Factorizations are cached by
+        step size and RK method and reused by subsequent steps until 
+        they are refreshed because iterations converge too slowly. 
+
+        Returns
+        -------
+        J : ndarray
+          The Jacobian used in the factorization.
+        lu_piv : tuple
+          LU factorization returned by scipy.linalg.lu_factor
+        """
+        h = self._dt
+        key = (h,self.rkmethod)
+        cache = self._simplified_newton_lu
+        if refresh or key not in cache:
+            _,J = self.deriv_and_jacobian_from_qp_vec(y)
+            M = np.eye(self.rk_s * self.Ndim) - h * np.kron(self.rk_a,J)
+            cache[key] = (J,lu_factor(M))
+            while len(cache) > _simplified_newton_cache_size:
+                cache.popitem(last = False)
+        else:
+            cache.move_to_end(key)
+        return cache[key]
+
+    def _implicit_rk_step_simplified_newton(self,qp_vec):
+        """
+        Advance ODE for input qpve for a timestep h
+        using an implicit Runge-Kutta method defined by the
+        Butcher tableau [a,b,c].
+
+        The stage equations are solved with simplified Newton
+        iterations that use a fixed Jacobian. The LU factorization of 
+        I - h * (A x J) is computed once and reused for all iterations 
+        of this and subsequent steps. The Jacobian is re-evaluated 
+        whenever the iterations contract too slowly or fail to converge.
+
+        Arguments
+        ---------
+        qp_vec
+        """
+        h = self._dt
+        a = self.rk_a
+        b = self.rk_b
+        c = self.rk_c
+        s = self.rk_s
+        Ndim = self.Ndim
+        f = self.deriv_from_qp_vec
+        y = qp_vec
+        max_iter = self.max_iter
+        rtol = self.rtol
+        atol = self.atol
+
+        ktemp = f(y)
+        for refresh in (False,True):
+            J,lu_piv = self._simplified_newton_factorization(y,refresh)
+            d2ydt2 = J @ ktemp
+            k = np.array([ktemp + ci*h*d2ydt2 for ci in c])
+            dk_norm_old = np.inf
+            for itr in range(max_iter):
+                ytemps = y + h * a @ k
+                g = (k - np.array([f(ytemp) for ytemp in ytemps])).reshape(-1)
+                dk = -1 * lu_solve(lu_piv,g).reshape(s,Ndim)
+                k += dk
+                if np.alltrue( np.abs(dk) < rtol * np.abs(k) + atol ):
+                    break
+                dk_norm = np.max(np.abs(dk))
+                if dk_norm > _simplified_newton_max_contraction * dk_norm_old:
+                    # Slow convergence: the Jacobian is stale.
+                    self._simplified_newton_lu.pop((h,self.rkmethod),None)
+                dk_norm_old = dk_norm
+            else:
+                if not refresh:
+                    continue
+                warnings.warn("'implicit_rk_step' reached maximum number of iterations ({})".format(max_iter))
+            break
+        self._rk_stages = k
         ynew = y + h * b @ k
         return ynew
 
@@ -1233,19 +1450,7 @@ class SecularDFTermsEvolutionOperator(EvolutionOperator):
         """
         qp_vec = self.state_vec_to_qp_vec(state_vec)
         qp_vec_new = self.rk_step(qp_vec)
-        for i in xrange(self.Npl):
-            # eta
-            state_vec[6*i+1] = qp_vec_new[i]
-            
-            # kappa
-            state_vec[6*i] = qp_vec_new[i + 2 * self.Npl]
-            
-            # rho
-            state_vec[6*i+5] = qp_vec_new[i + self.Npl]
-
-            # sigma
-            state_vec[6*i+4] = qp_vec_new[i + 3 * self.Npl]
-        return state_vec
+        return self.qp_vec_to_state_vec(qp_vec_new,state_vec)
     
     def calculate_Hamiltonian(self,state_vec):
         """
@@ -0,0 +1,53 @@
+import unittest
+import tempfile
+import shutil
+import numpy as np
+from celmech.disturbing_function import DFCoeff_C, DFCoeff_Cbar, eval_DFCoeff_dict
+from celmech.df_coefficient_store import DFCoeffStore, precompute_DFCoeff_tables
+from celmech.df_coefficient_store import get_default_store, set_default_store
+
+class TestDFCoeffStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = DFCoeffStore(self.path)
+        self.old_store = get_default_store()
+        set_default_store(DFCoeffStore(self.path + "/empty"))
+
+    def tearDown(self):
+        set_default_store(self.old_store)
+        shutil.rmtree(self.path)
+
+    def test_roundtrip(self):
+        precompute_DFCoeff_tables(3,resonances=[(3,1)],store=self.store)
+        store = DFCoeffStore(self.path)
+        for kvec,zvec in [((0,0,-1,1,0,0),(0,0,0,0)),((3,-2,-1,0,0,0),(0,0,1,0))]:
+            for kind,func in (('C',DFCoeff_C),('Cbar',DFCoeff_Cbar)):
+                stored = store.lookup(kind,kvec,zvec)
+                exact = func(*kvec,*zvec)
+                self.assertEqual(set(stored.keys()),set(exact.keys()))
+                self.assertAlmostEqual(
+                        eval_DFCoeff_dict(stored,0.6),
+                        eval_DFCoeff_dict(exact,0.6),
+                        places=12
+                )
+
+    def test_missing_and_version(self):
+        self.assertIsNone(self.store.lookup('C',(0,0,0,0,0,0),(0,0,0,0)))
+        precompute_DFCoeff_tables(0,store=self.store)
+        self.assertIsNone(self.store.lookup('C',(0,0,0,0,0,0),(0,0,5,0)))
+        with open(self.path + "/metadata.json","w") as fi:
+            fi.write('{"format_version": -1}')
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(DFCoeffStore(self.path).lookup('C',(0,0,0,0,0,0),(0,0,0,0)))
+
+    def test_default_store(self):
+        precompute_DFCoeff_tables(0,store=self.store)
+        set_default_store(DFCoeffStore(self.path))
+        coeff = DFCoeff_C(0,0,0,0,0,0,0,0,0,0)
+        self.assertEqual(coeff,self.store.lookup('C',(0,0,0,0,0,0),(0,0,0,0)))
+        coeff.pop('indirect',None)
+        self.assertEqual(DFCoeff_C(0,0,0,0,0,0,0,0,0,0),self.store.lookup('C',(0,0,0,0,0,0),(0,0,0,0)))
+
+if __name__ == '__main__':
+    unittest.main()
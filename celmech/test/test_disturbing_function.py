@@ -2,8 +2,16 @@ import rebound
 import unittest
 import math
 import numpy as np
-from celmech.disturbing_function import laplace_b, DFCoeff_C,DFCoeff_Cbar, get_fg_coeffs, eval_DFCoeff_dict
+import mpmath
+from celmech.disturbing_function import laplace_b, laplace_b_C, DFCoeff_C,DFCoeff_Cbar, get_fg_coeffs, eval_DFCoeff_dict
+from celmech.disturbing_function import LaplaceCoefficientCache
 from random import random, seed
+from scipy.special import ellipk
+
+def laplace_b_mpmath(s,j,n,alpha):
+    with mpmath.workdps(30):
+        f = lambda a: 2 * mpmath.rf(s,j) * a**j * mpmath.hyp2f1(s,s+j,j+1,a**2) / mpmath.factorial(j)
+        return float(mpmath.diff(f,alpha,n))
 
 class TestDisturbingFunction(unittest.TestCase):
 
@@ -121,6 +129,61 @@ class TestDisturbingFunction(unittest.TestCase):
                     {key:factor*val for key,val in self.LaskarRobutel['C18'].items()},
                     DFCoeff_C(j1,j2,j3,j4,j5,j6,z1,z2,z3,z4)
             )
+    def test_laplace_b_derivatives(self,delta=1.e-5):
+        h = 1.e-4
+        for s,j in [(0.5,0),(1.5,2),(2.5,5)]:
+            for n in range(3):
+                fd = laplace_b(s,j,n,self.alpha + h) - laplace_b(s,j,n,self.alpha - h)
+                fd /= 2 * h
+                self.assertAlmostEqual(fd,laplace_b(s,j,n+1,self.alpha),delta=delta * abs(fd))
+
+    def test_laplace_b_array(self):
+        alphas = np.array([0.1,0.5,0.9])
+        vals = laplace_b(1.5,3,4,alphas)
+        for alpha,val in zip(alphas,vals):
+            self.assertAlmostEqual(val,laplace_b(1.5,3,4,alpha),delta=1.e-12 * abs(val))
+        C = DFCoeff_C(3,-2,-1,0,0,0,0,0,1,0)
+        vals = eval_DFCoeff_dict(C,alphas)
+        for alpha,val in zip(alphas,vals):
+            self.assertAlmostEqual(val,eval_DFCoeff_dict(C,alpha),delta=1.e-12 * abs(val))
+
+    def test_laplace_b_C(self):
+        alphas = np.array([0.,0.1,0.5,0.85,0.95])
+        for s,j,n in [(0.5,0,0),(0.5,3,1),(1.5,2,2),(2.5,5,3)]:
+            for method in ('series','auto'):
+                vals = laplace_b_C(s,j,n,alphas,method)
+                for alpha,val in zip(alphas,vals):
+                    self.assertAlmostEqual(val,laplace_b_mpmath(s,j,n,alpha),delta=1.e-10 * abs(val) + 1e-15)
+        alphas = np.array([0.99,0.9999])
+        np.testing.assert_allclose(laplace_b_C(0.5,0,0,alphas,'accelerated'),4 / np.pi * ellipk(alphas**2),rtol=1e-13)
+        h = 1e-7
+        for s,j,n in [(0.5,1,1),(1.5,3,2)]:
+            fd = (laplace_b_C(s,j,n,0.999 + h) - laplace_b_C(s,j,n,0.999 - h)) / (2 * h)
+            self.assertAlmostEqual(fd,laplace_b_C(s,j,n+1,0.999),delta=1e-5 * abs(fd))
+
+    def test_laplace_cache_eviction(self):
+        cache = LaplaceCoefficientCache(maxsize = 2)
+        b0 = cache(0.5,1,2,0.3)
+        cache(0.5,1,2,0.4)
+        cache(0.5,1,2,0.3)
+        cache(0.5,1,2,0.5)
+        self.assertEqual(len(cache),2)
+        self.assertIn((0.5,1,2),cache.get_table(0.3))
+        self.assertEqual(b0,laplace_b(0.5,1,2,0.3))
+
+    def test_DFCoeff_C_memoized(self):
+        C1 = DFCoeff_C(3,-2,-1,0,0,0,1,0,0,1)
+        C1[(0,(0.5,0,0))] = 1.
+        C2 = DFCoeff_C(3,-2,-1,0,0,0,1,0,0,1)
+        self.assertNotIn((0,(0.5,0,0)),C2)
+        self.assertEqual(C2,DFCoeff_C(3,-2,-1,0,0,0,1,0,0,1))
+        Cbar1 = DFCoeff_Cbar(3,-2,-1,0,0,0,0,0,1,0)
+        Cbar1[(0,(0.5,0,0))] = 1.
+        Cbar2 = DFCoeff_Cbar(3,-2,-1,0,0,0,0,0,1,0)
+        self.assertNotIn((0,(0.5,0,0)),Cbar2)
+        self.assertIn('indirect',DFCoeff_Cbar(1,-1,0,0,0,0,0,0,0,0))
+        self.assertNotIn('indirect',DFCoeff_Cbar(1,-1,0,0,0,0,0,0,0,0,include_indirect = False))
+
     def test_get_fg_coffs(self):
         f,g = get_fg_coeffs(17,3)
         self.assertAlmostEqual(f,-5.603736926452656)
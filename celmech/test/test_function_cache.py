@@ -0,0 +1,78 @@
+import unittest
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from celmech.theano_ops import function_cache
+
+class _StubFunction(object):
+    # Picklable stand-in for a compiled Theano function
+    def __init__(self, outputs):
+        self.outputs = outputs
+    def __call__(self, x):
+        return self.outputs * x
+
+class TestFunctionCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.compiled = []
+        self.graphs_built = []
+        def function(inputs, outputs, givens, on_unused_input):
+            self.compiled.append(outputs)
+            return _StubFunction(outputs)
+        self._theano = function_cache.theano
+        function_cache.theano = SimpleNamespace(
+            function = function,
+            config = SimpleNamespace(floatX = 'float64'),
+            __version__ = 'stub'
+        )
+        function_cache.clear_function_cache()
+
+    def tearDown(self):
+        function_cache.theano = self._theano
+        function_cache.clear_function_cache()
+        shutil.rmtree(self.path)
+
+    def build_graph(self, n_quad_pts):
+        self.graphs_built.append(n_quad_pts)
+        graph = {'f':([],n_quad_pts),'g':([],2 * n_quad_pts)}
+        return graph,[]
+
+    def get_funcs(self, n_quad_pts = 3, use_disk_cache = True):
+        return function_cache.get_cached_theano_functions(
+            'stub', n_quad_pts, ('f','g'), self.build_graph,
+            use_disk_cache = use_disk_cache, path = self.path
+        )
+
+    def test_lazy_compilation(self):
+        funcs = self.get_funcs()
+        self.assertEqual(self.graphs_built,[])
+        self.assertEqual(funcs['f'](2.),6.)
+        self.assertEqual(funcs['f'](1.),3.)
+        self.assertEqual(self.compiled,[3])
+        self.assertEqual(funcs.compiled_functions,['f'])
+        self.assertEqual(sorted(funcs),['f','g'])
+        with self.assertRaises(KeyError):
+            funcs['h']
+        self.assertIs(self.get_funcs(),funcs)
+        self.assertIsNot(self.get_funcs(4),funcs)
+
+    def test_disk_cache(self):
+        self.get_funcs()['f']
+        function_cache.clear_function_cache()
+        funcs = self.get_funcs()
+        self.assertEqual(funcs['f'](2.),6.)
+        self.assertEqual(self.compiled,[3])
+        self.assertEqual(self.graphs_built,[3])
+        funcs['g']
+        self.assertEqual(self.compiled,[3,6])
+        function_cache.clear_function_cache(disk = True, path = self.path)
+        self.get_funcs()['f']
+        self.assertEqual(self.compiled,[3,6,3])
+
+    def test_no_disk_cache(self):
+        self.get_funcs(use_disk_cache = False)['f']
+        self.assertEqual(os.listdir(self.path),[])
+
+if __name__ == '__main__':
+    unittest.main()
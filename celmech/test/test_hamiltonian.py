@@ -0,0 +1,147 @@
+import unittest
+import rebound as rb
+import numpy as np
+from sympy import symbols
+from celmech import Poincare, PoincareHamiltonian
+from celmech.disturbing_function import SecularTermsList, ResonanceTermsList
+from celmech.generating_functions import FirstOrderGeneratingFunction
+from celmech import hamiltonian
+
+def get_pvars(m1 = 1e-5):
+    sim = rb.Simulation()
+    sim.add(m=1)
+    sim.add(m=m1, P=1, e=0.05, inc = 0.01, l = 0.3, pomega = 1.2, Omega = 0.4)
+    sim.add(m=2e-5, P=1.52, e=0.04, inc=0.02, l = 2.1, pomega = -0.6, Omega = 2.5)
+    sim.move_to_com()
+    return Poincare.from_Simulation(sim)
+
+class TestHamiltonian(unittest.TestCase):
+    def setUp(self):
+        self.terms = SecularTermsList(2,2)
+
+    def get_pham(self, pvars, update):
+        pham = PoincareHamiltonian(pvars)
+        for k,z in self.terms:
+            pham.add_monomial_term(k,z,update=update)
+        pham._update()
+        return pham
+
+    def test_incremental_update(self):
+        pham1 = self.get_pham(get_pvars(),True)
+        pham2 = self.get_pham(get_pvars(),False)
+        y = pham1.state_to_list(pham1.state)
+        self.assertAlmostEqual(pham1.Energy(*y),pham2.Energy(*y),delta = 1e-15)
+        np.testing.assert_allclose(pham1.Nflow(*y),pham2.Nflow(*y),rtol=1e-12,atol=1e-20)
+        Nderivs = np.array([f(*y) for f in pham1.Nderivs])
+        np.testing.assert_allclose(Nderivs,pham1.Nflow(*y),rtol=1e-12,atol=1e-20)
+
+    def test_add_term_integrate(self):
+        pham2 = self.get_pham(get_pvars(),False)
+        y0 = pham2.state_to_list(pham2.state)
+        pham2.integrate(10.)
+        for fused_rhs in (True,False):
+            pham1 = PoincareHamiltonian(get_pvars(),fused_rhs = fused_rhs)
+            for i,(k,z) in enumerate(self.terms):
+                pham1.add_monomial_term(k,z)
+                # Integrating does not recompile the Hamiltonian
+                parts = list(pham1._parts)
+                pham1.integrate(1e-3 * (i+1))
+                self.assertEqual(pham1._parts,parts)
+            self.assertLessEqual(len(pham1._parts),np.log2(len(self.terms)) + 2)
+            self.assertAlmostEqual(pham1.Energy(*y0),pham2.Energy(*y0),delta = 1e-15)
+            np.testing.assert_allclose(pham1.Nflow(*y0),pham2.Nflow(*y0),rtol=1e-12,atol=1e-20)
+            pham1.update_state_from_list(pham1.state,y0)
+            pham1._update()
+            pham1.integrate(10.)
+            np.testing.assert_allclose(
+                pham1.state_to_list(pham1.state),
+                pham2.state_to_list(pham2.state),
+                rtol=1e-10,atol=1e-15
+            )
+
+    def test_generating_function_add_term(self):
+        chi1 = FirstOrderGeneratingFunction(get_pvars())
+        chi2 = FirstOrderGeneratingFunction(get_pvars())
+        for k,z in ResonanceTermsList(3,1,1,1):
+            chi1.add_monomial_term(k,z)
+            chi2.add_monomial_term(k,z,update=False)
+        chi2._update()
+        y = chi1.state_to_list(chi1.state)
+        self.assertAlmostEqual(chi1.Energy(*y),chi2.Energy(*y),delta = 1e-15)
+        np.testing.assert_allclose(chi1.Nflow(*y),chi2.Nflow(*y),rtol=1e-12,atol=1e-20)
+        self.assertAlmostEqual(float(chi1.Nchi.subs(dict(zip(chi1.varsymbols,y)))),chi1.Energy(*y),delta = 1e-15)
+
+    def test_param_values(self):
+        pham1 = self.get_pham(get_pvars(),False)
+        pham2 = self.get_pham(get_pvars(3e-5),False)
+        self.assertEqual(pham1.param_symbols,pham2.param_symbols)
+        y = pham2.state_to_list(pham2.state)
+        self.assertNotAlmostEqual(pham1.Energy(*y), pham2.Energy(*y),delta = 1e-15)
+        pham1.update_Hparams(dict(zip(pham2.param_symbols,pham2.param_values)))
+        self.assertAlmostEqual(pham1.Energy(*y), pham2.Energy(*y),delta = 1e-15)
+        self.assertAlmostEqual(float(pham1.NH.subs(dict(zip(pham1.varsymbols,y)))), pham2.Energy(*y),delta = 1e-15)
+        np.testing.assert_allclose(pham1.Nflow(*y),pham2.Nflow(*y),rtol=1e-12,atol=1e-20)
+
+    def test_compile_cache(self):
+        pham1 = self.get_pham(get_pvars(),False)
+        pham2 = self.get_pham(get_pvars(3e-5),False)
+        self.assertIs(pham1._parts[0],pham2._parts[0])
+        self.assertLessEqual(len(hamiltonian._compile_cache),hamiltonian._COMPILE_CACHE_MAXSIZE)
+
+    def test_update_Hparams_rebuild(self):
+        pham1 = self.get_pham(get_pvars(),False)
+        pham2 = self.get_pham(get_pvars(),False)
+        y = pham1.state_to_list(pham1.state)
+        C = pham1.param_symbols[0]
+        Cval = pham1.Hparams[C]
+        x = symbols('x')
+        pham1.Hparams[C] = 2 * x
+        pham1.Hparams[x] = 0.1 * Cval
+        pham1._update()
+        self.assertNotIn(C,pham1.param_symbols)
+        pham1.update_Hparams({C:Cval})
+        self.assertIn(C,pham1.param_symbols)
+        self.assertAlmostEqual(pham1.Energy(*y), pham2.Energy(*y),delta = 1e-15)
+        np.testing.assert_allclose(pham1.Nflow(*y),pham2.Nflow(*y),rtol=1e-12,atol=1e-20)
+
+    def test_analytic_jacobian(self):
+        pham = self.get_pham(get_pvars(),False)
+        pham_jac = PoincareHamiltonian(get_pvars(),analytic_jacobian = True)
+        for k,z in self.terms:
+            pham_jac.add_monomial_term(k,z,update=False)
+        pham_jac._update()
+        # Switching on the Jacobian of an existing instance recompiles it.
+        pham.analytic_jacobian = True
+        for ph in (pham,pham_jac):
+            y = np.array(ph.state_to_list(ph.state))
+            jac = ph.Njac(*y)
+            for i in range(len(y)):
+                eps = 1e-6 * max(np.abs(y[i]),1e-3 * np.max(np.abs(y)))
+                dy = np.zeros(len(y))
+                dy[i] = eps
+                fd = (ph.Nflow(*(y + dy)) - ph.Nflow(*(y - dy))) / (2 * eps)
+                np.testing.assert_allclose(jac[:,i],fd,rtol=1e-5,atol=1e-6 * np.max(np.abs(jac)))
+            ph.integrate(10.)
+        np.testing.assert_allclose(
+            pham.state_to_list(pham.state),
+            pham_jac.state_to_list(pham_jac.state),
+            rtol=1e-12,atol=1e-15
+        )
+
+    def test_integrate_ensemble(self):
+        pham = self.get_pham(get_pvars(),False)
+        y0 = pham.state_to_list(pham.state)
+        Y0 = np.array([y0, y0 * (1 + 1e-3)])
+        times = np.array([0., 5., 10.])
+        states = pham.integrate_ensemble(Y0,times)
+        self.assertEqual(states.shape,(2,3,len(y0)))
+        np.testing.assert_allclose(states[:,0],Y0)
+        for i in range(2):
+            pham.update_state_from_list(pham.state,Y0[i])
+            pham._update()
+            pham.integrate(times[-1])
+            y = pham.state_to_list(pham.state)
+            np.testing.assert_allclose(states[i,-1],y,rtol=1e-8,atol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
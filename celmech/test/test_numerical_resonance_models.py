@@ -0,0 +1,102 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import pytest
+theano = pytest.importorskip('theano')
+from celmech.numerical_resonance_models import PlanarResonanceEquations
+from celmech.theano_ops.function_cache import clear_function_cache
+
+class TestNumericalResonanceModels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_path = tempfile.mkdtemp()
+        cls._env = os.environ.get('CELMECH_THEANO_FUNCTION_CACHE')
+        os.environ['CELMECH_THEANO_FUNCTION_CACHE'] = cls.cache_path
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls._env is None:
+            del os.environ['CELMECH_THEANO_FUNCTION_CACHE']
+        else:
+            os.environ['CELMECH_THEANO_FUNCTION_CACHE'] = cls._env
+        shutil.rmtree(cls.cache_path)
+
+    def setUp(self):
+        self.pre = PlanarResonanceEquations(3,1,n_quad_pts = 20,m1 = 1e-5,m2 = 2e-5)
+        orbels = {'a1':self.pre.alpha,'e1':0.05,'theta1':0.3,'a2':1.,'e2':0.03,'theta2':2.}
+        self.z = self.pre.orbital_elements_to_dyvars(orbels)
+
+    def test_function_cache(self):
+        pre2 = PlanarResonanceEquations(5,2,n_quad_pts = 20,m1 = 3e-5,m2 = 1e-5,K1 = 10.)
+        self.assertIs(pre2._funcs,self.pre._funcs)
+
+    def test_lazy_compilation(self):
+        clear_function_cache(disk = True, path = self.cache_path)
+        pre = PlanarResonanceEquations(3,1,n_quad_pts = 20)
+        self.assertEqual(pre._funcs.compiled_functions,[])
+        pre.H(self.z)
+        self.assertEqual(pre._funcs.compiled_functions,['H'])
+        pre.H_flow(self.z)
+        self.assertEqual(sorted(pre._funcs.compiled_functions),['H','H_flow'])
+
+    def test_batch_evaluation(self):
+        np.random.seed(0)
+        zs = self.z + 1e-3 * np.random.randn(5,self.z.size)
+        for method in (self.pre.H,self.pre.H_kep,self.pre.H_pert,self.pre.H_flow,self.pre.H_flow_jac,self.pre.flow,self.pre.flow_jac):
+            batch = method(zs)
+            loop = np.array([method(z) for z in zs])
+            self.assertTrue(np.allclose(batch,loop,rtol=1e-12,atol=0))
+        els_batch = self.pre.dyvars_to_orbital_elements(zs)
+        for key,val in els_batch.items():
+            loop = np.array([self.pre.dyvars_to_orbital_elements(z)[key] for z in zs])
+            self.assertTrue(np.allclose(val,loop,rtol=1e-12,atol=0))
+
+    def test_interpolation_table(self):
+        pre = PlanarResonanceEquations(3,1,n_quad_pts = 20,m1 = 1e-5,m2 = 2e-5)
+        table = pre.build_interpolation_table(ecc_max = 0.1)
+        np.random.seed(1)
+        zs = self.z + 1e-3 * np.random.randn(5,self.z.size)
+        els = pre.dyvars_to_orbital_elements(zs)
+        self.assertTrue(table.contains(els['a1'] / els['a2'],els['e1'],els['e2']))
+        flow_interp = pre.H_flow(zs)
+        flow_quad = self.pre.H_flow(zs)
+        scale = np.max(np.abs(flow_quad))
+        self.assertTrue(np.allclose(flow_interp,flow_quad,rtol=0,atol=1e-6 * scale))
+        orbels = {'a1':pre.alpha,'e1':0.15,'theta1':0.3,'a2':1.,'e2':0.03,'theta2':2.}
+        with self.assertRaises(ValueError):
+            pre.integrate_initial_conditions(pre.orbital_elements_to_dyvars(orbels),np.linspace(0,10,3))
+
+    def test_interpolation_table_first_order(self):
+        pre = PlanarResonanceEquations(2,1,n_quad_pts = 20,m1 = 1e-5,m2 = 2e-5)
+        pre_quad = PlanarResonanceEquations(2,1,n_quad_pts = 20,m1 = 1e-5,m2 = 2e-5)
+        table = pre.build_interpolation_table(ecc_max = 0.1,tolerance = 1e-6)
+        self.assertLessEqual(table.max_error,table.tolerance)
+        orbels = {'a1':pre.alpha,'e1':0.05,'theta1':0.3,'a2':1.,'e2':0.03,'theta2':2.}
+        z = pre.orbital_elements_to_dyvars(orbels)
+        Hpert = pre.H_pert(z)
+        Hpert_quad = pre_quad.H_pert(z)
+        self.assertLess(np.abs(Hpert - Hpert_quad),1e-6 * np.abs(Hpert_quad))
+
+    def test_adaptive_quadrature(self):
+        tolerance = 1e-10
+        pre = PlanarResonanceEquations(3,1,m1 = 1e-5,m2 = 2e-5,quadrature_tolerance = tolerance)
+        pre_ref = PlanarResonanceEquations(3,1,n_quad_pts = 200,m1 = 1e-5,m2 = 2e-5)
+        for e1,e2 in [(0.01,0.02),(0.05,0.03),(0.2,0.15)]:
+            orbels = {'a1':pre.alpha,'e1':e1,'theta1':0.3,'a2':1.,'e2':e2,'theta2':2.}
+            z = pre.orbital_elements_to_dyvars(orbels)
+            N = pre.set_quadrature_resolution(z)
+            self.assertTrue(pre.min_quad_pts <= N <= pre.max_quad_pts)
+            Hpert = pre.H_pert(z)
+            Hpert_ref = pre_ref.H_pert(z)
+            self.assertLess(np.abs(Hpert - Hpert_ref),10 * tolerance * np.abs(Hpert_ref))
+        # The quadrature rule is held fixed during integration
+        N = pre.set_quadrature_resolution(self.z)
+        soln = pre.integrate_initial_conditions(self.z,np.linspace(0,10,5))
+        self.assertGreaterEqual(pre._adaptive_quad_pts,N)
+        soln_ref = pre_ref.integrate_initial_conditions(self.z,np.linspace(0,10,5))
+        self.assertTrue(np.allclose(soln['dynamical_variables'],soln_ref['dynamical_variables'],rtol=1e-6,atol=1e-9))
+
+if __name__ == '__main__':
+    unittest.main()
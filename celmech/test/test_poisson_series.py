@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from celmech.poisson_series import DFTermSeries, DFTermSeriesGroup
+from celmech.disturbing_function import ResonanceTermsList
+
+class TestPoissonSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.terms = ResonanceTermsList(3,1,1,3)
+        self.args = (1,1e-5,2e-5,1,1,1e-5 * np.sqrt(0.7),2e-5)
+        self.series = DFTermSeries.from_resonance_list(self.terms,*self.args)
+        np.random.seed(0)
+        N = 10
+        self.lambda_arr = np.random.uniform(-np.pi,np.pi,(N,2))
+        self.xy_arr = 0.05 * (np.random.randn(N,4) + 1j * np.random.randn(N,4))
+
+    def test_batch_evaluation(self):
+        series = self.series
+        H = series.evaluate_batch(self.lambda_arr,self.xy_arr)
+        H_d,derivs = series.evaluate_with_derivs_batch(self.lambda_arr,self.xy_arr)
+        H_j,derivs_j,jac_qp,jac_xy = series.evaluate_with_jacobian_batch(self.lambda_arr,self.xy_arr)
+        for i,(l,xy) in enumerate(zip(self.lambda_arr,self.xy_arr)):
+            self.assertAlmostEqual(H[i],series._evaluate(l,xy),delta = 1e-14 * np.abs(H[i]))
+            val,der = series._evaluate_with_derivs(l,xy)
+            self.assertAlmostEqual(H_d[i],val,delta = 1e-14 * np.abs(val))
+            self.assertTrue(np.allclose(derivs[i],der,rtol = 1e-12,atol = 0))
+            val,der,jqp,jxy = series._evaluate_with_jacobian(l,xy)
+            self.assertAlmostEqual(H_j[i],val,delta = 1e-14 * np.abs(val))
+            self.assertTrue(np.allclose(derivs_j[i],der,rtol = 1e-12,atol = 0))
+            self.assertTrue(np.allclose(jac_qp[i],jqp,rtol = 1e-12,atol = 1e-12 * np.max(np.abs(jqp))))
+            self.assertTrue(np.allclose(jac_xy[i],jxy,rtol = 1e-12,atol = 1e-12 * np.max(np.abs(jxy))))
+
+    def test_from_arrays(self):
+        series = self.series
+        Lambda0In,Lambda0Out = self.args[-2:]
+        series_arr = DFTermSeries.from_arrays(
+            np.asfortranarray(series.k_arr.astype(np.int64)),
+            np.asfortranarray(series.z_arr.astype(np.int64)),
+            list(series.coeff_arr),
+            Lambda0In,
+            Lambda0Out
+        )
+        self.assertEqual((series_arr.kmax,series_arr.Nmax),(series.kmax,series.Nmax))
+        for l,xy in zip(self.lambda_arr,self.xy_arr):
+            val,der,jqp,jxy = series._evaluate_with_jacobian(l,xy)
+            val_a,der_a,jqp_a,jxy_a = series_arr._evaluate_with_jacobian(l,xy)
+            self.assertEqual(val,val_a)
+            self.assertTrue(np.array_equal(der,der_a))
+            self.assertTrue(np.array_equal(jqp,jqp_a))
+            self.assertTrue(np.array_equal(jxy,jxy_a))
+
+    def test_workspace(self):
+        series = self.series
+        ws = series.new_workspace()
+        for l,xy in zip(self.lambda_arr,self.xy_arr):
+            self.assertEqual(series._evaluate(l,xy,workspace = ws),series._evaluate(l,xy))
+            val,der = series._evaluate_with_derivs(l,xy,workspace = ws)
+            val0,der0 = series._evaluate_with_derivs(l,xy)
+            self.assertEqual(val,val0)
+            self.assertTrue(np.array_equal(der,der0))
+        small = DFTermSeries.from_resonance_list(ResonanceTermsList(3,1,1,1),*self.args)
+        with self.assertRaises(ValueError):
+            series._evaluate(self.lambda_arr[0],self.xy_arr[0],workspace = small.new_workspace())
+
+    def test_series_group(self):
+        series2 = DFTermSeries.from_resonance_list(ResonanceTermsList(2,1,1,2),*self.args)
+        group = DFTermSeriesGroup([self.series,series2])
+        lambda_arr = self.lambda_arr[:2]
+        xy_arr = self.xy_arr[:2]
+        H = group.evaluate(lambda_arr,xy_arr)
+        H_d,derivs = group.evaluate_with_derivs(lambda_arr,xy_arr)
+        self.assertFalse(np.shares_memory(H,H_d))
+        for i,series in enumerate((self.series,series2)):
+            val,der = series._evaluate_with_derivs(lambda_arr[i],xy_arr[i])
+            self.assertAlmostEqual(H[i],val,delta = 1e-14 * np.abs(val))
+            self.assertAlmostEqual(H_d[i],val,delta = 1e-14 * np.abs(val))
+            self.assertTrue(np.allclose(derivs[i],der,rtol = 1e-12,atol = 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,12 @@ from celmech.disturbing_function import SecularTermsList
 import rebound as rb
 import numpy as np
 from celmech.nbody_simulation_utilities import align_simulation
-from celmech.secular import SecularSystemSimulation
+from celmech.secular import SecularSystemSimulation, SecularSystemEnsemble, SecularSystemRKIntegrator
+from celmech.secular import LaplaceLagrangeSystem, LaplaceLagrangeEnsemble
 from celmech import Poincare,PoincareHamiltonian
+from celmech.symplectic_evolution_operators import SecularDFTermsEvolutionOperator
 from sympy import S 
+from scipy.linalg import expm
 
 def get_sim(scale= 0.05,Nplanet = 3):
     sim = rb.Simulation()
@@ -49,6 +52,133 @@ class TestSecular(unittest.TestCase):
         for q1,q2 in zip(pham_nderivs,sec_df_nderivs):
             self.assertAlmostEqual(q1,q2,delta = delta)
 
+    def test_jacobian(self):
+        terms = {(tuple(k),tuple(z)):(-1)**i * 1e-10 * (i+1) for i,(k,z) in enumerate(SecularTermsList(2,4))}
+        terms_dict = {(i,j):terms for j in range(2,self.pvars.N) for i in range(1,j)}
+        op = SecularDFTermsEvolutionOperator(self.pvars,1.,terms_dict)
+        state_vec = self.pham.state_to_list(self.pvars)
+        qpvec = op.state_vec_to_qp_vec(state_vec)
+        derivs,jac = op.deriv_and_jacobian_from_qp_vec(qpvec)
+        np.testing.assert_allclose(derivs,op.deriv_from_qp_vec(qpvec),rtol=1e-14)
+        eps = 1e-6 * np.max(np.abs(qpvec))
+        for i in range(op.Ndim):
+            dqp = np.zeros(op.Ndim)
+            dqp[i] = eps
+            fd = (op.deriv_from_qp_vec(qpvec + dqp) - op.deriv_from_qp_vec(qpvec - dqp)) / (2 * eps)
+            np.testing.assert_allclose(jac[:,i],fd,rtol=1e-5,atol=1e-6 * np.max(np.abs(jac)))
+
+    def test_simplified_newton(self):
+        op = self.secular_sim.nonlinearSecOp
+        qpvec = op.state_vec_to_qp_vec(self.pham.state_to_list(self.pvars))
+        qp_newton = qpvec.copy()
+        qp_simplified = qpvec.copy()
+        for _ in range(3):
+            op.rk_root_method = 'Newton'
+            qp_newton = op.rk_step(qp_newton)
+            op.rk_root_method = 'simplified-Newton'
+            qp_simplified = op.rk_step(qp_simplified)
+            np.testing.assert_allclose(qp_simplified,qp_newton,rtol=0,atol=1e-13 * np.max(np.abs(qpvec)))
+
+    def test_operator_matrices(self):
+        linOp = self.secular_sim.linearSecOp
+        for dt in (self.secular_sim.dt, -0.3 * self.secular_sim.dt):
+            ecc_op,inc_op = linOp.operator_matrices(dt)
+            np.testing.assert_allclose(ecc_op,expm(-1j * dt * linOp.ecc_matrix),rtol=0,atol=1e-13)
+            np.testing.assert_allclose(inc_op,expm(-1j * dt * linOp.inc_matrix),rtol=0,atol=1e-13)
+
+    def test_integrate_times(self):
+        times = self.secular_sim.dt * np.array([0.5,2.5,2.7,6.5])
+        secular_sim2 = SecularSystemSimulation(self.pvars.copy(),dtFraction = 1/50.,max_order = 4)
+        results = self.secular_sim.integrate(times)
+        for time,t,state in zip(times,results['time'],results['state']):
+            if time > secular_sim2.t:
+                secular_sim2.integrate(time)
+            self.assertAlmostEqual(t,secular_sim2.t,delta = 1e-12 * t)
+            np.testing.assert_allclose(state,secular_sim2.state_vector,rtol=1e-12,atol=1e-15)
+        self.assertEqual(self.secular_sim.t,results['time'][-1])
+        np.testing.assert_allclose(self.secular_sim.state_vector,results['state'][-1],rtol=1e-15)
+
+    def test_exact_finish_time(self):
+        times = self.secular_sim.dt * np.array([0.3,2.5,2.7])
+        pvars0 = self.pvars.copy()
+        results = self.secular_sim.integrate(times,exact_finish_time = True)
+        np.testing.assert_array_equal(results['time'],times)
+        self.assertEqual(self.secular_sim.t,times[-1])
+        for time,state in zip(times,results['state']):
+            secular_sim2 = SecularSystemSimulation(pvars0.copy(),dtFraction = 1/50.,max_order = 4)
+            secular_sim2.dt = time / np.ceil(20 * time / self.secular_sim.dt)
+            secular_sim2.integrate(time)
+            ref = secular_sim2.state_vector.reshape(-1,6)
+            err = np.max(np.abs(state.reshape(-1,6) - ref),axis=0)
+            np.testing.assert_array_less(err,1e-3 * np.max(np.abs(ref),axis=0) + 1e-15)
+
+    def test_laplace_lagrange_ensemble(self):
+        pvars_list = [self.pvars, Poincare.from_Simulation(get_sim())]
+        ensemble = LaplaceLagrangeEnsemble.from_Poincare_list(pvars_list)
+        times = np.linspace(0,10,5) * np.max(ensemble.Tsec)
+        solution = ensemble.secular_solution(times)
+        for i,pvars in enumerate(pvars_list):
+            llsys = LaplaceLagrangeSystem.from_Poincare(pvars)
+            for mtrx,ens_mtrx in ((llsys.Neccentricity_matrix,ensemble.Neccentricity_matrix[i]),(llsys.Ninclination_matrix,ensemble.Ninclination_matrix[i])):
+                np.testing.assert_allclose(ens_mtrx,mtrx,rtol=1e-12,atol=1e-14 * np.max(np.abs(mtrx)))
+            llsoln = llsys.secular_solution(times)
+            for key in ('eta','kappa','rho','sigma','e','inc'):
+                np.testing.assert_allclose(solution[key][i],llsoln[key],rtol=0,atol=1e-9 * np.max(np.abs(llsoln[key])))
+
+    def test_megno(self):
+        tangent = np.random.normal(size = 6 * (self.pvars.N - 1))
+        tangent.reshape(-1,6)[:,2:4] = 0
+        tangent /= np.linalg.norm(tangent)
+        eps = 1e-6 * np.max(np.abs(self.secular_sim.state_vector.reshape(-1,6)[:,[0,1,4,5]]))
+        dt = self.secular_sim.dt
+        for exact_finish_time,corrector in [(False,False),(True,False),(False,True),(True,True)]:
+            sim1 = SecularSystemSimulation(self.pvars.copy(),dt = dt,max_order = 4)
+            sim2 = SecularSystemSimulation(self.pvars.copy(),dt = dt,max_order = 4)
+            sim2.update_state_from_vector(sim2.state_vector + eps * tangent)
+            sim1.init_megno(tangent)
+            for time in (4.5 * dt,10.5 * dt):
+                sim1.integrate(time,exact_finish_time = exact_finish_time,corrector = corrector)
+                sim2.integrate(time,exact_finish_time = exact_finish_time,corrector = corrector)
+                self.assertEqual(sim1.t,sim2.t)
+                fd = (sim2.state_vector - sim1.state_vector) / eps
+                # Correctors change the length of the tangent vector by a 
+                # bounded factor that is not included in the exponent.
+                delta = 1e-4 if corrector else 1e-6
+                self.assertAlmostEqual(sim1.lyapunov() * sim1.t,np.log(np.linalg.norm(fd)),delta = delta)
+                self.assertTrue(np.isfinite(sim1.megno()))
+
+    def test_adaptive_rk(self):
+        adaptive = SecularSystemRKIntegrator(self.pvars.copy(),dtFraction = 1/20.,adaptive = True,error_rtol = 1e-9)
+        fixed = SecularSystemRKIntegrator(self.pvars.copy(),dtFraction = 1/200.,DFOp_kwargs = {'rkmethod':'GL6'})
+        times = adaptive.Tsec * np.array([0.013,0.2,0.5])
+        dt0 = adaptive.dt
+        results = adaptive.integrate(times)
+        self.assertEqual(adaptive.dt,dt0)
+        self.assertEqual(adaptive.nonlinearSecOp.dt,dt0)
+        np.testing.assert_array_equal(results['time'],times)
+        self.assertEqual(adaptive.t,times[-1])
+        self.assertGreater(adaptive.Nsteps_accepted,0)
+        for time,state in zip(times,results['state']):
+            fixed.integrate(time,exact_finish_time = True)
+            self.assertEqual(fixed.t,time)
+            ref = fixed.state_vector.reshape(-1,6)
+            err = np.max(np.abs(state.reshape(-1,6) - ref),axis=0)
+            np.testing.assert_array_less(err,1e-6 * np.max(np.abs(ref),axis=0) + 1e-15)
+
+    def test_ensemble(self):
+        systems = [self.sim, self.pvars.copy()]
+        times = self.secular_sim.dt * np.array([0.5,3.5,7.5])
+        progress = []
+        with SecularSystemEnsemble(systems,processes=2,dtFraction = 1/50.,max_order = 4) as ensemble:
+            results = ensemble.integrate(times,progress=lambda Ndone,Ntotal,result: progress.append(Ndone))
+        self.assertEqual(sorted(progress),[1,2])
+        self.assertEqual(results['errors'],{})
+        self.assertEqual(results['state'].shape,(2,3,18))
+        for time,state in zip(times,results['state'][1]):
+            self.secular_sim.integrate(time)
+            np.testing.assert_allclose(state,self.secular_sim.state_vector,rtol=1e-12,atol=1e-15)
+        np.testing.assert_allclose(results['state'][0],results['state'][1],rtol=1e-10,atol=1e-15)
+
 
 if __name__=='__main__':
     unittest.main()
@@ -0,0 +1,226 @@
+"""
+Process-wide and on-disk caches of compiled Theano functions.
+
+The numerical resonance models in :mod:`celmech.numerical_resonance_models`
+compile their equations of motion with Theano. The compiled functions depend
+only on the model type and the number of quadrature points, so they are 
+shared between model instances and pickled to disk. Theano is only required
+once functions are compiled.
+"""
+import os
+import pickle
+import warnings
+from collections.abc import Mapping
+from ..celmech_version import __version__
+try:
+    import theano
+except ImportError:
+    theano = None
+
+def _floatX():
+    return theano.config.floatX if theano is not None else 'float64'
+
+def _theano_version():
+    return theano.__version__ if theano is not None else 'none'
+
+# Process-wide cache of lazily compiled Theano function dictionaries
+# keyed by (model type, n_quad_pts, dtype).
+_compiled_functions_cache = dict()
+
+def default_function_cache_path():
+    """
+    Get the default location of the on-disk cache of compiled
+    Theano functions used by the numerical resonance models.
+    The location can be set with the environment variable
+    ``CELMECH_THEANO_FUNCTION_CACHE``. Otherwise, the cache is placed in
+    ``~/.celmech/theano_functions``.
+
+    Returns
+    -------
+    path : str
+    """
+    path = os.environ.get('CELMECH_THEANO_FUNCTION_CACHE')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'),'.celmech','theano_functions')
+    return path
+
+def _function_cache_dir(key,path):
+    model,size,dtype = key
+    if isinstance(size,tuple):
+        size = "x".join(str(n) for n in size)
+    dirname = "{}_{}_{}_celmech-{}_theano-{}".format(
+        model,size,dtype,__version__,_theano_version()
+    )
+    return os.path.join(path,dirname)
+
+class LazyTheanoFunctions(Mapping):
+    """
+    A read-only dictionary of Theano functions that are compiled 
+    the first time they are accessed and then memoized.
+
+    The symbolic graph of the model is only built when the first 
+    function that is not found in the on-disk cache is requested. 
+    Each compiled function is pickled to its own file in the 
+    on-disk cache so that other processes only load the functions 
+    they use.
+
+    Arguments
+    ---------
+    key : tuple
+        Tuple (model type, n_quad_pts, dtype) identifying the model.
+    function_names : list of str
+        Names of the functions provided by the model.
+    build_graph : callable
+        Function called with the argument 'n_quad_pts' that returns
+        a tuple (graph, givens). 'graph' is a dictionary mapping each
+        function name to a tuple (inputs, outputs) and 'givens' is
+        passed to theano.function.
+    use_disk_cache : bool, optional
+        If True (default), read and write compiled functions from and to
+        the on-disk cache.
+    path : str, optional
+        Directory of the on-disk cache. By default, the path
+        returned by :func:`default_function_cache_path` is used.
+    """
+    def __init__(self,key,function_names,build_graph,use_disk_cache=True,path=None):
+        self.key = key
+        self._function_names = tuple(function_names)
+        self._build_graph = build_graph
+        self._graph = None
+        self._givens = None
+        self._compiled = dict()
+        self.use_disk_cache = use_disk_cache
+        if path is None:
+            path = default_function_cache_path()
+        self.cache_dir = _function_cache_dir(key,path)
+
+    def __getitem__(self,name):
+        try:
+            return self._compiled[name]
+        except KeyError:
+            pass
+        if name not in self._function_names:
+            raise KeyError(name)
+        func = None
+        cache_file = os.path.join(self.cache_dir,"{}.pkl".format(name))
+        if self.use_disk_cache and os.path.isfile(cache_file):
+            try:
+                with open(cache_file,'rb') as fi:
+                    func = pickle.load(fi)
+            except Exception as err:
+                warnings.warn("Unable to load compiled function from {}: {}".format(cache_file,err))
+        if func is None:
+            func = self._compile(name)
+            if self.use_disk_cache:
+                self._save(func,cache_file)
+        self._compiled[name] = func
+        return func
+
+    def __iter__(self):
+        return iter(self._function_names)
+
+    def __len__(self):
+        return len(self._function_names)
+
+    @property
+    def compiled_functions(self):
+        """
+        Names of the functions that have been compiled or loaded so far.
+        """
+        return list(self._compiled.keys())
+
+    def _compile(self,name):
+        if self._graph is None:
+            self._graph,self._givens = self._build_graph(self.key[1])
+        inputs,outputs = self._graph[name]
+        return theano.function(
+            inputs=inputs,
+            outputs=outputs,
+            givens=self._givens,
+            on_unused_input='ignore'
+        )
+
+    def _save(self,func,cache_file):
+        try:
+            os.makedirs(self.cache_dir,exist_ok=True)
+            # Write to a temporary file first so that concurrent
+            # processes never read a partially written pickle.
+            tmp_file = "{}.{}.tmp".format(cache_file,os.getpid())
+            with open(tmp_file,'wb') as fi:
+                pickle.dump(func,fi,protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file,cache_file)
+        except Exception as err:
+            warnings.warn("Unable to save compiled function to {}: {}".format(cache_file,err))
+
+def get_cached_theano_functions(model,n_quad_pts,function_names,build_graph,use_disk_cache=True,path=None):
+    """
+    Get the dictionary of compiled Theano functions for a numerical
+    resonance model. 
+    
+    The functions depend only on the model type, the number
+    of quadrature points, and the floating-point type set by
+    ``theano.config.floatX`` so that models with different values
+    of j, k, planet masses, or damping parameters share a single
+    process-wide :class:`LazyTheanoFunctions` dictionary. Individual
+    functions are compiled the first time they are accessed, unless 
+    they are found in the on-disk cache. Pickles written by a 
+    different version of celmech or Theano are ignored.
+
+    Arguments
+    ---------
+    model : str
+        Name of the model type (e.g., 'planar' or 'spatial').
+    n_quad_pts : int or tuple
+        Number of quadrature points used in the averaging integrals or, 
+        for models that interpolate tabulated averages, the shape of 
+        the table.
+    function_names : list of str
+        Names of the functions provided by the model.
+    build_graph : callable
+        Function called with the argument 'n_quad_pts' that returns
+        the symbolic graph of the model. See :class:`LazyTheanoFunctions`.
+    use_disk_cache : bool, optional
+        If True (default), read and write compiled functions from and to
+        the on-disk cache.
+    path : str, optional
+        Directory of the on-disk cache. By default, the path
+        returned by :func:`default_function_cache_path` is used.
+
+    Returns
+    -------
+    LazyTheanoFunctions :
+        Dictionary of compiled Theano functions.
+    """
+    if not isinstance(n_quad_pts,tuple):
+        n_quad_pts = int(n_quad_pts)
+    key = (model,n_quad_pts,_floatX())
+    try:
+        return _compiled_functions_cache[key]
+    except KeyError:
+        pass
+    funcs = LazyTheanoFunctions(key,function_names,build_graph,use_disk_cache=use_disk_cache,path=path)
+    _compiled_functions_cache[key] = funcs
+    return funcs
+
+def clear_function_cache(disk=False,path=None):
+    """
+    Clear the process-wide cache of compiled Theano functions.
+
+    Arguments
+    ---------
+    disk : bool, optional
+        If True, also delete the pickled functions from the
+        on-disk cache. Default is False.
+    path : str, optional
+        Directory of the on-disk cache. By default, the path
+        returned by :func:`default_function_cache_path` is used.
+    """
+    _compiled_functions_cache.clear()
+    if disk:
+        if path is None:
+            path = default_function_cache_path()
+        if os.path.isdir(path):
+            for root,dirs,files in os.walk(path):
+                for fname in files:
+                    if fname.endswith('.pkl'):
+                        os.remove(os.path.join(root,fname))
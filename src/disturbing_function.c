@@ -12,6 +12,7 @@
 #include <stdlib.h>
 #include <stdio.h>
 #include <assert.h>
+#include <float.h>
 
 #define STRINGIFY(s) str(s)
 #define str(s) #s
@@ -196,3 +197,211 @@ double laplace(double s, int i, int j, double a)
 
   return(sum);
 }
+
+/* Vectorized Laplace coefficients and their derivatives 
+
+          n
+         d     (j)
+        ---   b  (a)
+          n    s
+        da
+
+   for an array of semi-major axis ratios a. Writing 
+
+     (j)              j
+    b  (a) = K(s,j) a  F(s, s + j; j + 1; a^2)
+     s
+
+   with K(s,j) = 2 (s)_j / j!, coefficients with a < alpha_switch are 
+   computed by summing the derivative of the hypergeometric series 
+   term by term to machine precision. 
+   
+   For a >= alpha_switch and half-integer s, where the series converges 
+   slowly, the coefficients with s = 1/2 are computed from complete 
+   elliptic integrals and raised to larger j and s with the recurrence 
+   relations of Murray & Dermott (1999, Eqs. 6.68 and 6.69). The first 
+   derivative is obtained from M&D Eq. 6.70 and higher derivatives from 
+   the hypergeometric differential equation satisfied by F. */
+
+#define LAPLACE_SERIES_MAX_TERMS 10000000
+
+static double laplace_prefactor(double s, int j)
+{
+  double K = 2.0;
+  int k;
+  for(k=0;k<j;k++)
+    K *= (s + k) / (k + 1.0);
+  return K;
+}
+
+static double laplace_b_series(double s, int j, int n, double a)
+{
+  double c = 1.0, term, ratio, sum = 0.0, old_term = 0.0, as = a * a, apow = 0.0;
+  int k,p,q;
+  if(a == 0.0)
+    {
+      /* only the term proportional to a^n contributes */
+      if(n < j || (n - j) % 2) return 0.0;
+      for(q=0;q<(n-j)/2;q++)
+        c *= (s + q) * (s + j + q) / ((j + 1.0 + q) * (q + 1.0));
+      for(k=2;k<=n;k++)
+        c *= k;
+      return laplace_prefactor(s,j) * c;
+    }
+  for(q=0;q<LAPLACE_SERIES_MAX_TERMS;q++)
+    {
+      /* term = c_q * d^n/da^n a^(2q + j) */
+      p = 2 * q + j;
+      if(p >= n)
+        {
+          apow = (apow == 0.0) ? pow(a, (double) (p - n)) : apow * as;
+          term = c * apow;
+          for(k=0;k<n;k++)
+            term *= (p - k);
+          sum += term;
+          /* remainder of the series is bounded by term * r / (1 - r) 
+             once the ratio r of successive terms is decreasing below 1 */
+          if(old_term > 0.0)
+            {
+              ratio = term / old_term;
+              if(ratio < 1.0 && term * ratio <= DBL_EPSILON * sum * (1.0 - ratio))
+                return laplace_prefactor(s,j) * sum;
+            }
+          old_term = term;
+        }
+      c *= (s + q) * (s + j + q) / ((j + 1.0 + q) * (q + 1.0));
+      if(c == 0.0)
+        return laplace_prefactor(s,j) * sum;
+    }
+  return NAN;
+}
+
+/* Complete elliptic integrals of the first and second kind with 
+   modulus k, computed with the arithmetic-geometric mean. */
+static void elliptic_KE(double k, double* K, double* E)
+{
+  double a = 1.0, b = sqrt(1.0 - k * k), c = k, an, pow2 = 0.5;
+  double csum = 0.5 * c * c;
+  int n;
+  for(n=0;n<64;n++)
+    {
+      an = 0.5 * (a + b);
+      c = 0.5 * (a - b);
+      b = sqrt(a * b);
+      a = an;
+      pow2 *= 2.0;
+      csum += pow2 * c * c;
+      if(fabs(c) <= DBL_EPSILON * a) break;
+    }
+  *K = PI / (2.0 * a);
+  *E = *K * (1.0 - csum);
+}
+
+/* Fill levels[L * (jmax + 1) + j] with b_{1/2 + L}^{(j)}(a) for 
+   L = 0,...,Nlevels - 1 and j = 0,...,jmax - L. Requires 0 < a < 1. */
+static void laplace_b_half_integer_levels(int Nlevels, int jmax, double a, double* levels)
+{
+  double K, E, s = 0.5, as = a * a;
+  double inv_one_minus_as_sq = 1.0 / ((1.0 - as) * (1.0 - as));
+  double* b = levels;
+  int L, j;
+  elliptic_KE(a, &K, &E);
+  b[0] = 4.0 * K / PI;
+  if(jmax > 0)
+    b[1] = 4.0 * (K - E) / (PI * a);
+  for(j=2;j<=jmax;j++)
+    b[j] = ((j - 1) * (a + 1.0 / a) * b[j-1] - (j + s - 2.0) * b[j-2]) / (j - s);
+  for(L=1;L<Nlevels;L++)
+    {
+      double* bnew = levels + L * (jmax + 1);
+      for(j=0;j<=jmax-L;j++)
+        bnew[j] = ((j + s) * (1.0 + as) * b[j] - 2.0 * (j - s + 1.0) * a * b[j+1]) * inv_one_minus_as_sq / s;
+      b = bnew;
+      s += 1.0;
+    }
+}
+
+static double binom_double(int n, int k)
+{
+  double val = 1.0;
+  int i;
+  for(i=1;i<=k;i++)
+    val *= (n - k + i) / ((double) i);
+  return val;
+}
+
+/* Derivative of b_s^(j) from the values b = b_s^(j)(a) and db = d/da b_s^(j)(a) 
+   using the hypergeometric equation. F holds n + 1 doubles of workspace. */
+static double laplace_b_deriv_from_ode(double s, int j, int n, double a, double b, double db, double* F)
+{
+  double A = s, B = s + j, C = j + 1.0;
+  double K = laplace_prefactor(s,j);
+  double aj = pow(a, (double) j);
+  double p2[4], p1[3], p0[2], tot, val, aj_deriv;
+  int k, i;
+  F[0] = b / (K * aj);
+  if(n == 0) return b;
+  F[1] = (db / K - j * (aj / a) * F[0]) / aj;
+  /* The equation a (1 - a^2) F'' + [2C - 1 - (2A + 2B + 1) a^2] F' - 4 A B a F = 0
+     and its derivatives give F^(k+2) in terms of lower derivatives. */
+  p2[0] = a - a * a * a; p2[1] = 1.0 - 3.0 * a * a; p2[2] = -6.0 * a; p2[3] = -6.0;
+  p1[0] = (2.0 * C - 1.0) - (2.0 * A + 2.0 * B + 1.0) * a * a; 
+  p1[1] = -2.0 * (2.0 * A + 2.0 * B + 1.0) * a; 
+  p1[2] = -2.0 * (2.0 * A + 2.0 * B + 1.0);
+  p0[0] = -4.0 * A * B * a; p0[1] = -4.0 * A * B;
+  for(k=0;k<=n-2;k++)
+    {
+      tot = 0.0;
+      for(i=1;i<=k && i<=3;i++)
+        tot += binom_double(k,i) * p2[i] * F[k+2-i];
+      for(i=0;i<=k && i<=2;i++)
+        tot += binom_double(k,i) * p1[i] * F[k+1-i];
+      for(i=0;i<=k && i<=1;i++)
+        tot += binom_double(k,i) * p0[i] * F[k-i];
+      F[k+2] = -tot / p2[0];
+    }
+  /* d^n/da^n [a^j F] */
+  val = 0.0;
+  aj_deriv = aj;
+  for(i=0;i<=n && i<=j;i++)
+    {
+      val += binom_double(n,i) * aj_deriv * F[n-i];
+      aj_deriv *= (j - i) / a;
+    }
+  return K * val;
+}
+
+void laplace_b_array(double s, int j, int n, const double* alpha, int Nalpha, double alpha_switch, double* out)
+{
+  int i, m, jmax = 0, Nlevels = 0;
+  double* levels = NULL;
+  double* F = NULL;
+  int half_integer_s;
+  if(j<0) j = -j;
+  m = (int) floor(s);
+  half_integer_s = (m >= 0) && (fabs(s - 0.5 - m) < 1e-12);
+  if(half_integer_s)
+    {
+      Nlevels = m + 2;
+      jmax = j + m + 2;
+      levels = (double*) malloc(sizeof(double) * Nlevels * (jmax + 1));
+      F = (double*) malloc(sizeof(double) * (n + 2));
+    }
+  for(i=0;i<Nalpha;i++)
+    {
+      double a = alpha[i];
+      if(half_integer_s && a >= alpha_switch && a > 0.0)
+        {
+          double* b0 = levels + m * (jmax + 1);
+          double* b1 = levels + (m + 1) * (jmax + 1);
+          double db;
+          laplace_b_half_integer_levels(Nlevels, jmax, a, levels);
+          db = s * (b1[abs(j - 1)] - 2.0 * a * b1[j] + b1[j + 1]);
+          out[i] = laplace_b_deriv_from_ode(s, j, n, a, b0[j], db, F);
+        }
+      else
+        out[i] = laplace_b_series(s, j, n, a);
+    }
+  if(levels) free(levels);
+  if(F) free(F);
+}
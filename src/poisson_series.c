@@ -9,21 +9,17 @@
 #define ZINDEX(n) (((n) + 2) % 4)
 #define ABS(n) (((n) >= 0 ) ? (n) : (-1 * n))
 #define INDEX(j,k) ( 8 * (j) + (k))
-typedef struct SeriesTerm {
-	int k[6];
-	int z[4];
-	double coeff;
-	struct SeriesTerm* next;
-} SeriesTerm;
-
-SeriesTerm* add_term(SeriesTerm* term,int k[6], int z[4]){
-	SeriesTerm* new_term = malloc(sizeof(SeriesTerm));
-	term->next = new_term;
-	for(int i=0;i<6;i++) new_term->k[i] = k[i];
-	for(int i=0;i<4;i++) new_term->z[i] = z[i];
-	return new_term->next;
-}
-
+/*
+ * Terms of a Poisson series stored as contiguous arrays. The n-th term
+ * has cosine argument coefficients k[6*n],...,k[6*n+5], exponents 
+ * z[4*n],...,z[4*n+3], and coefficient coeff[n].
+ */
+typedef struct SeriesTerms {
+	int Nterms;
+	const int* k;
+	const int* z;
+	const double* coeff;
+} SeriesTerms;
 
 double complex** get_complex_variables_arr(const int nrow, const int ncol){
 	double complex* values = calloc(nrow * ncol, sizeof(double complex));
@@ -49,26 +45,24 @@ void get_powers_array(complex double* var, complex double** var_pow ,const int n
 	}
 }
 
-complex double evaluate_term(SeriesTerm* term, complex double** exp_Il_arr, double complex** xy_arr){
-	const int* k = term->k;
+complex double evaluate_term(const int* k, const int* zvec, const double coeff, complex double** exp_Il_arr, double complex** xy_arr){
 	int z;
-	complex double product = term->coeff;
+	complex double product = coeff;
 	product *=  mypow(exp_Il_arr[1],k[0]);
 	product *=  mypow(exp_Il_arr[0],k[1]);
 	for(int i=0; i<4;i++){
 		product *= mypow(xy_arr[i],k[i+2]); 
-		z = term->z[ZINDEX(i)];
+		z = zvec[ZINDEX(i)];
 		product *= xy_arr[i][z] * conj(xy_arr[i][z]);
 	}
 	return product;
 }
 complex double evaluate_term_and_derivs
-(SeriesTerm* term, complex double** exp_Il_arr, double complex** xy_arr,
+(const int* k, const int* zvec, const double coeff, complex double** exp_Il_arr, double complex** xy_arr,
  complex double* deriv_wrt_xy,complex double* deriv_wrt_xybar){
-	const int* k = term->k;
 	int z,ki,xy_pow,xybar_pow;
 	complex double tmp;
-	complex double product = term->coeff;
+	complex double product = coeff;
 	product *=  mypow(exp_Il_arr[1],k[0]);
 	product *=  mypow(exp_Il_arr[0],k[1]);
 	for (int i=0; i<4;i++){
@@ -76,7 +70,7 @@ complex double evaluate_term_and_derivs
 		deriv_wrt_xybar[i] = product;
 	}
 	for(int i=0; i<4;i++){
-		z = term->z[ZINDEX(i)];
+		z = zvec[ZINDEX(i)];
 		ki = k[i+2];
 		xy_pow = z + MAX(0,ki);
 		xybar_pow = z - MIN(0,ki);
@@ -95,12 +89,11 @@ complex double evaluate_term_and_derivs
 	return product;
 }
 complex double evaluate_term_and_jacobian
-(SeriesTerm* term, complex double** exp_Il_arr, double complex** xy_arr,
+(const int* k, const int* zvec, const double coeff, complex double** exp_Il_arr, double complex** xy_arr,
  complex double* deriv_wrt_xy,complex double* deriv_wrt_xybar,complex double* jacobian){
-	const int* k = term->k;
 	int z,ki,xy_pow,xybar_pow;
 	complex double tmp,D_tmp,DD_tmp,Dbar_tmp,DbarDbar_tmp,DDbar_tmp;
-	complex double product = term->coeff;
+	complex double product = coeff;
 	product *=  mypow(exp_Il_arr[1],k[0]);
 	product *=  mypow(exp_Il_arr[0],k[1]);
 	for (int i=0; i<4;i++){
@@ -110,7 +103,7 @@ complex double evaluate_term_and_jacobian
 	for (int i=0;i<64;i++) jacobian[i]=product;
 	bool j_eq_i,k_eq_i;
 	for(int i=0; i<4;i++){
-		z = term->z[ZINDEX(i)];
+		z = zvec[ZINDEX(i)];
 		ki = k[i+2];
 		xy_pow = z + MAX(0,ki);
 		xybar_pow = z - MIN(0,ki);
@@ -151,19 +144,86 @@ complex double evaluate_term_and_jacobian
 	return product;
 }
 
+static complex double series_sum
+(const SeriesTerms* series, complex double** exp_Il_arr, double complex** xy_arr){
+	complex double sum = 0;
+	for(int n=0; n < series->Nterms; n++){
+		sum += evaluate_term(series->k + 6 * n,series->z + 4 * n,series->coeff[n],exp_Il_arr,xy_arr);
+	}
+	return sum;
+}
+static complex double series_sum_and_derivs
+(const SeriesTerms* series, complex double** exp_Il_arr, double complex** xy_arr,
+ complex double dxy_tot[4], complex double dxybar_tot[4]){
+	complex double sum = 0;
+	complex double dxy[4], dxybar[4];
+	for(int i=0; i<4;i++){
+		dxy_tot[i] = 0;
+		dxybar_tot[i] = 0;
+	}
+	for(int n=0; n < series->Nterms; n++){
+		sum += evaluate_term_and_derivs(series->k + 6 * n,series->z + 4 * n,series->coeff[n],exp_Il_arr,xy_arr,dxy,dxybar);
+		for(int i=0; i<4;i++){
+			dxy_tot[i]+=dxy[i];
+			dxybar_tot[i]+=dxybar[i];
+		}
+	}
+	return sum;
+}
+/*
+ * Sum the series, its derivatives, and its Jacobian. Only the 
+ * entries of the Jacobian computed by 'evaluate_term_and_jacobian' 
+ * are summed into 'jac_tot'; the full, symmetric 8x8 Jacobian is
+ * stored in 'jac_full'.
+ */
+static complex double series_sum_and_jacobian
+(const SeriesTerms* series, complex double** exp_Il_arr, double complex** xy_arr,
+ complex double dxy_tot[4], complex double dxybar_tot[4], complex double jac_tot[64],
+ complex double jac_full[64]){
+	complex double sum = 0;
+	complex double jac[64];
+	complex double dxy[4], dxybar[4];
+	for(int i=0; i<4;i++){
+		dxy_tot[i] = 0;
+		dxybar_tot[i] = 0;
+	}
+	for(int i=0; i < 64; i++) jac_tot[i] = 0;
+	for(int n=0; n < series->Nterms; n++){
+		sum += evaluate_term_and_jacobian(series->k + 6 * n,series->z + 4 * n,series->coeff[n],exp_Il_arr,xy_arr,dxy,dxybar,jac);
+		for(int i=0; i<4;i++){
+			dxy_tot[i]+=dxy[i];
+			dxybar_tot[i]+=dxybar[i];
+		}
+		for(int i=0; i < 64; i++) jac_tot[i] += jac[i];
+	}
+
+	for(int i=0; i<4;i++){
+		jac_full[INDEX(i,i)] = jac_tot[INDEX(i,i)];
+		jac_full[INDEX(i+4,i)] = jac_tot[INDEX(i+4,i)];
+		jac_full[INDEX(i,i+4)] = jac_tot[INDEX(i+4,i)];
+		jac_full[INDEX(i+4,i+4)] = jac_tot[INDEX(i+4,i+4)];
+		for(int j=0; j<i; j++){
+			jac_full[INDEX(i,j)] = jac_tot[INDEX(i,j)];
+			jac_full[INDEX(j,i)] = jac_tot[INDEX(i,j)];
+			jac_full[INDEX(i+4,j)] = jac_tot[INDEX(i+4,j)];
+			jac_full[INDEX(j,i+4)] = jac_tot[INDEX(i+4,j)];
+			jac_full[INDEX(i,j+4)] = jac_tot[INDEX(i,j+4)];
+			jac_full[INDEX(j+4,i)] = jac_tot[INDEX(i,j+4)];
+			jac_full[INDEX(i+4,j+4)] = jac_tot[INDEX(i+4,j+4)];
+			jac_full[INDEX(j+4,i+4)] = jac_tot[INDEX(i+4,j+4)];
+		}
+	}
+	return sum;
+}
+
 void evaluate_series
-(double complex exp_Il[2],double complex xy[4], SeriesTerm* first_term,const int kmax, const int Nmax,
+(double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,const int kmax, const int Nmax,
  double* re, double* im){
 	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
 	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
 	get_powers_array(xy,xy_arr,4,Nmax);
 	get_powers_array(exp_Il,exp_Il_arr,2,kmax);
-	SeriesTerm* term = first_term;
-	complex double sum = 0;
-	do{
-		sum += evaluate_term(term,exp_Il_arr,xy_arr);
-		term = term->next;
-	} while(term != 0);
+	complex double sum = series_sum(series,exp_Il_arr,xy_arr);
 
 	free_complex_variables_arr(xy_arr);
 	free_complex_variables_arr(exp_Il_arr);
@@ -171,25 +231,14 @@ void evaluate_series
 	*im = cimag(sum);
 }
 void evaluate_series_and_derivs
-(double complex exp_Il[2],double complex xy[4], SeriesTerm* first_term,const int kmax, const int Nmax,
+(double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,const int kmax, const int Nmax,
  double* re, double* im, double re_deriv_xy[4], double im_deriv_xy[4] ,double re_deriv_xybar[4], double im_deriv_xybar[4]){
 	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
 	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
 	get_powers_array(xy,xy_arr,4,Nmax);
 	get_powers_array(exp_Il,exp_Il_arr,2,kmax);
-	SeriesTerm* term = first_term;
-	complex double sum = 0;
-	complex double dxy_tot[4] = {0,0,0,0};
-	complex double dxybar_tot[4] = {0,0,0,0};
-	complex double dxy[4], dxybar[4];
-	do{
-		sum += evaluate_term_and_derivs(term,exp_Il_arr,xy_arr,dxy,dxybar);
-		for(int i=0; i<4;i++){
-			dxy_tot[i]+=dxy[i];
-			dxybar_tot[i]+=dxybar[i];
-		}
-		term = term->next;
-	} while(term != 0);
+	complex double dxy_tot[4], dxybar_tot[4];
+	complex double sum = series_sum_and_derivs(series,exp_Il_arr,xy_arr,dxy_tot,dxybar_tot);
 
 	for(int i=0; i<4;i++){
 		re_deriv_xy[i] = creal(dxy_tot[i]);
@@ -204,75 +253,177 @@ void evaluate_series_and_derivs
 	*im = cimag(sum);
 }
 void evaluate_series_and_jacobian
-(double complex exp_Il[2],double complex xy[4], SeriesTerm* first_term,const int kmax, const int Nmax,
+(double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,const int kmax, const int Nmax,
  double* re, double* im, double re_deriv_xy[4], double im_deriv_xy[4] ,double re_deriv_xybar[4], double im_deriv_xybar[4],
  double re_jacobian[64], double im_jacobian[64]){
 	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
 	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
 	get_powers_array(xy,xy_arr,4,Nmax);
 	get_powers_array(exp_Il,exp_Il_arr,2,kmax);
-	SeriesTerm* term = first_term;
-	complex double sum = 0;
-	complex double dxy_tot[4] = {0,0,0,0};
-	complex double dxybar_tot[4] = {0,0,0,0};
-	complex double* jac_tot = calloc(64 , sizeof(complex double));
-	complex double* jac = calloc(64 , sizeof(complex double));
-	complex double dxy[4], dxybar[4];
-	
-	do{
-		sum += evaluate_term_and_jacobian(term,exp_Il_arr,xy_arr,dxy,dxybar,jac);
-		for(int i=0; i<4;i++){
-			dxy_tot[i]+=dxy[i];
-			dxybar_tot[i]+=dxybar[i];
-		}
-		for(int i=0; i < 64; i++) jac_tot[i] += jac[i];
-		term = term->next;
-	} while(term != 0);
+	complex double dxy_tot[4], dxybar_tot[4];
+	complex double jac_tot[64], jac_full[64];
+	complex double sum = series_sum_and_jacobian(series,exp_Il_arr,xy_arr,dxy_tot,dxybar_tot,jac_tot,jac_full);
 
 	for(int i=0; i<4;i++){
 		re_deriv_xy[i] = creal(dxy_tot[i]);
 		re_deriv_xybar[i] = creal(dxybar_tot[i]);
 		im_deriv_xy[i] = cimag(dxy_tot[i]);
 		im_deriv_xybar[i] = cimag(dxybar_tot[i]);
+	}
+	for(int i=0; i<64;i++){
+		re_jacobian[i] = creal(jac_full[i]);
+		im_jacobian[i] = cimag(jac_full[i]);
+	}
+	free_complex_variables_arr(xy_arr);
+	free_complex_variables_arr(exp_Il_arr);
 
-		re_jacobian[INDEX(i,i)] = creal(jac_tot[INDEX(i,i)]);
-		im_jacobian[INDEX(i,i)] = cimag(jac_tot[INDEX(i,i)]);
-		re_jacobian[INDEX(i+4,i)] = creal(jac_tot[INDEX(i+4,i)]);
-		im_jacobian[INDEX(i+4,i)] = cimag(jac_tot[INDEX(i+4,i)]);
-		re_jacobian[INDEX(i,i+4)] =  re_jacobian[INDEX(i+4,i)] ;
-		im_jacobian[INDEX(i,i+4)] =  im_jacobian[INDEX(i+4,i)] ;
-		re_jacobian[INDEX(i+4,i+4)] = creal(jac_tot[INDEX(i+4,i+4)]);
-		im_jacobian[INDEX(i+4,i+4)] = cimag(jac_tot[INDEX(i+4,i+4)]);
-
-		for(int j=0; j<i; j++){
+	*re = creal(sum);
+	*im = cimag(sum);
+}
 
-			re_jacobian[INDEX(i,j)] = creal(jac_tot[INDEX(i,j)]);
-			im_jacobian[INDEX(i,j)] = cimag(jac_tot[INDEX(i,j)]);
+/*
+ * Batch versions of the functions above. The series is evaluated at
+ * N points with exp(i*lambda) values stored in 'exp_Il[2*N]' and 
+ * complex X,X',Y,Y' values stored in 'xy[4*N]'. Results are stored
+ * in 'sums[N]', 'derivs[8*N]' (derivatives w.r.t. the four variables
+ * followed by derivatives w.r.t. their complex conjugates), and 
+ * 'jacobians[64*N]'. Power tables are allocated once for all N points.
+ */
+void evaluate_series_batch
+(const int N, double complex* exp_Il, double complex* xy, const SeriesTerms* series,const int kmax, const int Nmax,
+ double complex* sums){
+	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
+	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
+	for(int n=0; n<N; n++){
+		get_powers_array(xy + 4 * n,xy_arr,4,Nmax);
+		get_powers_array(exp_Il + 2 * n,exp_Il_arr,2,kmax);
+		sums[n] = series_sum(series,exp_Il_arr,xy_arr);
+	}
+	free_complex_variables_arr(xy_arr);
+	free_complex_variables_arr(exp_Il_arr);
+}
+void evaluate_series_and_derivs_batch
+(const int N, double complex* exp_Il, double complex* xy, const SeriesTerms* series,const int kmax, const int Nmax,
+ double complex* sums, double complex* derivs){
+	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
+	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
+	for(int n=0; n<N; n++){
+		get_powers_array(xy + 4 * n,xy_arr,4,Nmax);
+		get_powers_array(exp_Il + 2 * n,exp_Il_arr,2,kmax);
+		sums[n] = series_sum_and_derivs(series,exp_Il_arr,xy_arr,derivs + 8 * n, derivs + 8 * n + 4);
+	}
+	free_complex_variables_arr(xy_arr);
+	free_complex_variables_arr(exp_Il_arr);
+}
+void evaluate_series_and_jacobian_batch
+(const int N, double complex* exp_Il, double complex* xy, const SeriesTerms* series,const int kmax, const int Nmax,
+ double complex* sums, double complex* derivs, double complex* jacobians){
+	complex double** xy_arr = get_complex_variables_arr(4,Nmax + 1);
+	complex double** exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
+	complex double jac_tot[64];
+	for(int n=0; n<N; n++){
+		get_powers_array(xy + 4 * n,xy_arr,4,Nmax);
+		get_powers_array(exp_Il + 2 * n,exp_Il_arr,2,kmax);
+		sums[n] = series_sum_and_jacobian(
+				series,exp_Il_arr,xy_arr,
+				derivs + 8 * n, derivs + 8 * n + 4,
+				jac_tot, jacobians + 64 * n
+		);
+	}
+	free_complex_variables_arr(xy_arr);
+	free_complex_variables_arr(exp_Il_arr);
+}
 
-			re_jacobian[INDEX(j,i)] = creal(jac_tot[INDEX(i,j)]);
-			im_jacobian[INDEX(j,i)] = cimag(jac_tot[INDEX(i,j)]);
+/*
+ * A workspace holding preallocated power tables so that repeated 
+ * evaluations of a series do not need to allocate memory. A workspace 
+ * must not be shared between threads evaluating series concurrently.
+ */
+typedef struct SeriesWorkspace {
+	int kmax;
+	int Nmax;
+	complex double** xy_arr;
+	complex double** exp_Il_arr;
+} SeriesWorkspace;
 
-			re_jacobian[INDEX(i+4,j)] = creal(jac_tot[INDEX(i+4,j)]);
-			im_jacobian[INDEX(i+4,j)] = cimag(jac_tot[INDEX(i+4,j)]);
-			re_jacobian[INDEX(j,i+4)] = creal(jac_tot[INDEX(i+4,j)]);
-			im_jacobian[INDEX(j,i+4)] = cimag(jac_tot[INDEX(i+4,j)]);
+SeriesWorkspace* alloc_series_workspace(const int kmax, const int Nmax){
+	SeriesWorkspace* ws = malloc(sizeof(SeriesWorkspace));
+	ws->kmax = kmax;
+	ws->Nmax = Nmax;
+	ws->xy_arr = get_complex_variables_arr(4,Nmax + 1);
+	ws->exp_Il_arr = get_complex_variables_arr(2,kmax + 1);
+	return ws;
+}
+void free_series_workspace(SeriesWorkspace* ws){
+	free_complex_variables_arr(ws->xy_arr);
+	free_complex_variables_arr(ws->exp_Il_arr);
+	free(ws);
+}
+static void fill_workspace(SeriesWorkspace* ws, double complex exp_Il[2],double complex xy[4]){
+	get_powers_array(xy,ws->xy_arr,4,ws->Nmax);
+	get_powers_array(exp_Il,ws->exp_Il_arr,2,ws->kmax);
+}
 
-			re_jacobian[INDEX(i,j+4)] = creal(jac_tot[INDEX(i,j+4)]);
-			im_jacobian[INDEX(i,j+4)] = cimag(jac_tot[INDEX(i,j+4)]);
-			re_jacobian[INDEX(j+4,i)] = creal(jac_tot[INDEX(i,j+4)]);
-			im_jacobian[INDEX(j+4,i)] = cimag(jac_tot[INDEX(i,j+4)]);
+/*
+ * Evaluate a series using the power tables of a workspace. Derivatives
+ * are stored in 'derivs[8]' (derivatives w.r.t. X,X',Y,Y' followed by 
+ * derivatives w.r.t. their complex conjugates) and the Jacobian in 
+ * 'jacobian[64]'.
+ */
+void evaluate_series_ws
+(SeriesWorkspace* ws, double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,
+ double complex* sum){
+	fill_workspace(ws,exp_Il,xy);
+	*sum = series_sum(series,ws->exp_Il_arr,ws->xy_arr);
+}
+void evaluate_series_and_derivs_ws
+(SeriesWorkspace* ws, double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,
+ double complex* sum, double complex derivs[8]){
+	fill_workspace(ws,exp_Il,xy);
+	*sum = series_sum_and_derivs(series,ws->exp_Il_arr,ws->xy_arr,derivs,derivs + 4);
+}
+void evaluate_series_and_jacobian_ws
+(SeriesWorkspace* ws, double complex exp_Il[2],double complex xy[4], const SeriesTerms* series,
+ double complex* sum, double complex derivs[8], double complex jacobian[64]){
+	complex double jac_tot[64];
+	fill_workspace(ws,exp_Il,xy);
+	*sum = series_sum_and_jacobian(series,ws->exp_Il_arr,ws->xy_arr,derivs,derivs + 4,jac_tot,jacobian);
+}
 
-			re_jacobian[INDEX(i+4,j+4)] = creal(jac_tot[INDEX(i+4,j+4)]);
-			im_jacobian[INDEX(i+4,j+4)] = cimag(jac_tot[INDEX(i+4,j+4)]);
-			re_jacobian[INDEX(j+4,i+4)] = creal(jac_tot[INDEX(i+4,j+4)]);
-			im_jacobian[INDEX(j+4,i+4)] = cimag(jac_tot[INDEX(i+4,j+4)]);
-		}
+/*
+ * Evaluate 'Nseries' series, the n-th at the point given by 
+ * 'exp_Il[2*n]' and 'xy[4*n]', using the power tables of a single 
+ * workspace. The workspace must be allocated with 'kmax' and 'Nmax' 
+ * at least as large as those of every series. Results for the n-th 
+ * series are stored in 'sums[n]', 'derivs[8*n]',...,'derivs[8*n+7]'
+ * and 'jacobians[64*n]',...,'jacobians[64*n+63]'.
+ */
+void evaluate_multi_series_ws
+(SeriesWorkspace* ws, const int Nseries, double complex* exp_Il, double complex* xy, const SeriesTerms* series,
+ double complex* sums){
+	for(int n=0; n<Nseries; n++){
+		fill_workspace(ws,exp_Il + 2 * n,xy + 4 * n);
+		sums[n] = series_sum(series + n,ws->exp_Il_arr,ws->xy_arr);
+	}
+}
+void evaluate_multi_series_and_derivs_ws
+(SeriesWorkspace* ws, const int Nseries, double complex* exp_Il, double complex* xy, const SeriesTerms* series,
+ double complex* sums, double complex* derivs){
+	for(int n=0; n<Nseries; n++){
+		fill_workspace(ws,exp_Il + 2 * n,xy + 4 * n);
+		sums[n] = series_sum_and_derivs(series + n,ws->exp_Il_arr,ws->xy_arr,derivs + 8 * n,derivs + 8 * n + 4);
+	}
+}
+void evaluate_multi_series_and_jacobian_ws
+(SeriesWorkspace* ws, const int Nseries, double complex* exp_Il, double complex* xy, const SeriesTerms* series,
+ double complex* sums, double complex* derivs, double complex* jacobians){
+	complex double jac_tot[64];
+	for(int n=0; n<Nseries; n++){
+		fill_workspace(ws,exp_Il + 2 * n,xy + 4 * n);
+		sums[n] = series_sum_and_jacobian(
+				series + n,ws->exp_Il_arr,ws->xy_arr,
+				derivs + 8 * n,derivs + 8 * n + 4,
+				jac_tot,jacobians + 64 * n
+		);
 	}
-	free_complex_variables_arr(xy_arr);
-	free_complex_variables_arr(exp_Il_arr);
-	free(jac_tot);
-	free(jac);
-
-	*re = creal(sum);
-	*im = cimag(sum);
 }